@@ -2,139 +2,462 @@
 """
 Claude Desktop specific diagnostic for MCP servers
 Checks for common issues that cause validation errors
+
+    python3 claude_desktop_diagnostic.py ./odata-mcp --service https://...
+
+All checks run over one server session: initialize, then tools/list, then
+a tools/call to the first tool. The tools/list response is read as a
+stream and its tools array is decoded one tool at a time, so services
+with tens of thousands of generated tools are checked without holding
+the whole response in memory. Every tool is validated against
+TOOL_SCHEMA, compiled once into a validator function, and the summary
+prints a count per issue category with a few example tool names.
 """
+import asyncio
+import codecs
+import functools
 import json
-import subprocess
+import re
 import sys
+import time
+from collections import Counter, defaultdict
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
 
-def check_server():
-    """Run diagnostic checks for Claude Desktop compatibility"""
-    print("=== Claude Desktop MCP Diagnostic ===\n")
-    
-    issues = []
-    tools = []
-    
-    # Test 1: Check tool inputSchema format
-    print("1. Checking tool schemas...")
-    tools_req = {"jsonrpc": "2.0", "id": 1, "method": "tools/list", "params": {}}
-    proc = subprocess.Popen(['./odata-mcp'], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    stdout, _ = proc.communicate(json.dumps(tools_req))
-    
-    try:
-        response = json.loads(stdout)
-        tools = response.get('result', {}).get('tools', [])
-        
-        for tool in tools:
-            # Check required fields
-            if 'name' not in tool:
-                issues.append(f"Tool missing 'name' field: {tool}")
-            if 'description' not in tool:
-                issues.append(f"Tool missing 'description' field: {tool.get('name', 'unknown')}")
-            if 'inputSchema' not in tool:
-                issues.append(f"Tool missing 'inputSchema' field: {tool.get('name', 'unknown')}")
-            else:
-                schema = tool['inputSchema']
-                # Check schema structure
-                if not isinstance(schema, dict):
-                    issues.append(f"Tool {tool['name']} has invalid inputSchema type")
-                elif 'type' not in schema:
-                    issues.append(f"Tool {tool['name']} inputSchema missing 'type' field")
-                elif schema.get('type') != 'object':
-                    issues.append(f"Tool {tool['name']} inputSchema type should be 'object'")
-                
-                # Check for properties
-                if 'properties' in schema:
-                    props = schema['properties']
-                    if not isinstance(props, dict):
-                        issues.append(f"Tool {tool['name']} has invalid properties type")
+from mcp_client import MCPClientError, MCPStdioClient
+
+CHUNK_SIZE = 64 * 1024
+EXAMPLES_PER_CATEGORY = 3
+
+# The JSON Schema types getJSONSchemaType in internal/bridge/bridge.go
+# produces for entity properties and function parameters
+PROPERTY_TYPES = ["string", "integer", "number", "boolean"]
+
+TOOL_SCHEMA = {
+    "type": "object",
+    "required": ["name", "description", "inputSchema"],
+    "properties": {
+        "name": {"type": "string", "minLength": 1},
+        "description": {"type": "string"},
+        "inputSchema": {
+            "type": "object",
+            "required": ["type"],
+            "x-requiredDeclared": True,
+            "properties": {
+                "type": {"const": "object"},
+                "properties": {
+                    "type": "object",
+                    "additionalProperties": {
+                        "type": "object",
+                        "required": ["type"],
+                        "properties": {
+                            "type": {"enum": PROPERTY_TYPES},
+                            "description": {"type": "string"},
+                        },
+                    },
+                },
+                "required": {"type": "array", "items": {"type": "string"}},
+            },
+        },
+    },
+}
+
+CALL_RESULT_SCHEMA = {
+    "type": "object",
+    "required": ["content"],
+    "properties": {
+        "content": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["type", "text"],
+                "properties": {"type": {"const": "text"}, "text": {"type": "string"}},
+            },
+        },
+    },
+}
+
+CAPABILITIES_SCHEMA = {
+    "type": "object",
+    "required": ["tools", "resources", "prompts"],
+    "properties": {cap: {"type": "object"} for cap in ("tools", "resources", "prompts")},
+}
+
+JSON_TYPES = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "null": lambda v: v is None,
+}
+
+Report = Callable[[str], None]
+Validator = Callable[[Any, Report], None]
+
+
+class IssueCounter:
+    """Issue counts per category, keeping only the first few examples of each"""
+
+    def __init__(self, examples: int = EXAMPLES_PER_CATEGORY):
+        self.counts = Counter()
+        self.examples = defaultdict(list)
+        self.max_examples = examples
+
+    def add(self, category: str, example: Optional[str] = None):
+        self.counts[category] += 1
+        if example is not None and len(self.examples[category]) < self.max_examples:
+            self.examples[category].append(example)
+
+    def reporter(self, example: Optional[str]) -> Report:
+        return lambda category: self.add(category, example)
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+
+def _compile(schema: Dict[str, Any], path: str) -> Validator:
+    """Turn a JSON Schema subset into one closure per keyword.
+
+    Supports type, const, enum, minLength, required, properties,
+    additionalProperties, items and the local x-requiredDeclared keyword
+    (every name in "required" must appear in "properties"). Each issue is
+    reported as "<path> <problem>", with "*" standing for any map key or
+    array index, so the same problem on many tools lands in one category.
+    """
+    checks = []
+    expected = schema.get("type")
+    is_type = JSON_TYPES[expected] if expected else None
+
+    if "const" in schema:
+        const = schema["const"]
+
+        def check_const(value, report):
+            if value != const:
+                report(f"{path} is not {json.dumps(const)}")
+        checks.append(check_const)
+
+    if "enum" in schema:
+        allowed = frozenset(schema["enum"])
+        names = ", ".join(schema["enum"])
+
+        def check_enum(value, report):
+            try:
+                ok = value in allowed
+            except TypeError:
+                ok = False
+            if not ok:
+                report(f"{path} not one of {names}")
+        checks.append(check_enum)
+
+    if "minLength" in schema:
+        min_length = schema["minLength"]
+
+        def check_min_length(value, report):
+            if len(value) < min_length:
+                report(f"{path} is empty" if min_length == 1 else f"{path} shorter than {min_length}")
+        checks.append(check_min_length)
+
+    if "required" in schema:
+        required = [(name, f"{path} missing '{name}'") for name in schema["required"]]
+
+        def check_required(value, report):
+            for name, category in required:
+                if name not in value:
+                    report(category)
+        checks.append(check_required)
+
+    if "properties" in schema:
+        properties = [(name, _compile(sub, f"{path}.{name}"))
+                      for name, sub in schema["properties"].items()]
+
+        def check_properties(value, report):
+            for name, validate in properties:
+                if name in value:
+                    validate(value[name], report)
+        checks.append(check_properties)
+
+    if "additionalProperties" in schema:
+        known = frozenset(schema.get("properties", ()))
+        validate_extra = _compile(schema["additionalProperties"], f"{path}.*")
+
+        def check_additional(value, report):
+            for name, item in value.items():
+                if name not in known:
+                    validate_extra(item, report)
+        checks.append(check_additional)
+
+    if "items" in schema:
+        validate_item = _compile(schema["items"], f"{path}.*")
+
+        def check_items(value, report):
+            for item in value:
+                validate_item(item, report)
+        checks.append(check_items)
+
+    if schema.get("x-requiredDeclared"):
+        def check_declared(value, report):
+            required, properties = value.get("required"), value.get("properties", {})
+            if isinstance(required, list) and isinstance(properties, dict):
+                for name in required:
+                    if isinstance(name, str) and name not in properties:
+                        report(f"{path}.required names an undeclared property")
+        checks.append(check_declared)
+
+    def validate(value, report):
+        if is_type is not None and not is_type(value):
+            report(f"{path} is not {'an' if expected[0] in 'aeiou' else 'a'} {expected}")
+            return
+        for check in checks:
+            check(value, report)
+    return validate
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_cached(schema_json: str, root: str) -> Validator:
+    return _compile(json.loads(schema_json), root)
+
+
+def compile_schema(schema: Dict[str, Any], root: str) -> Validator:
+    """Compiled validator for a schema, built once per schema and root name"""
+    return _compile_cached(json.dumps(schema, sort_keys=True), root)
+
+
+class StreamingStdioClient(MCPStdioClient):
+    """MCPStdioClient that can hand one response line over in chunks.
+
+    Only for strictly sequential use: after stream() writes its request,
+    the next line the server prints is taken to be the response.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._sink = None
+
+    async def _read_loop(self):
+        line = bytearray()
+        try:
+            while True:
+                chunk = await self.proc.stdout.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                self.bytes_read += len(chunk)
+                while chunk:
+                    end = chunk.find(b"\n")
+                    head, chunk = (chunk, b"") if end < 0 else (chunk[:end], chunk[end + 1:])
+                    if self._sink is not None:
+                        if head:
+                            self._sink.put_nowait(head)
+                        if end >= 0:
+                            self._sink.put_nowait(None)
+                            self._sink = None
                     else:
-                        # Check each property
-                        for prop_name, prop_def in props.items():
-                            if not isinstance(prop_def, dict):
-                                issues.append(f"Tool {tool['name']} property {prop_name} has invalid definition")
-                            elif 'type' not in prop_def:
-                                issues.append(f"Tool {tool['name']} property {prop_name} missing 'type'")
-        
-        print(f"   Found {len(tools)} tools")
-        
-    except Exception as e:
-        issues.append(f"Failed to parse tools response: {e}")
-    
-    # Test 2: Check response content format
-    print("\n2. Checking tool response format...")
-    if tools:
-        first_tool = tools[0]['name']
-        call_req = {
-            "jsonrpc": "2.0", 
-            "id": 2, 
-            "method": "tools/call", 
-            "params": {"name": first_tool, "arguments": {}}
-        }
-        
-        proc = subprocess.Popen(['./odata-mcp'], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        stdout, _ = proc.communicate(json.dumps(call_req))
-        
+                        line += head
+                        if end >= 0:
+                            self._handle_line(bytes(line))
+                            line.clear()
+        finally:
+            if self._sink is not None:
+                self._sink.put_nowait(MCPClientError(f"Server exited (code {self.proc.returncode})"))
+                self._sink = None
+            self._fail_pending()
+
+    async def stream(self, message: Dict[str, Any], timeout: Optional[float] = None) -> AsyncIterator[bytes]:
+        """Send a request and yield its raw response line chunk by chunk"""
+        queue = asyncio.Queue()
+        self._sink = queue
+        await self.write(message)
+        while True:
+            item = await asyncio.wait_for(queue.get(), timeout or self.timeout)
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+
+class StreamedArray:
+    """The elements of a `"<key>": [...]` array in a JSON text read in chunks.
+
+    Elements are decoded one at a time with JSONDecoder.raw_decode, so only
+    the element being decoded and the unread rest of the buffer are held in
+    memory. Once iteration ends, the text around the array (with the array
+    emptied) is parsed into `envelope`, which keeps the id, an error or a
+    nextCursor.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], key: str):
+        self.chunks = chunks
+        self.start = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self.text = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.envelope = None
+        self.bytes = 0
+        self.count = 0
+        self._buffer = ""
+        self._eof = False
+
+    async def _fill(self, keep_from: int = 0) -> bool:
+        """Drop the buffer before keep_from and append one more chunk"""
+        self._buffer = self._buffer[keep_from:]
+        if self._eof:
+            return False
+        try:
+            chunk = await self.chunks.__anext__()
+        except StopAsyncIteration:
+            self._eof = True
+            self._buffer += self.text.decode(b"", final=True)
+            return False
+        self.bytes += len(chunk)
+        self._buffer += self.text.decode(chunk)
+        return True
+
+    async def __aiter__(self):
+        searched = 0
+        match = self.start.search(self._buffer)
+        while match is None and await self._fill():
+            match = self.start.search(self._buffer, max(0, searched - 64))
+            searched = len(self._buffer)
+        if match is None:
+            self.envelope = json.loads(self._buffer)
+            return
+
+        prefix = self._buffer[:match.end()]
+        decode = json.JSONDecoder().raw_decode
+        pos = match.end()
+        while True:
+            while True:
+                buffer = self._buffer
+                while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                    pos += 1
+                if pos < len(buffer) or not await self._fill(pos):
+                    break
+                pos = 0
+            if pos >= len(self._buffer):
+                raise json.JSONDecodeError("Unterminated array", self._buffer, pos)
+            if self._buffer[pos] == "]":
+                break
+            try:
+                item, end = decode(self._buffer, pos)
+                # A number can stop at any digit ("2." decodes as 2), so a
+                # scalar is only complete once a delimiter follows it
+                complete = self._eof or (end < len(self._buffer) and (
+                    self._buffer[end - 1] in '}]"' or self._buffer[end] in " \t\r\n,]"))
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+                complete = False
+            if not complete:
+                # Read until the pending text has doubled, so one huge
+                # element is not re-decoded after every chunk
+                wanted = 2 * (len(self._buffer) - pos)
+                await self._fill(pos)
+                pos = 0
+                while len(self._buffer) < wanted and await self._fill():
+                    pass
+                continue
+            self.count += 1
+            pos = end
+            yield item
+
+        suffix = [self._buffer[pos:]]
+        while await self._fill(len(self._buffer)):
+            suffix.append(self._buffer)
+        self.envelope = json.loads(prefix + "".join(suffix))
+
+
+async def check_tools(client: StreamingStdioClient, issues: IssueCounter) -> Optional[str]:
+    """Stream tools/list through the tool validator; returns the first tool name"""
+    validate = compile_schema(TOOL_SCHEMA, "tool")
+    request = {"jsonrpc": "2.0", "id": 2, "method": "tools/list", "params": {}}
+    tools = StreamedArray(client.stream(request), "tools")
+    names = set()
+    first_tool = None
+    started = time.perf_counter()
+    try:
+        async for tool in tools:
+            name = tool.get("name") if isinstance(tool, dict) else None
+            label = name if isinstance(name, str) else f"tools[{tools.count - 1}]"
+            validate(tool, issues.reporter(label))
+            if isinstance(name, str):
+                if name in names:
+                    issues.add("tool.name is duplicated", name)
+                names.add(name)
+                first_tool = first_tool or name
+    except json.JSONDecodeError as e:
+        issues.add("tools/list response is not valid JSON", str(e))
+    elapsed = time.perf_counter() - started
+
+    if tools.envelope is not None and 'error' in tools.envelope:
+        issues.add("tools/list returned an error", json.dumps(tools.envelope['error']))
+    print(f"   Found {tools.count} tools ({tools.bytes / 1024 / 1024:.1f} MiB streamed "
+          f"in {elapsed * 1000:.0f} ms)")
+    return first_tool
+
+
+async def run_checks(server_command: List[str], issues: IssueCounter):
+    async with StreamingStdioClient(server_command) as client:
+        # Test 1: Check capability format
+        print("1. Checking capability declarations...")
+        try:
+            response = await client.initialize("claude-desktop-diagnostic")
+            if 'error' in response:
+                issues.add("initialize returned an error", json.dumps(response['error']))
+            caps = response.get('result', {}).get('capabilities', {})
+            compile_schema(CAPABILITIES_SCHEMA, "capabilities")(caps, issues.reporter("initialize"))
+            print("   Capabilities validated")
+        except (MCPClientError, asyncio.TimeoutError) as e:
+            issues.add("Failed to parse initialize response", repr(e))
+
+        # Test 2: Check tool inputSchema format
+        print("\n2. Checking tool schemas...")
+        first_tool = None
         try:
-            response = json.loads(stdout)
-            if 'result' in response:
-                result = response['result']
-                if 'content' not in result:
-                    issues.append("Tool response missing 'content' field")
-                elif not isinstance(result['content'], list):
-                    issues.append("Tool response 'content' should be an array")
-                else:
-                    for item in result['content']:
-                        if 'type' not in item:
-                            issues.append("Content item missing 'type' field")
-                        elif item['type'] != 'text':
-                            issues.append(f"Unknown content type: {item['type']}")
-                        if 'text' not in item:
-                            issues.append("Content item missing 'text' field")
-                        elif not isinstance(item['text'], str):
-                            issues.append("Content 'text' field must be a string")
-            
-            print("   Tool call response validated")
-            
-        except Exception as e:
-            issues.append(f"Failed to parse tool call response: {e}")
-    
-    # Test 3: Check capability format
-    print("\n3. Checking capability declarations...")
-    init_req = {"jsonrpc": "2.0", "id": 3, "method": "initialize", "params": {}}
-    proc = subprocess.Popen(['./odata-mcp'], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    stdout, _ = proc.communicate(json.dumps(init_req))
-    
+            first_tool = await check_tools(client, issues)
+        except (MCPClientError, asyncio.TimeoutError) as e:
+            issues.add("Failed to read tools response", repr(e))
+
+        # Test 3: Check response content format
+        print("\n3. Checking tool response format...")
+        if first_tool:
+            try:
+                response = await client.call_tool(first_tool, {})
+                if 'result' in response:
+                    compile_schema(CALL_RESULT_SCHEMA, "result")(response['result'],
+                                                                 issues.reporter(first_tool))
+                print("   Tool call response validated")
+            except (MCPClientError, asyncio.TimeoutError) as e:
+                issues.add("Failed to parse tool call response", repr(e))
+
+
+def check_server(server_command=None):
+    """Run diagnostic checks for Claude Desktop compatibility"""
+    print("=== Claude Desktop MCP Diagnostic ===\n")
+
+    issues = IssueCounter()
     try:
-        response = json.loads(stdout)
-        caps = response.get('result', {}).get('capabilities', {})
-        
-        # Check required capability sections
-        required_caps = ['tools', 'resources', 'prompts']
-        for cap in required_caps:
-            if cap not in caps:
-                issues.append(f"Missing capability section: {cap}")
-            elif not isinstance(caps[cap], dict):
-                issues.append(f"Capability {cap} should be an object")
-        
-        print("   Capabilities validated")
-        
-    except Exception as e:
-        issues.append(f"Failed to parse initialize response: {e}")
-    
+        asyncio.run(run_checks(server_command or ['./odata-mcp'], issues))
+    except OSError as e:
+        issues.add("Failed to start server", repr(e))
+
     # Summary
     print("\n=== Diagnostic Summary ===")
-    if issues:
-        print(f"\n❌ Found {len(issues)} potential issues:\n")
-        for i, issue in enumerate(issues, 1):
-            print(f"   {i}. {issue}")
+    if issues.total:
+        print(f"\n❌ Found {issues.total} potential issues in {len(issues.counts)} categories:\n")
+        for category, count in issues.counts.most_common():
+            print(f"   {count:>7}  {category}")
+            examples = issues.examples[category]
+            if examples:
+                more = ", ..." if count > len(examples) else ""
+                print(f"            e.g. {', '.join(examples)}{more}")
         print("\nThese issues might cause validation errors in Claude Desktop.")
     else:
         print("\n✅ No issues found! Server appears to be Claude Desktop compatible.")
-    
-    return len(issues) == 0
+
+    return issues.total == 0
 
 if __name__ == "__main__":
-    if check_server():
+    if check_server(sys.argv[1:]):
         sys.exit(0)
     else:
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
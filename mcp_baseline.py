@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Performance baselines and regression gate for the MCP test scripts
+
+mcp_compliance_test.py and test_mcp_client.py time every test and every
+JSON-RPC method. With --record they store the timings in a baseline file
+keyed by the server's serverInfo.version. With --compare they run the
+suite again and check the new timings against a stored version:
+
+    python3 mcp_compliance_test.py --record ./odata-mcp-1.5.0
+    python3 mcp_compliance_test.py --compare 1.5.0 ./odata-mcp
+    python3 test_mcp_client.py --compare ./odata-mcp
+
+Each metric compares the median of the current samples with the median
+of the baseline samples. A metric counts as a regression when the lower
+bound of the bootstrap confidence interval for that ratio is above
+1 + --threshold and the medians differ by more than --min-delta-ms. So
+"tools/list is 30% slower" is reported only when the trials show the
+slowdown clearly and not as noise. Both runs should use the same
+--trials count on the same machine.
+
+Every run also starts one extra server to time spawn-to-initialize and a
+cold tools/list. Stored baselines can be listed and compared offline:
+
+    python3 mcp_baseline.py list
+    python3 mcp_baseline.py compare 1.5.0 1.6.0 --suite compliance
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from mcp_client import MCPClientError, MCPStdioClient, split_command
+
+BASELINE_FORMAT = 1
+DEFAULT_BASELINE = "perf_baseline.json"
+DEFAULT_TRIALS = 10
+
+
+class TimingRecorder:
+    """Samples in seconds per metric name ("test:...", "method:...", "startup:...")"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.server_info = {}
+
+    def add(self, metric: str, seconds: float):
+        self.samples[metric].append(seconds)
+
+    def add_request(self, test: str, method: Optional[str], seconds: float):
+        self.add(f"test:{test}", seconds)
+        if method:
+            self.add(f"method:{method}", seconds)
+
+    @property
+    def version(self) -> str:
+        return str(self.server_info.get("version") or "unknown")
+
+    def metrics_ms(self) -> Dict[str, List[float]]:
+        return {metric: [round(s * 1000, 3) for s in samples]
+                for metric, samples in sorted(self.samples.items())}
+
+
+async def probe_server(command: Union[str, Sequence[str]], recorder: TimingRecorder,
+                       timeout: float = 30.0):
+    """Start one server and time spawn-to-initialize and a cold tools/list"""
+    try:
+        async with MCPStdioClient(command, timeout=timeout) as client:
+            response = await client.initialize("mcp-baseline")
+            recorder.add("startup:initialize", time.perf_counter() - client.started_at)
+            recorder.server_info = response.get('result', {}).get('serverInfo', {}) or {}
+            started = time.perf_counter()
+            await client.list_tools()
+            recorder.add("startup:tools/list", time.perf_counter() - started)
+    except (MCPClientError, OSError, asyncio.TimeoutError) as e:
+        print(f"⚠️  Startup probe failed: {e!r}", file=sys.stderr)
+
+
+def load_baselines(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {"format": BASELINE_FORMAT, "versions": {}}
+    with open(path) as f:
+        baselines = json.load(f)
+    if baselines.get("format") != BASELINE_FORMAT:
+        raise SystemExit(f"❌ {path} has baseline format {baselines.get('format')}, "
+                         f"expected {BASELINE_FORMAT}")
+    return baselines
+
+
+def save_run(path: str, suite: str, recorder: TimingRecorder, command: Union[str, Sequence[str]],
+             trials: int):
+    """Store (or replace) the timings of one suite for the recorded server version"""
+    baselines = load_baselines(path)
+    entry = baselines["versions"].setdefault(recorder.version, {})
+    entry[suite] = {
+        "recorded": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "server_info": recorder.server_info,
+        "command": split_command(command),
+        "trials": trials,
+        "metrics_ms": recorder.metrics_ms(),
+    }
+    with open(path, "w") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+
+
+def pick_version(baselines: Dict[str, Any], suite: str, wanted: Optional[str],
+                 current: Optional[str] = None) -> Optional[str]:
+    """Requested version, else the latest recorded one other than the current"""
+    candidates = {version: entry[suite] for version, entry in baselines["versions"].items()
+                  if suite in entry}
+    if wanted and wanted != "latest":
+        return wanted if wanted in candidates else None
+    others = [v for v in candidates if v != current] or list(candidates)
+    if not others:
+        return None
+    return max(others, key=lambda v: candidates[v]["recorded"])
+
+
+def bootstrap_ratio_ci(baseline: Sequence[float], current: Sequence[float],
+                       iterations: int = 2000, confidence: float = 0.95,
+                       rng: Optional[random.Random] = None) -> Tuple[float, float, float]:
+    """Ratio of medians (current / baseline) and its bootstrap confidence interval"""
+    rng = rng or random.Random(1)
+    ratio = statistics.median(current) / max(statistics.median(baseline), 1e-9)
+    ratios = []
+    for _ in range(iterations):
+        b = statistics.median(rng.choices(baseline, k=len(baseline)))
+        c = statistics.median(rng.choices(current, k=len(current)))
+        ratios.append(c / max(b, 1e-9))
+    ratios.sort()
+    tail = (1 - confidence) / 2
+    low = ratios[int(tail * (iterations - 1))]
+    high = ratios[int((1 - tail) * (iterations - 1))]
+    return ratio, low, high
+
+
+def compare_metrics(baseline: Dict[str, List[float]], current: Dict[str, List[float]],
+                    threshold: float, confidence: float = 0.95, min_delta_ms: float = 1.0,
+                    iterations: int = 2000) -> List[Dict[str, Any]]:
+    """One row per metric present in both runs, with the regression verdict"""
+    rng = random.Random(1)
+    rows = []
+    for metric in sorted(set(baseline) & set(current)):
+        base, cur = baseline[metric], current[metric]
+        row = {"metric": metric, "baseline_ms": statistics.median(base),
+               "current_ms": statistics.median(cur), "samples": (len(base), len(cur))}
+        if len(base) < 3 or len(cur) < 3:
+            row.update(ratio=row["current_ms"] / max(row["baseline_ms"], 1e-9), low=None, high=None,
+                       verdict="too few samples")
+        else:
+            ratio, low, high = bootstrap_ratio_ci(base, cur, iterations, confidence, rng)
+            # Sub-millisecond steps are scheduler noise, whatever their ratio
+            delta = row["current_ms"] - row["baseline_ms"]
+            if low > 1 + threshold and delta > min_delta_ms:
+                verdict = "regression"
+            elif high < 1 - threshold and -delta > min_delta_ms:
+                verdict = "faster"
+            else:
+                verdict = "ok"
+            row.update(ratio=ratio, low=low, high=high, verdict=verdict)
+        rows.append(row)
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]], base_version: str, current_version: str,
+                     confidence: float, threshold: float) -> int:
+    """Print the comparison table; returns the number of regressions"""
+    print(f"\n=== Performance vs Baseline {base_version} (current {current_version}) ===")
+    print(f"  {'base ms':>9} {'now ms':>9} {'change':>8}  {int(confidence * 100)}% CI{'':<9} verdict   metric")
+    regressions = 0
+    for row in rows:
+        change = (row["ratio"] - 1) * 100
+        ci = "-"
+        if row["low"] is not None:
+            ci = f"[{(row['low'] - 1) * 100:+.0f}%, {(row['high'] - 1) * 100:+.0f}%]"
+        marker = {"regression": "❌", "faster": "🚀"}.get(row["verdict"], "  ")
+        regressions += row["verdict"] == "regression"
+        print(f"  {row['baseline_ms']:>9.2f} {row['current_ms']:>9.2f} {change:>+7.1f}%  {ci:<15} "
+              f"{marker} {row['verdict']:<10} {row['metric']}")
+    if regressions:
+        print(f"\n❌ {regressions} significant slowdown(s) of more than {threshold * 100:.0f}%")
+    else:
+        print(f"\n✅ No significant slowdowns of more than {threshold * 100:.0f}%")
+    return regressions
+
+
+def add_baseline_arguments(parser: argparse.ArgumentParser):
+    group = parser.add_argument_group("performance baseline")
+    group.add_argument("--trials", type=int, metavar="N",
+                       help=f"run the suite N times (default: 1, or {DEFAULT_TRIALS} with --record/--compare)")
+    group.add_argument("--baseline", default=DEFAULT_BASELINE, metavar="FILE",
+                       help=f"baseline file (default: {DEFAULT_BASELINE})")
+    group.add_argument("--record", action="store_true",
+                       help="store the timings as the baseline for this serverInfo.version")
+    group.add_argument("--compare", nargs="?", const="latest", metavar="VERSION",
+                       help="compare with a stored version (default: latest recorded other version)")
+    group.add_argument("--threshold", type=float, default=0.10,
+                       help="slowdown that must be exceeded to count, as a fraction (default: 0.10)")
+    group.add_argument("--confidence", type=float, default=0.95,
+                       help="bootstrap confidence level (default: 0.95)")
+    group.add_argument("--min-delta-ms", type=float, default=1.0,
+                       help="smallest median slowdown that counts, in ms (default: 1)")
+
+
+def trial_count(args) -> int:
+    if args.trials:
+        return args.trials
+    return DEFAULT_TRIALS if args.record or args.compare else 1
+
+
+def finish_baseline(args, suite: str, recorder: TimingRecorder,
+                    command: Union[str, Sequence[str]]) -> bool:
+    """Compare and/or record after a run; False when a regression was found"""
+    ok = True
+    if args.compare:
+        baselines = load_baselines(args.baseline)
+        version = pick_version(baselines, suite, args.compare, recorder.version)
+        if version is None:
+            print(f"\n⚠️  No {suite} baseline for {args.compare} in {args.baseline}, nothing to compare")
+        else:
+            stored = baselines["versions"][version][suite]["metrics_ms"]
+            rows = compare_metrics(stored, recorder.metrics_ms(), args.threshold, args.confidence,
+                                   args.min_delta_ms)
+            ok = print_comparison(rows, version, recorder.version, args.confidence, args.threshold) == 0
+    if args.record:
+        save_run(args.baseline, suite, recorder, command, trial_count(args))
+        print(f"\n📝 {suite} baseline for version {recorder.version} written to {args.baseline}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and compare stored performance baselines")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, metavar="FILE",
+                        help=f"baseline file (default: {DEFAULT_BASELINE})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="list recorded versions and suites")
+    compare = sub.add_parser("compare", help="compare two recorded versions")
+    compare.add_argument("old")
+    compare.add_argument("new")
+    compare.add_argument("--suite", default="compliance", help="suite to compare (default: compliance)")
+    compare.add_argument("--threshold", type=float, default=0.10,
+                         help="slowdown that must be exceeded to count (default: 0.10)")
+    compare.add_argument("--confidence", type=float, default=0.95,
+                         help="bootstrap confidence level (default: 0.95)")
+    compare.add_argument("--min-delta-ms", type=float, default=1.0,
+                         help="smallest median slowdown that counts, in ms (default: 1)")
+    args = parser.parse_args()
+
+    baselines = load_baselines(args.baseline)
+    if args.command == "list":
+        print(f"=== Baselines in {args.baseline} ===")
+        for version, entry in sorted(baselines["versions"].items()):
+            for suite, run in sorted(entry.items()):
+                print(f"  {version:<14} {suite:<12} {run['recorded']}  {run['trials']} trials, "
+                      f"{len(run['metrics_ms'])} metrics")
+        return
+
+    runs = []
+    for version in (args.old, args.new):
+        run = baselines["versions"].get(version, {}).get(args.suite)
+        if run is None:
+            raise SystemExit(f"❌ No {args.suite} baseline for version {version} in {args.baseline}")
+        runs.append(run["metrics_ms"])
+    rows = compare_metrics(runs[0], runs[1], args.threshold, args.confidence, args.min_delta_ms)
+    if print_comparison(rows, args.old, args.new, args.confidence, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Response-cache hit-ratio simulator for odata-mcp traces
+
+Reads --trace-mcp logs and turns every read tools/call (filter, count,
+search, get) into a cache key: the tool name plus its normalized OData
+arguments ($filter, $select, $expand, $orderby, $top, $skip and entity
+keys). The calls are then replayed through simulated LRU, LFU and TTL
+caches in front of the OData client. Each cache hit is one upstream
+request avoided.
+
+    python3 mcp_cache_sim.py                          newest /tmp/mcp_trace_*.log
+    python3 mcp_cache_sim.py traces/ --sizes 32,256,2048 --ttls 30,300
+    python3 mcp_cache_sim.py 'traces/*.log' --shared --max-age 600 --json cache.json
+
+Each trace is one server process with its own cache. --shared simulates a
+single cache for all traces, merged by timestamp. Only successful
+responses are cached. A create, update or delete on an entity set
+invalidates that set's entries, as a real cache would have to.
+
+The report also lists two patterns where a client re-queries without
+need: $skip walks (the same query paged through with a growing $skip) and
+identical calls repeated within --window seconds.
+"""
+import argparse
+import json
+import re
+import sys
+from collections import Counter, OrderedDict, defaultdict
+
+from mcp_loadgen import tool_type
+from mcp_payload_profile import entity_set_of
+from view_trace import (LatencyHistogram, _id_key, decode_raw, expand_trace_paths, iter_entries,
+                        iter_lines, latest_trace_file, parse_timestamp_ns, tool_name)
+
+CACHE_LEVELS = ('TRANSPORT_IN', 'TRANSPORT_OUT', 'TRANSPORT_RAW_OUT')
+READ_OPERATIONS = ("filter", "count", "search", "get")
+WRITE_OPERATIONS = ("create", "update", "delete")
+# Friendly argument names accepted by the bridge (mapParameterToOData)
+ODATA_PARAMETERS = ("filter", "select", "expand", "orderby", "top", "skip", "count", "search", "format")
+# Options whose comma-separated items can be reordered without changing the result
+UNORDERED_LISTS = ("$select", "$expand")
+
+
+class ToolCall:
+    __slots__ = ('trace', 'line_no', 'ts', 'tool', 'op', 'entity_set', 'key', 'page_key',
+                 'skip', 'top', 'ok', 'latency', 'size')
+
+    def __init__(self, trace, line_no, ts, tool, op, entity_set, key, page_key, skip, top):
+        self.trace = trace
+        self.line_no = line_no
+        self.ts = ts
+        self.tool = tool
+        self.op = op
+        self.entity_set = entity_set
+        self.key = key
+        self.page_key = page_key
+        self.skip = skip
+        self.top = top
+        self.ok = None
+        self.latency = None
+        self.size = None
+
+
+def collapse_whitespace(text):
+    """Collapse runs of whitespace outside '...' string literals"""
+    parts = text.split("'")
+    parts[::2] = [re.sub(r"\s+", " ", part) for part in parts[::2]]
+    return "'".join(parts).strip()
+
+
+def normalize_arguments(arguments):
+    """OData options and key values of a tool call, in a canonical form"""
+    normalized = {}
+    for name, value in (arguments or {}).items():
+        if name in ODATA_PARAMETERS:
+            name = "$" + name
+        if value is None or value == "":
+            continue
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        if isinstance(value, str):
+            value = collapse_whitespace(value)
+            if name in UNORDERED_LISTS:
+                value = ",".join(sorted(item.strip() for item in value.split(",")))
+            elif name == "$orderby":
+                value = ",".join(item.strip() for item in value.split(","))
+        normalized[name] = value
+    return normalized
+
+
+def cache_key(tool, arguments):
+    return json.dumps([tool, arguments], sort_keys=True, separators=(",", ":"))
+
+
+def read_calls(trace_file):
+    """tools/call requests of one trace with outcome, latency and response size"""
+    calls = []
+    pending = {}
+    last_out = None
+    with open(trace_file, 'rb') as f:
+        for line_no, _, level, entry in iter_entries(iter_lines(f), CACHE_LEVELS):
+            if entry is None:
+                continue
+            ts = parse_timestamp_ns(entry.get('timestamp'))
+            data = entry.get('data') if isinstance(entry.get('data'), dict) else {}
+            if level == 'TRANSPORT_IN':
+                msg = decode_raw(entry)
+                name = tool_name(msg) if msg else None
+                if name is None or ts is None:
+                    continue
+                params = msg.get('params') or {}
+                arguments = params.get('arguments') if isinstance(params.get('arguments'), dict) else {}
+                arguments = normalize_arguments(arguments)
+                paging = {k: v for k, v in arguments.items() if k not in ("$skip", "$top")}
+                skip, top = arguments.get("$skip", 0), arguments.get("$top")
+                call = ToolCall(trace_file, line_no, ts, name, tool_type(name), entity_set_of(name),
+                                cache_key(name, arguments), cache_key(name, paging),
+                                skip if isinstance(skip, int) else 0,
+                                top if isinstance(top, int) else None)
+                calls.append(call)
+                msg_id = msg.get('id')
+                pending[_id_key(msg_id if msg_id is not None else 0)] = call
+            elif level == 'TRANSPORT_OUT':
+                call = pending.pop(_id_key(data.get('id')), None)
+                last_out = call
+                if call is not None:
+                    call.ok = not data.get('has_error')
+                    call.latency = ts - call.ts if ts is not None else None
+            elif level == 'TRANSPORT_RAW_OUT' and last_out is not None:
+                last_out.size = data.get('size')
+                # Tool errors are results with isError set, not JSON-RPC errors
+                if last_out.ok and '"isError":true' in (data.get('raw') or ''):
+                    last_out.ok = False
+                last_out = None
+    return calls
+
+
+class ResponseCache:
+    """Bounded response cache; subclasses decide what to evict"""
+
+    def __init__(self, size=None, max_age=None):
+        self.size = size
+        self.max_age_ns = int(max_age * 1e9) if max_age is not None else None
+        self.entries = {}
+
+    def get(self, key, ts):
+        entry = self.entries.get(key)
+        if entry is None:
+            return False
+        if self.max_age_ns is not None and ts - entry[0] > self.max_age_ns:
+            self.remove(key)
+            return False
+        self.touch(key)
+        return True
+
+    def put(self, key, ts, entity_set):
+        if key in self.entries:
+            self.remove(key)
+        while self.size is not None and len(self.entries) >= self.size:
+            self.evict()
+        self.entries[key] = (ts, entity_set)
+        self.added(key)
+
+    def invalidate(self, entity_set):
+        for key in [k for k, (_, s) in self.entries.items() if s == entity_set]:
+            self.remove(key)
+
+    def remove(self, key):
+        del self.entries[key]
+
+    def touch(self, key):
+        pass
+
+    def added(self, key):
+        pass
+
+    def evict(self):
+        raise NotImplementedError
+
+
+class LRUCache(ResponseCache):
+    def __init__(self, size=None, max_age=None):
+        super().__init__(size, max_age)
+        self.order = OrderedDict()
+
+    def touch(self, key):
+        self.order.move_to_end(key)
+
+    def added(self, key):
+        self.order[key] = None
+
+    def remove(self, key):
+        super().remove(key)
+        del self.order[key]
+
+    def evict(self):
+        self.remove(next(iter(self.order)))
+
+
+class LFUCache(ResponseCache):
+    """Least frequently used first, least recently used among equals (O(1) buckets)"""
+
+    def __init__(self, size=None, max_age=None):
+        super().__init__(size, max_age)
+        self.freq = {}
+        self.buckets = defaultdict(OrderedDict)
+        self.min_freq = 0
+
+    def touch(self, key):
+        freq = self.freq[key]
+        del self.buckets[freq][key]
+        if not self.buckets[freq]:
+            del self.buckets[freq]
+            if self.min_freq == freq:
+                self.min_freq = freq + 1
+        self.freq[key] = freq + 1
+        self.buckets[freq + 1][key] = None
+
+    def added(self, key):
+        self.freq[key] = 1
+        self.buckets[1][key] = None
+        self.min_freq = 1
+
+    def remove(self, key):
+        super().remove(key)
+        freq = self.freq.pop(key)
+        del self.buckets[freq][key]
+        if not self.buckets[freq]:
+            del self.buckets[freq]
+            if self.min_freq == freq:
+                self.min_freq = min(self.buckets, default=0)
+
+    def evict(self):
+        self.remove(next(iter(self.buckets[self.min_freq])))
+
+
+class TTLCache(ResponseCache):
+    """Unbounded; entries expire max_age seconds after they were stored"""
+
+    def evict(self):
+        pass
+
+
+class Simulation:
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+        self.lookups = 0
+        self.hits = 0
+        self.bytes_saved = 0
+        self.saved_latency = LatencyHistogram()
+
+    def run(self, calls):
+        cache = self.factory()
+        for call in calls:
+            if call.op in WRITE_OPERATIONS:
+                cache.invalidate(call.entity_set)
+                continue
+            if call.op not in READ_OPERATIONS:
+                continue
+            self.lookups += 1
+            if cache.get(call.key, call.ts):
+                self.hits += 1
+                self.bytes_saved += call.size or 0
+                if call.latency is not None:
+                    self.saved_latency.add(call.latency)
+            elif call.ok:
+                cache.put(call.key, call.ts, call.entity_set)
+
+    @property
+    def hit_ratio(self):
+        return self.hits / self.lookups if self.lookups else 0.0
+
+
+def build_simulations(sizes, ttls, max_age):
+    simulations = [Simulation("unbounded (upper bound)", lambda: LRUCache(None, max_age))]
+    for size in sizes:
+        simulations.append(Simulation(f"LRU {size}", lambda size=size: LRUCache(size, max_age)))
+    for size in sizes:
+        simulations.append(Simulation(f"LFU {size}", lambda size=size: LFUCache(size, max_age)))
+    for ttl in ttls:
+        simulations.append(Simulation(f"TTL {ttl:g}s", lambda ttl=ttl: TTLCache(None, ttl)))
+    return simulations
+
+
+def find_skip_walks(calls, min_pages):
+    """Runs of calls paging through one query with a growing $skip"""
+    walks = []
+    open_walks = {}
+    for call in calls:
+        if call.op not in ("filter", "search"):
+            continue
+        walk = open_walks.get((call.trace, call.page_key))
+        if walk is not None and call.skip > walk["last_skip"]:
+            walk["pages"] += 1
+            walk["last_skip"] = call.skip
+            walk["rows"] = call.skip + (call.top or 0)
+            walk["end"] = call.ts
+            continue
+        if walk is not None and walk["pages"] >= min_pages:
+            walks.append(walk)
+        open_walks[(call.trace, call.page_key)] = {
+            "tool": call.tool, "trace": call.trace, "line": call.line_no, "start": call.ts,
+            "end": call.ts, "pages": 1, "last_skip": call.skip, "rows": call.skip + (call.top or 0)}
+    walks.extend(walk for walk in open_walks.values() if walk["pages"] >= min_pages)
+    return sorted(walks, key=lambda walk: -walk["pages"])
+
+
+def find_repeats(calls, window):
+    """Read calls identical to one made less than `window` seconds before"""
+    window_ns = int(window * 1e9)
+    last_seen = {}
+    by_tool = Counter()
+    by_key = Counter()
+    for call in calls:
+        if call.op in WRITE_OPERATIONS:
+            for key in [k for k, (_, s) in last_seen.items() if s == call.entity_set]:
+                del last_seen[key]
+            continue
+        if call.op not in READ_OPERATIONS:
+            continue
+        previous = last_seen.get(call.key)
+        if previous is not None and call.ts - previous[0] < window_ns:
+            by_tool[call.tool] += 1
+            by_key[call.key] += 1
+        last_seen[call.key] = (call.ts, call.entity_set)
+    return by_tool, by_key
+
+
+def _ms(value_ns):
+    return "-" if value_ns is None else f"{value_ns / 1e6:.1f}"
+
+
+def print_report(calls, simulations, walks, repeats, window, top):
+    reads = sum(1 for call in calls if call.op in READ_OPERATIONS)
+    writes = sum(1 for call in calls if call.op in WRITE_OPERATIONS)
+    distinct = len({call.key for call in calls if call.op in READ_OPERATIONS})
+    print("=== Response Cache Simulation ===")
+    print(f"  {len(calls)} tool calls: {reads} cacheable reads ({distinct} distinct), "
+          f"{writes} writes (invalidate their entity set)")
+
+    print(f"\n  {'cache':<24} {'hit ratio':>9} {'avoided':>8} {'KiB saved':>10} {'p50 saved':>10} "
+          f"{'total saved':>12}")
+    for sim in simulations:
+        total_s = sim.saved_latency.total / 1e9
+        print(f"  {sim.name:<24} {sim.hit_ratio * 100:>8.1f}% {sim.hits:>8} {sim.bytes_saved / 1024:>10.1f} "
+              f"{_ms(sim.saved_latency.percentile(50)):>7} ms {total_s:>10.1f} s")
+    print("  (avoided = upstream OData requests a cache would have answered; latency is the "
+          "recorded time of those calls)")
+
+    by_tool, by_key = repeats
+    print(f"\n=== Identical Calls Within {window:g}s ===")
+    if not by_tool:
+        print("  None")
+    for tool, count in by_tool.most_common(top):
+        print(f"  {count:>7}  {tool}")
+    for key, count in by_key.most_common(min(top, 5)):
+        tool, arguments = json.loads(key)
+        print(f"  🔁 {count} x {tool} {json.dumps(arguments)[:120]}")
+
+    print("\n=== $skip Walks ===")
+    if not walks:
+        print("  None")
+    for walk in walks[:top]:
+        seconds = (walk["end"] - walk["start"]) / 1e9
+        print(f"  {walk['pages']:>4} pages, ~{walk['rows']} rows in {seconds:.1f}s  {walk['tool']} "
+              f"({walk['trace']} line {walk['line']})")
+    if walks:
+        print(f"  ⚠️  {len(walks)} paged walks: a larger $top or a server-side $filter may replace them")
+
+
+def report_json(calls, simulations, walks, repeats):
+    by_tool, by_key = repeats
+    return {
+        "calls": len(calls),
+        "reads": sum(1 for call in calls if call.op in READ_OPERATIONS),
+        "simulations": {sim.name: {"lookups": sim.lookups, "hits": sim.hits, "hit_ratio": sim.hit_ratio,
+                                   "bytes_saved": sim.bytes_saved,
+                                   "latency_saved_s": sim.saved_latency.total / 1e9}
+                        for sim in simulations},
+        "repeats_by_tool": dict(by_tool),
+        "repeated_calls": [{"key": json.loads(key), "repeats": count} for key, count in by_key.most_common()],
+        "skip_walks": walks,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate response caches over recorded tool calls")
+    parser.add_argument("paths", nargs="*", help="trace files, globs or directories "
+                                                  "(default: newest /tmp/mcp_trace_*.log)")
+    parser.add_argument("--sizes", default="16,128,1024",
+                        help="LRU/LFU cache sizes in entries (default: 16,128,1024)")
+    parser.add_argument("--ttls", default="10,60,300",
+                        help="TTL cache lifetimes in seconds (default: 10,60,300)")
+    parser.add_argument("--max-age", type=float, metavar="SECONDS",
+                        help="also expire LRU/LFU entries after this many seconds")
+    parser.add_argument("--shared", action="store_true",
+                        help="one cache for all traces instead of one per trace")
+    parser.add_argument("--window", type=float, default=60.0,
+                        help="seconds within which an identical call counts as a repeat (default: 60)")
+    parser.add_argument("--min-pages", type=int, default=3,
+                        help="pages before a $skip sequence is reported as a walk (default: 3)")
+    parser.add_argument("--top", type=int, default=10, help="rows to list per pattern (default: 10)")
+    parser.add_argument("--json", metavar="FILE", help="also write the results as JSON")
+    args = parser.parse_args()
+    try:
+        sizes = [int(size) for size in args.sizes.split(",") if size]
+    except ValueError:
+        parser.error(f"invalid --sizes list: {args.sizes!r}")
+    if not sizes or min(sizes) < 1:
+        parser.error("--sizes must be positive entry counts")
+    try:
+        ttls = [float(ttl) for ttl in args.ttls.split(",") if ttl]
+    except ValueError:
+        parser.error(f"invalid --ttls list: {args.ttls!r}")
+    if min(ttls, default=1) <= 0:
+        parser.error("--ttls must be positive numbers of seconds")
+    if args.max_age is not None and args.max_age <= 0:
+        parser.error("--max-age must be a positive number of seconds")
+
+    files = expand_trace_paths(args.paths) if args.paths else [latest_trace_file()]
+    files = [f for f in files if f]
+    if not files:
+        print("No trace files found")
+        sys.exit(1)
+
+    traces = [read_calls(f) for f in files]
+    if args.shared:
+        traces = [sorted((call for calls in traces for call in calls), key=lambda call: call.ts)]
+    simulations = build_simulations(sizes, ttls, args.max_age)
+    for calls in traces:
+        for sim in simulations:
+            sim.run(calls)
+
+    all_calls = [call for calls in traces for call in calls]
+    walks = find_skip_walks(all_calls, args.min_pages)
+    repeats = (Counter(), Counter())
+    for calls in traces:
+        by_tool, by_key = find_repeats(calls, args.window)
+        repeats[0].update(by_tool)
+        repeats[1].update(by_key)
+    print(f"📡 {len(files)} trace file(s){', shared cache' if args.shared else ''}\n")
+    print_report(all_calls, simulations, walks, repeats, args.window, args.top)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report_json(all_calls, simulations, walks, repeats), f, indent=2)
+        print(f"\n📝 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
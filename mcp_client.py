@@ -0,0 +1,587 @@
+#!/usr/bin/env python3
+"""
+Asyncio JSON-RPC client for the odata-mcp stdio transport
+
+Spawns the server, writes newline-delimited requests and matches responses
+to futures by id, so many requests can be in flight on one process. Shared
+by the compliance tester, the edge-case client and the Desktop diagnostic.
+MCPStreamableHTTPClient offers the same calls over --transport
+streamable-http using a small pool of keep-alive connections.
+
+    async with MCPStdioClient(["./odata-mcp", "--service", url]) as client:
+        await client.initialize()
+        results = await asyncio.gather(*[
+            client.call_tool("filter_Orders", {"$top": 5}) for _ in range(20)
+        ])
+"""
+import asyncio
+import itertools
+import json
+import shlex
+import socket
+import subprocess
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urlsplit
+
+# tools/list for large services easily exceeds asyncio's 64 KiB line limit
+DEFAULT_LINE_LIMIT = 256 * 1024 * 1024
+
+_NO_ID = object()
+
+
+class MCPClientError(Exception):
+    """Raised when the server process is unusable (not started, exited, ...)"""
+
+
+def message_key(msg_id: Any) -> str:
+    """Canonical key used to match a response to its request"""
+    return json.dumps(msg_id, sort_keys=True)
+
+
+def split_command(command: Union[str, Sequence[str]]) -> List[str]:
+    if isinstance(command, str):
+        return shlex.split(command)
+    return list(command)
+
+
+class _MCPSession:
+    """Request helpers shared by the stdio and HTTP clients.
+
+    Subclasses provide write() for fire-and-forget messages and send() for
+    requests that wait for their response.
+    """
+
+    async def request(self, method: str, params: Optional[Dict[str, Any]] = None,
+                      id: Any = _NO_ID, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Send a request with an auto-assigned id unless one is given"""
+        message = {"jsonrpc": "2.0", "id": next(self._ids) if id is _NO_ID else id,
+                   "method": method}
+        if params is not None:
+            message["params"] = params
+        return await self.send(message, timeout)
+
+    async def notify(self, method: str, params: Optional[Dict[str, Any]] = None):
+        message = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            message["params"] = params
+        await self.write(message)
+
+    async def initialize(self, client_name: str = "mcp-client", client_version: str = "1.0") -> Dict[str, Any]:
+        """Perform the initialize / initialized handshake"""
+        response = await self.request("initialize", {
+            "protocolVersion": "2024-11-05",
+            "capabilities": {},
+            "clientInfo": {"name": client_name, "version": client_version}
+        })
+        await self.notify("initialized")
+        return response
+
+    async def list_tools(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        response = await self.request("tools/list", {}, timeout=timeout)
+        return response.get('result', {}).get('tools', [])
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None,
+                        timeout: Optional[float] = None) -> Dict[str, Any]:
+        return await self.request("tools/call", {"name": name, "arguments": arguments or {}},
+                                  timeout=timeout)
+
+
+class MCPStdioClient(_MCPSession):
+    """Pipelined JSON-RPC client speaking to one odata-mcp process over stdio"""
+
+    def __init__(self, command: Union[str, Sequence[str]], timeout: float = 30.0,
+                 on_notification: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 stderr=subprocess.DEVNULL, line_limit: int = DEFAULT_LINE_LIMIT,
+                 env: Optional[Dict[str, str]] = None):
+        self.command = split_command(command)
+        self.env = env
+        self.timeout = timeout
+        self.on_notification = on_notification
+        self.stderr = stderr
+        self.line_limit = line_limit
+        self.proc = None
+        self.started_at = None
+        self.bytes_read = 0
+        self.unsolicited = []
+        self._pending = {}
+        self._null_waiters = []
+        self._ids = itertools.count(1)
+        self._reader_task = None
+        self._write_lock = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending) + len(self._null_waiters)
+
+    async def start(self):
+        self._write_lock = asyncio.Lock()
+        self.started_at = time.perf_counter()
+        self.proc = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=self.stderr,
+            limit=self.line_limit,
+            env=self.env
+        )
+        self._reader_task = asyncio.create_task(self._read_loop())
+
+    async def _read_loop(self):
+        try:
+            while True:
+                line = await self.proc.stdout.readline()
+                if not line:
+                    break
+                self.bytes_read += len(line)
+                self._handle_line(line)
+        finally:
+            self._fail_pending()
+
+    def _handle_line(self, line: bytes):
+        line = line.strip()
+        if not line:
+            return
+        try:
+            msg = json.loads(line)
+        except json.JSONDecodeError:
+            self.unsolicited.append({"raw": line.decode(errors="replace")})
+            return
+        self._dispatch(msg)
+
+    def _fail_pending(self):
+        error = MCPClientError(f"Server exited (code {self.proc.returncode})")
+        for future in list(self._pending.values()) + self._null_waiters:
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
+        self._null_waiters.clear()
+
+    def _dispatch(self, msg: Any):
+        if not isinstance(msg, dict):
+            self.unsolicited.append(msg)
+            return
+        if 'method' in msg and 'id' not in msg:
+            if self.on_notification:
+                self.on_notification(msg)
+            else:
+                self.unsolicited.append(msg)
+            return
+
+        future = self._pending.pop(message_key(msg.get('id')), None)
+        if future is None and self._null_waiters:
+            # The server answers null ids with 0, so hand the response to
+            # the oldest request that was sent without a usable id
+            future = self._null_waiters.pop(0)
+        if future is None or future.done():
+            self.unsolicited.append(msg)
+        else:
+            future.set_result(msg)
+
+    async def write(self, message: Dict[str, Any]):
+        """Write one message without waiting for anything to come back"""
+        if self.proc is None or self.proc.returncode is not None:
+            raise MCPClientError("Server process is not running")
+        data = (json.dumps(message) + "\n").encode()
+        async with self._write_lock:
+            self.proc.stdin.write(data)
+            await self.proc.stdin.drain()
+
+    async def send(self, message: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Send a request message as-is and wait for its response.
+
+        Raises asyncio.TimeoutError if no response arrives in time.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        msg_id = message.get('id')
+        if msg_id is None:
+            self._null_waiters.append(future)
+        else:
+            key = message_key(msg_id)
+            if key in self._pending:
+                raise ValueError(f"Request id {key} is already in flight")
+            self._pending[key] = future
+
+        try:
+            await self.write(message)
+            return await asyncio.wait_for(future, timeout or self.timeout)
+        finally:
+            if msg_id is None:
+                if future in self._null_waiters:
+                    self._null_waiters.remove(future)
+            elif self._pending.get(message_key(msg_id)) is future:
+                del self._pending[message_key(msg_id)]
+
+    async def close(self, timeout: float = 5.0):
+        if self.proc is None:
+            return
+        if self.proc.returncode is None:
+            try:
+                self.proc.stdin.close()
+                await asyncio.wait_for(self.proc.wait(), timeout)
+            except (OSError, asyncio.TimeoutError):
+                self.proc.kill()
+                await self.proc.wait()
+        if self._reader_task:
+            await self._reader_task
+
+
+class HTTPResponse:
+    """Status, lower-cased headers and body of one HTTP exchange.
+
+    received_at is the perf_counter() time the status line arrived, i.e.
+    time to first byte when compared with the moment the request was sent.
+    """
+
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes = b"",
+                 received_at: float = 0.0):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.received_at = received_at
+        self.events = []
+
+    @property
+    def keep_alive(self) -> bool:
+        return self.headers.get('connection', '').lower() != 'close'
+
+    @property
+    def is_event_stream(self) -> bool:
+        return self.headers.get('content-type', '').startswith('text/event-stream')
+
+
+def parse_sse_event(block: bytes) -> Dict[str, str]:
+    """Parse one Server-Sent Events block into {"id", "event", "data"}"""
+    event = {"event": "message"}
+    data = []
+    for line in block.decode("utf-8", errors="replace").splitlines():
+        if not line or line.startswith(":"):
+            continue
+        name, _, value = line.partition(":")
+        value = value[1:] if value.startswith(" ") else value
+        if name == "data":
+            data.append(value)
+        else:
+            event[name] = value
+    event["data"] = "\n".join(data)
+    return event
+
+
+class HTTPConnection:
+    """One keep-alive HTTP/1.1 connection on asyncio streams"""
+
+    def __init__(self, host: str, port: int, line_limit: int = DEFAULT_LINE_LIMIT):
+        self.host = host
+        self.port = port
+        self.line_limit = line_limit
+        self.reader = None
+        self.writer = None
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(
+            self.host, self.port, limit=self.line_limit)
+
+    def write_request(self, method: str, path: str, body: bytes = b"",
+                      headers: Optional[Dict[str, str]] = None):
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                 f"Content-Length: {len(body)}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+
+    async def read_head(self) -> HTTPResponse:
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by server")
+        received_at = time.perf_counter()
+        status = int(status_line.split(None, 2)[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return HTTPResponse(status, headers, received_at=received_at)
+
+    async def iter_body(self, response: HTTPResponse):
+        """Yield the body as it arrives, undoing chunked transfer encoding"""
+        headers = response.headers
+        if 'chunked' in headers.get('transfer-encoding', ''):
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    return
+                chunk = await self.reader.readexactly(size)
+                await self.reader.readline()
+                yield chunk
+        elif 'content-length' in headers:
+            yield await self.reader.readexactly(int(headers['content-length']))
+        else:
+            response.headers['connection'] = 'close'
+            while True:
+                chunk = await self.reader.read(65536)
+                if not chunk:
+                    return
+                yield chunk
+
+    async def read_body(self, response: HTTPResponse) -> bytes:
+        return b"".join([chunk async for chunk in self.iter_body(response)])
+
+    async def iter_events(self, response: HTTPResponse):
+        """Yield Server-Sent Events from a text/event-stream body"""
+        buffer = b""
+        body = self.iter_body(response)
+        try:
+            async for chunk in body:
+                buffer += chunk.replace(b"\r\n", b"\n")
+                while b"\n\n" in buffer:
+                    block, buffer = buffer.split(b"\n\n", 1)
+                    if block.strip() and not block.startswith(b":"):
+                        yield parse_sse_event(block)
+        finally:
+            await body.aclose()
+
+    async def request(self, method: str, path: str, body: bytes = b"",
+                      headers: Optional[Dict[str, str]] = None) -> HTTPResponse:
+        self.write_request(method, path, body, headers)
+        await self.writer.drain()
+        response = await self.read_head()
+        response.body = await self.read_body(response)
+        return response
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+class MCPStreamableHTTPClient(_MCPSession):
+    """JSON-RPC client for odata-mcp --transport streamable-http.
+
+    Every message is a POST to the /mcp endpoint. Up to `connections`
+    requests are in flight at once, each on its own keep-alive connection.
+    Pass headers={"Accept": "application/json, text/event-stream"} to let
+    the server upgrade tools/call responses to SSE.
+    """
+
+    def __init__(self, url: str, timeout: float = 30.0, connections: int = 1,
+                 headers: Optional[Dict[str, str]] = None):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 80
+        self.path = parts.path or "/mcp"
+        self.timeout = timeout
+        self.connections = connections
+        self.headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        self.headers.update(headers or {})
+        self.started_at = None
+        self.opened = 0
+        self._idle = []
+        self._slots = None
+        self._busy = 0
+        self._ids = itertools.count(1)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @property
+    def in_flight(self) -> int:
+        return self._busy
+
+    async def start(self):
+        self._slots = asyncio.Semaphore(self.connections)
+        self.started_at = time.perf_counter()
+
+    async def acquire(self) -> HTTPConnection:
+        await self._slots.acquire()
+        self._busy += 1
+        if self._idle:
+            return self._idle.pop()
+        conn = HTTPConnection(self.host, self.port)
+        try:
+            await conn.open()
+        except OSError:
+            self.release(conn, reusable=False)
+            raise
+        self.opened += 1
+        return conn
+
+    def release(self, conn: HTTPConnection, reusable: bool = True):
+        if reusable and conn.writer is not None:
+            self._idle.append(conn)
+        else:
+            conn.close()
+        self._busy -= 1
+        self._slots.release()
+
+    async def post(self, message: Dict[str, Any], headers: Optional[Dict[str, str]] = None,
+                   timeout: Optional[float] = None) -> HTTPResponse:
+        """POST one message and read the complete response"""
+        body = json.dumps(message).encode()
+        headers = dict(self.headers, **(headers or {}))
+        conn = await self.acquire()
+        reusable = False
+        try:
+            response = await asyncio.wait_for(conn.request("POST", self.path, body, headers),
+                                              timeout or self.timeout)
+            reusable = response.keep_alive and headers.get("Connection", "").lower() != "close"
+            return response
+        finally:
+            self.release(conn, reusable)
+
+    async def post_events(self, message: Dict[str, Any], headers: Optional[Dict[str, str]] = None,
+                          until: Sequence[str] = ("message",),
+                          timeout: Optional[float] = None) -> HTTPResponse:
+        """POST one message accepting an SSE upgrade.
+
+        Reads events until one of each type in `until` has arrived. The
+        server keeps SSE streams open with pings, so the connection is
+        closed afterwards instead of going back to the pool. Responses the
+        server did not upgrade are read as plain JSON bodies.
+        """
+        body = json.dumps(message).encode()
+        headers = dict(self.headers, **(headers or {}))
+        if "text/event-stream" not in headers.get("Accept", ""):
+            headers["Accept"] = "application/json, text/event-stream"
+        conn = await self.acquire()
+        reusable = False
+
+        async def exchange():
+            nonlocal reusable
+            conn.write_request("POST", self.path, body, headers)
+            await conn.writer.drain()
+            response = await conn.read_head()
+            if not response.is_event_stream:
+                response.body = await conn.read_body(response)
+                reusable = response.keep_alive
+                return response
+            wanted = set(until)
+            events = conn.iter_events(response)
+            try:
+                async for event in events:
+                    response.events.append(event)
+                    wanted.discard(event["event"])
+                    if not wanted:
+                        break
+            finally:
+                await events.aclose()
+            return response
+
+        try:
+            return await asyncio.wait_for(exchange(), timeout or self.timeout)
+        finally:
+            self.release(conn, reusable)
+
+    async def write(self, message: Dict[str, Any]):
+        await self.post(message)
+
+    async def send(self, message: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        if "text/event-stream" in self.headers.get("Accept", ""):
+            response = await self.post_events(message, timeout=timeout)
+        else:
+            response = await self.post(message, timeout=timeout)
+        if response.status != 200:
+            raise MCPClientError(f"HTTP {response.status}: {response.body[:200].decode(errors='replace')}")
+        for event in response.events:
+            if event["event"] == "message":
+                return json.loads(event["data"])
+        return json.loads(response.body)
+
+    async def wait_until_ready(self, timeout: float = 30.0, interval: float = 0.05):
+        """Poll /health until the server accepts connections"""
+        deadline = time.monotonic() + timeout
+        while True:
+            conn = HTTPConnection(self.host, self.port)
+            try:
+                await conn.open()
+                response = await asyncio.wait_for(conn.request("GET", "/health"), interval * 20)
+                if response.status == 200:
+                    return
+            except (OSError, asyncio.TimeoutError, ValueError):
+                pass
+            finally:
+                conn.close()
+            if time.monotonic() > deadline:
+                raise MCPClientError(f"Server at {self.host}:{self.port} not ready after {timeout}s")
+            await asyncio.sleep(interval)
+
+    async def close(self):
+        for conn in self._idle:
+            conn.close()
+        self._idle.clear()
+
+
+def free_port(host: str = "127.0.0.1") -> Tuple[str, int]:
+    """Pick an unused TCP port for a server we are about to start"""
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return host, sock.getsockname()[1]
+
+
+async def exchange(command: Union[str, Sequence[str]], messages: Sequence[Dict[str, Any]],
+                   timeout: float = 30.0) -> List[Dict[str, Any]]:
+    """Write messages to a fresh server, close stdin and collect every reply.
+
+    This is the isolated one-process-per-request mode.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *split_command(command),
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+        limit=DEFAULT_LINE_LIMIT
+    )
+    data = "".join(json.dumps(m) + "\n" for m in messages).encode()
+    try:
+        stdout, _ = await asyncio.wait_for(proc.communicate(data), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise
+    replies = []
+    for line in stdout.decode(errors="replace").splitlines():
+        if line.strip():
+            replies.append(json.loads(line))
+    return replies
+
+
+class BlockingMCPClient:
+    """Synchronous facade over MCPStdioClient for sequential scripts"""
+
+    def __init__(self, command: Union[str, Sequence[str]], timeout: float = 30.0, **kwargs):
+        self.loop = asyncio.new_event_loop()
+        self.client = MCPStdioClient(command, timeout=timeout, **kwargs)
+        self.loop.run_until_complete(self.client.start())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if not asyncio.iscoroutinefunction(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            return self.loop.run_until_complete(attr(*args, **kwargs))
+        return call
+
+    def close(self):
+        if not self.loop.is_closed():
+            self.loop.run_until_complete(self.client.close())
+            self.loop.close()
@@ -2,108 +2,97 @@
 """
 MCP Protocol Compliance Tester
 Tests MCP server implementation against protocol specification
+
+By default tests run over long-lived server processes (session mode):
+requests are written as newline-delimited JSON and responses are matched
+by id. Independent tests are scheduled across --jobs worker servers; tests
+that need an earlier response wait for it. Use --isolate to start a fresh
+server for every request instead.
+
+Every test and method is timed. --record stores the timings as the
+performance baseline for the server's version and --compare gates on
+significant slowdowns (see mcp_baseline.py).
 """
-import json
-import subprocess
+import argparse
+import asyncio
+import shlex
 import sys
-from typing import Dict, Any, Optional, Tuple
+import time
+from typing import Dict, Any, Callable, List, Optional, Sequence, Tuple
 
-class MCPComplianceTester:
-    def __init__(self, server_command: str):
-        self.server_command = server_command
-        self.test_results = []
-        
-    def send_request(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Send a JSON-RPC request to the server"""
-        try:
-            proc = subprocess.Popen(
-                self.server_command.split(),
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            stdout, stderr = proc.communicate(json.dumps(request))
-            
-            if stdout.strip():
-                return json.loads(stdout)
-            return None
-        except Exception as e:
-            print(f"Error sending request: {e}", file=sys.stderr)
-            return None
-    
-    def test(self, name: str, request: Dict[str, Any], 
-             validator: callable, expected_error: bool = False) -> bool:
-        """Run a single test"""
-        print(f"Testing: {name}...", end=" ")
-        response = self.send_request(request)
-        
-        if response is None:
-            print("FAIL - No response")
-            self.test_results.append((name, False, "No response received"))
-            return False
-        
-        if expected_error and 'error' not in response:
-            print("FAIL - Expected error but got success")
-            self.test_results.append((name, False, "Expected error response"))
-            return False
-            
-        if not expected_error and 'error' in response:
-            print(f"FAIL - Unexpected error: {response['error']}")
-            self.test_results.append((name, False, f"Unexpected error: {response['error']}"))
-            return False
-        
-        try:
-            if validator(response):
-                print("PASS")
-                self.test_results.append((name, True, ""))
-                return True
-            else:
-                print("FAIL - Validation failed")
-                self.test_results.append((name, False, "Response validation failed"))
-                return False
-        except Exception as e:
-            print(f"FAIL - {e}")
-            self.test_results.append((name, False, str(e)))
-            return False
-    
-    def run_compliance_tests(self):
-        """Run all compliance tests"""
-        print("=== MCP Protocol Compliance Test Suite ===\n")
-        
+from mcp_baseline import TimingRecorder, add_baseline_arguments, finish_baseline, probe_server, trial_count
+from mcp_client import MCPStdioClient, exchange
+
+
+class ComplianceTest:
+    """One check: a request (or a builder for it) plus a response validator.
+
+    `after` lists tests whose responses are needed first; `build` receives
+    those responses by name and returns the request, or None to skip. With
+    `reuse` the test sends nothing and validates another test's response.
+    """
+
+    def __init__(self, name: str, request: Optional[Dict[str, Any]] = None,
+                 validator: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                 expected_error: bool = False, notification: bool = False,
+                 after: Sequence[str] = (), reuse: Optional[str] = None,
+                 build: Optional[Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]] = None):
+        self.name = name
+        self.request = request
+        self.validator = validator
+        self.expected_error = expected_error
+        self.notification = notification
+        self.after = tuple(after) + ((reuse,) if reuse and reuse not in after else ())
+        self.reuse = reuse
+        self.build = build
+
+
+def _tools_of(response: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    if response and 'result' in response:
+        return response['result'].get('tools', []) or []
+    return []
+
+
+def _first_tool_call(responses: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    tools = _tools_of(responses.get("Tools list structure"))
+    if not tools:
+        return None
+    return {"jsonrpc": "2.0", "id": 13, "method": "tools/call",
+            "params": {"name": tools[0]['name'], "arguments": {}}}
+
+
+def compliance_tests() -> List[ComplianceTest]:
+    """The compliance suite, in reporting order"""
+    tests = [
         # Test 1: Basic JSON-RPC structure
-        self.test(
+        ComplianceTest(
             "Valid JSON-RPC request",
             {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}},
             lambda r: r.get('jsonrpc') == '2.0' and 'id' in r and 'result' in r
-        )
-        
+        ),
         # Test 2: Missing jsonrpc field
-        self.test(
+        ComplianceTest(
             "Missing jsonrpc field",
             {"id": 2, "method": "initialize", "params": {}},
             lambda r: r.get('error', {}).get('code') == -32600,
             expected_error=True
-        )
-        
+        ),
         # Test 3: Invalid jsonrpc version
-        self.test(
+        ComplianceTest(
             "Invalid jsonrpc version",
             {"jsonrpc": "1.0", "id": 3, "method": "initialize", "params": {}},
             lambda r: r.get('error', {}).get('code') == -32600,
             expected_error=True
-        )
-        
+        ),
         # Test 4: Method not found
-        self.test(
+        ComplianceTest(
             "Method not found",
             {"jsonrpc": "2.0", "id": 4, "method": "invalid/method", "params": {}},
             lambda r: r.get('error', {}).get('code') == -32601,
             expected_error=True
-        )
-        
+        ),
         # Test 5: Initialize response structure
-        self.test(
+        ComplianceTest(
             "Initialize response structure",
             {"jsonrpc": "2.0", "id": 5, "method": "initialize", "params": {
                 "protocolVersion": "2024-11-05",
@@ -117,10 +106,9 @@ class MCPComplianceTester:
                 'name' in r.get('result', {}).get('serverInfo', {}),
                 'version' in r.get('result', {}).get('serverInfo', {})
             ])
-        )
-        
+        ),
         # Test 6: Capabilities structure
-        self.test(
+        ComplianceTest(
             "Capabilities structure",
             {"jsonrpc": "2.0", "id": 6, "method": "initialize", "params": {}},
             lambda r: all([
@@ -128,99 +116,252 @@ class MCPComplianceTester:
                 'resources' in r.get('result', {}).get('capabilities', {}),
                 'prompts' in r.get('result', {}).get('capabilities', {})
             ])
-        )
-        
+        ),
         # Test 7: Tools list structure
-        self.test(
+        ComplianceTest(
             "Tools list structure",
             {"jsonrpc": "2.0", "id": 7, "method": "tools/list", "params": {}},
             lambda r: isinstance(r.get('result', {}).get('tools'), list)
-        )
-        
-        # Test 8: Tool structure validation
-        tools_response = self.send_request({"jsonrpc": "2.0", "id": 8, "method": "tools/list", "params": {}})
-        if tools_response and 'result' in tools_response:
-            tools = tools_response['result'].get('tools', [])
-            if tools:
-                self.test(
-                    "Tool structure",
-                    {"jsonrpc": "2.0", "id": 8, "method": "tools/list", "params": {}},
-                    lambda r: all([
-                        all(['name' in tool and 'description' in tool and 'inputSchema' in tool 
-                             for tool in r.get('result', {}).get('tools', [])])
-                    ])
-                )
-        
+        ),
+        # Test 8: Tool structure validation (reuses the tools/list response above)
+        ComplianceTest(
+            "Tool structure",
+            validator=lambda r: all([
+                all(['name' in tool and 'description' in tool and 'inputSchema' in tool
+                     for tool in r.get('result', {}).get('tools', [])])
+            ]),
+            reuse="Tools list structure"
+        ),
         # Test 9: Resources list structure
-        self.test(
+        ComplianceTest(
             "Resources list structure",
             {"jsonrpc": "2.0", "id": 9, "method": "resources/list", "params": {}},
             lambda r: isinstance(r.get('result', {}).get('resources'), list)
-        )
-        
+        ),
         # Test 10: Prompts list structure
-        self.test(
+        ComplianceTest(
             "Prompts list structure",
             {"jsonrpc": "2.0", "id": 10, "method": "prompts/list", "params": {}},
             lambda r: isinstance(r.get('result', {}).get('prompts'), list)
-        )
-        
+        ),
         # Test 11: Notification handling (no response expected)
-        print("Testing: Notification handling...", end=" ")
-        response = self.send_request({"jsonrpc": "2.0", "method": "initialized"})
+        ComplianceTest(
+            "Notification handling",
+            {"jsonrpc": "2.0", "method": "initialized"},
+            notification=True
+        ),
+    ]
+
+    # Test 12: ID preservation
+    for test_id in [1, "string-id", None, 0, -1]:
+        tests.append(ComplianceTest(
+            f"ID preservation ({test_id})",
+            {"jsonrpc": "2.0", "id": test_id, "method": "ping", "params": {}},
+            lambda r, tid=test_id: r.get('id') == tid
+        ))
+
+    # Test 13: Tools/call structure
+    tests.append(ComplianceTest(
+        "Tools/call response structure",
+        validator=lambda r: 'content' in r.get('result', {}) and
+                            isinstance(r['result']['content'], list),
+        after=["Tools list structure"],
+        build=_first_tool_call
+    ))
+    return tests
+
+
+class MCPComplianceTester:
+    def __init__(self, server_command: str, isolate: bool = False, timeout: float = 30.0,
+                 jobs: int = 1, recorder: Optional[TimingRecorder] = None):
+        self.server_command = server_command
+        self.isolate = isolate
+        self.timeout = timeout
+        self.jobs = max(1, jobs)
+        self.recorder = recorder or TimingRecorder()
+        self.test_results = []
+        self.timings = []
+        self._probe_seq = 0
+
+    async def send_request(self, request: Dict[str, Any],
+                           session: Optional[MCPStdioClient]) -> Optional[Dict[str, Any]]:
+        """Send a JSON-RPC request to the server"""
+        try:
+            if session is None:
+                replies = await exchange(self.server_command, [request], self.timeout)
+                return replies[0] if replies else None
+            if 'id' not in request:
+                return await self._notify(session, request)
+            return await session.send(request)
+        except Exception as e:
+            print(f"Error sending request: {e!r}", file=sys.stderr)
+            return None
+
+    async def _notify(self, session: MCPStdioClient, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Send a notification, returning anything the server wrongly sent back.
+
+        stdio requests are handled in order, so a reply to the notification
+        must arrive before the reply to a ping sent right after it.
+        """
+        session.unsolicited.clear()
+        await session.write(request)
+        self._probe_seq += 1
+        await session.request("ping", id=f"__probe_{self._probe_seq}")
+        return session.unsolicited.pop(0) if session.unsolicited else None
+
+    def check(self, test: ComplianceTest, response: Optional[Dict[str, Any]]) -> Tuple[bool, str, str]:
+        """Validate a response; returns (passed, console verdict, failure reason)"""
+        if test.notification:
+            if response is None:
+                return True, "PASS", ""
+            return False, "FAIL - Got response for notification", "Should not respond to notifications"
+
         if response is None:
-            print("PASS")
-            self.test_results.append(("Notification handling", True, ""))
+            return False, "FAIL - No response", "No response received"
+
+        if test.expected_error and 'error' not in response:
+            return False, "FAIL - Expected error but got success", "Expected error response"
+
+        if not test.expected_error and 'error' in response:
+            return (False, f"FAIL - Unexpected error: {response['error']}",
+                    f"Unexpected error: {response['error']}")
+
+        try:
+            if test.validator(response):
+                return True, "PASS", ""
+            return False, "FAIL - Validation failed", "Response validation failed"
+        except Exception as e:
+            return False, f"FAIL - {e}", str(e)
+
+    async def _run_one(self, test: ComplianceTest, responses: Dict[str, Any],
+                       sessions: Optional[asyncio.Queue]) -> Optional[Tuple[Any, ...]]:
+        """Run a single test once its dependencies are done; None means skipped"""
+        start = time.perf_counter()
+        method = None
+        if test.reuse:
+            response = responses.get(test.reuse)
+            if not _tools_of(response):
+                return None
         else:
-            print("FAIL - Got response for notification")
-            self.test_results.append(("Notification handling", False, "Should not respond to notifications"))
-        
-        # Test 12: ID preservation
-        test_ids = [1, "string-id", None, 0, -1]
-        for test_id in test_ids:
-            self.test(
-                f"ID preservation ({test_id})",
-                {"jsonrpc": "2.0", "id": test_id, "method": "ping", "params": {}},
-                lambda r, tid=test_id: r.get('id') == tid
-            )
-        
-        # Test 13: Tools/call structure
-        if tools and len(tools) > 0:
-            first_tool = tools[0]['name']
-            self.test(
-                "Tools/call response structure",
-                {"jsonrpc": "2.0", "id": 13, "method": "tools/call", 
-                 "params": {"name": first_tool, "arguments": {}}},
-                lambda r: 'content' in r.get('result', {}) and 
-                         isinstance(r['result']['content'], list)
-            )
-        
+            request = test.build(responses) if test.build else test.request
+            if request is None:
+                return None
+            method = request.get('method')
+            session = await sessions.get() if sessions else None
+            try:
+                response = await self.send_request(request, session)
+            finally:
+                if sessions:
+                    sessions.put_nowait(session)
+        responses[test.name] = response
+        passed, verdict, reason = self.check(test, response)
+        return passed, verdict, reason, time.perf_counter() - start, method
+
+    async def _run_tests(self, tests: List[ComplianceTest], trial: int = 1):
+        sessions = None
+        workers = []
+        if not self.isolate:
+            workers = [MCPStdioClient(self.server_command, timeout=self.timeout)
+                       for _ in range(self.jobs)]
+            await asyncio.gather(*[w.start() for w in workers])
+            sessions = asyncio.Queue()
+            for worker in workers:
+                sessions.put_nowait(worker)
+        limit = asyncio.Semaphore(self.jobs)
+
+        responses = {}
+        tasks = {}
+
+        async def run(test):
+            for dep in test.after:
+                await tasks[dep]
+            async with limit:
+                return await self._run_one(test, responses, sessions)
+
+        try:
+            for test in tests:
+                tasks[test.name] = asyncio.ensure_future(run(test))
+
+            # Report in suite order no matter which test finished first
+            for test in tests:
+                outcome = await tasks[test.name]
+                if outcome is None:
+                    continue
+                passed, verdict, reason, elapsed, method = outcome
+                if not test.reuse:
+                    self.recorder.add_request(test.name, method, elapsed)
+                if trial > 1:
+                    # Repeated trials only gather timings, but still report new (flaky) failures
+                    if not passed and (test.name, True, "") in self.test_results:
+                        self.test_results.append((f"{test.name} (trial {trial})", passed, reason))
+                    continue
+                print(f"Testing: {test.name}... {verdict}")
+                self.test_results.append((test.name, passed, reason))
+                self.timings.append((test.name, elapsed))
+        finally:
+            await asyncio.gather(*[w.close() for w in workers])
+
+    async def _run_trials(self, trials: int):
+        for trial in range(1, trials + 1):
+            await probe_server(self.server_command, self.recorder, self.timeout)
+            await self._run_tests(compliance_tests(), trial)
+
+    def run_compliance_tests(self, trials: int = 1):
+        """Run all compliance tests"""
+        print("=== MCP Protocol Compliance Test Suite ===\n")
+        start = time.perf_counter()
+        asyncio.run(self._run_trials(trials))
+        wall = (time.perf_counter() - start) / trials
+
         # Print summary
+        print("\n=== Test Timing ===")
+        for name, elapsed in self.timings:
+            print(f"  {elapsed * 1000:9.1f} ms  {name}")
+        busy = sum(elapsed for _, elapsed in self.timings)
+        print(f"Wall clock: {wall:.2f}s with {self.jobs} job(s) "
+              f"(sum of test times {busy:.2f}s)" + (f", average of {trials} trials" if trials > 1 else ""))
+
         print("\n=== Test Summary ===")
         passed = sum(1 for _, success, _ in self.test_results if success)
         total = len(self.test_results)
         print(f"Passed: {passed}/{total}")
-        
+
         if passed < total:
             print("\nFailed tests:")
             for name, success, reason in self.test_results:
                 if not success:
                     print(f"  - {name}: {reason}")
-        
+
         return passed == total
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python mcp_compliance_test.py <server-command>")
-        print("Example: python mcp_compliance_test.py ./odata-mcp")
+    parser = argparse.ArgumentParser(
+        description="MCP protocol compliance tests",
+        usage="python mcp_compliance_test.py [--jobs N] [--isolate] [--timeout S] "
+              "[--record | --compare [VERSION]] <server-command>")
+    parser.add_argument("--jobs", "-j", type=int, default=1, metavar="N",
+                        help="number of worker server processes running tests in parallel (default: 1)")
+    parser.add_argument("--isolate", action="store_true",
+                        help="start a fresh server process for every request (slow)")
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="seconds to wait for each response (default: 30)")
+    add_baseline_arguments(parser)
+    parser.add_argument("server_command", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    if not args.server_command:
+        print("Usage: python mcp_compliance_test.py [--jobs N] [--isolate] [--timeout S] <server-command>")
+        print("Example: python mcp_compliance_test.py --jobs 8 ./odata-mcp")
         sys.exit(1)
-    
-    server_command = " ".join(sys.argv[1:])
-    tester = MCPComplianceTester(server_command)
-    
-    if tester.run_compliance_tests():
+
+    server_command = shlex.join(args.server_command)
+    tester = MCPComplianceTester(server_command, isolate=args.isolate, timeout=args.timeout,
+                                 jobs=args.jobs)
+
+    compliant = tester.run_compliance_tests(trial_count(args))
+    if compliant:
         print("\n✅ All tests passed! Server is MCP compliant.")
-        sys.exit(0)
     else:
         print("\n❌ Some tests failed. Server needs fixes.")
-        sys.exit(1)
\ No newline at end of file
+    fast_enough = finish_baseline(args, "compliance", tester.recorder, args.server_command)
+    sys.exit(0 if compliant and fast_enough else 1)
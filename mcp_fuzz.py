@@ -0,0 +1,839 @@
+#!/usr/bin/env python3
+"""
+Grammar-based protocol fuzzer for odata-mcp
+
+Generates JSON-RPC and MCP messages from a grammar seeded with the edge
+cases in test_mcp_client.py. It produces missing and odd ids, null,
+mistyped and oversized arguments, deeply nested params, huge strings,
+damaged framing and broken $filter expressions for the server's own
+generated tools. The messages are pushed through a pool of persistent
+server sessions:
+
+    python3 mcp_fuzz.py --duration 60 ./odata-mcp
+    python3 mcp_fuzz.py --sessions 8 --depth 16 --execs 200000 --out fuzz-findings ./odata-mcp
+    python3 mcp_fuzz.py --service https://host/sap/opu/odata/sap/ZSRV/ ./odata-mcp --user u --password p
+
+Each case is followed by a ping with a private id. The stdio loop handles
+one message at a time, so every line printed before the ping's answer
+belongs to the case. That lets --depth cases per session be in flight at
+once. The findings are:
+
+  crash        the server exited (signature from the Go panic on stderr)
+  hang         neither the case nor its ping was answered within --timeout
+  non-json     a line on stdout that is not JSON
+  no-response  a JSON object with an "id" got no answer at all
+
+Lines that are not valid JSON are not expected to be answered. Findings
+are deduplicated by signature (kind, method and panic location or output
+shape). After the run each one is shrunk on a fresh session by greedily
+removing keys, halving strings and nesting and zeroing numbers, while
+the signature stays the same. The result is written as a reproducer you
+can pipe into the server:
+
+    ./odata-mcp --service ... < fuzz-findings/crash-1a2b3c4d5e.jsonl
+"""
+import argparse
+import asyncio
+import copy
+import functools
+import hashlib
+import itertools
+import json
+import os
+import random
+import re
+import shlex
+import signal
+import sys
+import time
+from collections import Counter, deque
+
+from mcp_client import DEFAULT_LINE_LIMIT, MCPClientError, MCPStdioClient
+from mcp_soak import parse_duration
+from odata_standin import StandInProcess, add_spec_arguments, spec_from_args
+from test_mcp_client import EDGE_CASES
+
+SYNC_PREFIX = "fuzz-sync-"
+SYNC_MARK = b'"' + SYNC_PREFIX.encode()
+STDERR_LINES = 200
+
+KNOWN_METHODS = ("initialize", "notifications/initialized", "initialized", "tools/list",
+                 "tools/call", "resources/list", "prompts/list", "ping")
+METHOD_WEIGHTS = {"tools/call": 45, "tools/list": 8, "initialize": 8, "ping": 4,
+                  "resources/list": 3, "prompts/list": 3, "notifications/initialized": 3,
+                  "odd": 10}
+ODD_METHODS = ["", None, 42, [], "TOOLS/LIST", "tools/list ", "tools/", "tools/call/extra",
+               "rpc.discover", "tööls/list", "tools\u0000list", "a" * 10000]
+FILTER_PARAMS = ("$filter", "filter")
+PAGING_PARAMS = ("$top", "top", "$skip", "skip")
+FIELD_LIST_PARAMS = ("$select", "select", "$expand", "expand", "$orderby", "orderby")
+
+INIT_MESSAGES = [
+    {"jsonrpc": "2.0", "id": "fuzz-init", "method": "initialize",
+     "params": {"protocolVersion": "2024-11-05", "capabilities": {},
+                "clientInfo": {"name": "mcp-fuzz", "version": "1.0"}}},
+    {"jsonrpc": "2.0", "method": "notifications/initialized"},
+]
+
+
+class Deep:
+    """`depth` copies of open around inner and as many closes, kept symbolic
+    so a 100,000-level nesting is cheap to build and shrinks by halving"""
+
+    def __init__(self, depth, inner=None, open_="[", close="]"):
+        self.depth = depth
+        self.inner = inner
+        self.open = open_
+        self.close = close
+
+
+class Raw:
+    """JSON text inserted as-is, e.g. numbers no float can hold"""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class Mangled:
+    """A message with damaged framing: cut after `keep` bytes and/or wrapped in junk"""
+
+    def __init__(self, message, keep=None, prefix=b"", suffix=b""):
+        self.message = message
+        self.keep = keep
+        self.prefix = prefix
+        self.suffix = suffix
+
+
+class Wide:
+    """An object with `size` members k0..kN, encoded once per size"""
+
+    def __init__(self, size):
+        self.size = size
+
+
+@functools.lru_cache(maxsize=32)
+def _wide_text(size):
+    return json.dumps({f"k{i}": i for i in range(size)}, separators=(",", ":"))
+
+
+# Grammar nodes are serialized by json.dumps as placeholder strings and
+# spliced in afterwards, so plain dicts, lists and strings stay in C
+_PLACEHOLDER = re.compile(r'"\\u0000fuzz:(\d+)"')
+
+
+def _node_text(node):
+    if isinstance(node, Deep):
+        return node.open * node.depth + encode_value(node.inner) + node.close * node.depth
+    if isinstance(node, Wide):
+        return _wide_text(node.size)
+    if isinstance(node, Raw):
+        return node.text
+    raise TypeError(f"Cannot encode {type(node).__name__}")
+
+
+def encode_value(value) -> str:
+    nodes = []
+
+    def placeholder(node):
+        nodes.append(node)
+        return f"\u0000fuzz:{len(nodes) - 1}"
+
+    text = json.dumps(value, default=placeholder, separators=(",", ":"))
+    if nodes:
+        text = _PLACEHOLDER.sub(lambda m: _node_text(nodes[int(m.group(1))]), text)
+    return text
+
+
+def encode_case(case) -> bytes:
+    """One stdio line for a generated case"""
+    if isinstance(case, Mangled):
+        data = encode_value(case.message).encode("utf-8", "surrogatepass")
+        if case.keep is not None:
+            data = data[:case.keep]
+        data = (case.prefix + data + case.suffix).replace(b"\n", b" ")
+    else:
+        data = encode_value(case).encode("utf-8", "surrogatepass")
+    return data + b"\n"
+
+
+def method_of(case) -> str:
+    """Method label used in signatures"""
+    if isinstance(case, Mangled):
+        return "<mangled>"
+    if isinstance(case, list):
+        return "<batch>"
+    if not isinstance(case, dict):
+        return "<non-object>"
+    if "method" not in case:
+        return "<missing method>"
+    method = case["method"]
+    if method in KNOWN_METHODS:
+        return method
+    return "<unknown method>" if isinstance(method, str) else "<non-string method>"
+
+
+def expects_response(case) -> bool:
+    return isinstance(case, dict) and "id" in case
+
+
+def _normalize(text: str, limit: int = 60) -> str:
+    text = re.sub(r"0x[0-9a-fA-F]+", "0x?", text)
+    return re.sub(r"\d+", "N", text)[:limit]
+
+
+def panic_summary(stderr_lines, returncode) -> str:
+    """First panic line plus the first non-runtime frame, or the exit status"""
+    lines = [line.decode(errors="replace").rstrip() for line in stderr_lines]
+    for i, line in enumerate(lines):
+        if line.startswith(("panic:", "fatal error:")):
+            summary = _normalize(line, 120)
+            for j, frame in enumerate(lines[i + 1:], i + 2):
+                if ("(" in frame and not frame.startswith(("\t", " ", "goroutine ", "[", "panic(", "runtime."))):
+                    # Drop only the argument list; method frames keep their
+                    # receiver, e.g. bridge.(*ODataMCPBridge).handleEntityFilter
+                    site = re.sub(r"\([^()]*\)$", "", frame)
+                    if j < len(lines) and lines[j].startswith("\t"):
+                        # \t/path/to/file.go:123 +0x1c
+                        site += f" {os.path.basename(lines[j].strip().split(' ')[0])}"
+                    return f"{summary} @ {site}"
+            return summary
+    if returncode is not None and returncode < 0:
+        try:
+            return f"killed by {signal.Signals(-returncode).name}"
+        except ValueError:
+            pass
+    return f"exit code {returncode}"
+
+
+def classify(case, status, detail, lines):
+    """(finding kind or None, signature or response label) for one execution"""
+    method = method_of(case)
+    if status in ("crash", "hang"):
+        return status, f"{status} {method}" + (f": {detail}" if detail else "")
+    for line in lines:
+        try:
+            json.loads(line)
+        except ValueError:
+            return "non-json", f"non-json {method}: {_normalize(line.decode(errors='replace').strip(), 40)}"
+    if not lines:
+        if expects_response(case):
+            return "no-response", f"no-response {method}"
+        return None, "no reply"
+    return None, "error" if b'"error"' in lines[0] else "result"
+
+
+class Grammar:
+    """Random JSON-RPC / MCP messages aimed at the server's own tools"""
+
+    def __init__(self, tools, rng, max_string=1 << 20):
+        self.rng = rng
+        self.tools = tools
+        self.ids = itertools.count(1)
+        self.huge = "x" * max_string
+        fields = set()
+        for tool in tools:
+            for name in ((tool.get("inputSchema") or {}).get("properties") or {}):
+                if not name.startswith(("$", "_")) and name not in FILTER_PARAMS + PAGING_PARAMS + FIELD_LIST_PARAMS:
+                    fields.add(name)
+        self.fields = sorted(fields) or ["ID", "Name"]
+
+    def choice(self, options):
+        return self.rng.choice(options)
+
+    def message(self):
+        r = self.rng.random()
+        if r < 0.10:
+            return self.seed_case()
+        if r < 0.17:
+            return self.mangled()
+        if r < 0.19:
+            return [self.envelope(self.choice(KNOWN_METHODS), self.generic_params())
+                    for _ in range(self.rng.randint(0, 3))]
+        kinds = list(METHOD_WEIGHTS)
+        kind = self.rng.choices(kinds, [METHOD_WEIGHTS[k] for k in kinds])[0]
+        if kind == "odd":
+            return self.envelope(self.choice(ODD_METHODS), self.generic_params())
+        if kind == "tools/call":
+            return self.envelope(kind, self.call_params())
+        if kind == "initialize":
+            return self.envelope(kind, self.initialize_params())
+        return self.envelope(kind, self.generic_params())
+
+    def envelope(self, method, params=None):
+        msg = {}
+        if self.rng.random() < 0.95:
+            msg["jsonrpc"] = "2.0" if self.rng.random() < 0.9 else self.choice(["1.0", 2.0, None, "", []])
+        if self.rng.random() < 0.9:
+            msg["id"] = self.request_id()
+        msg["method"] = method
+        if params is not None or self.rng.random() < 0.1:
+            msg["params"] = params
+        return msg
+
+    def request_id(self):
+        if self.rng.random() < 0.5:
+            return next(self.ids)
+        return self.choice([0, -1, 2 ** 53 + 1, 2 ** 64, Raw("1e400"), 1.5, -0.0, "abc", "",
+                            "i" * 1000, "\u0000", None, True, [], {}, {"a": 1}])
+
+    def initialize_params(self):
+        if self.rng.random() < 0.2:
+            return self.any_value()
+        return {
+            "protocolVersion": self.choice(["2024-11-05", "2025-03-26", "", "9999-99-99", None, 1]),
+            "capabilities": self.choice([{}, None, [], self.any_value()]),
+            "clientInfo": self.choice([{"name": "fuzz", "version": "1.0"}, None, "fuzz",
+                                       {"name": self.any_value()}]),
+        }
+
+    def generic_params(self):
+        if self.rng.random() < 0.3:
+            return None
+        return self.choice([{}, [], {"cursor": None}, {"cursor": self.any_value()}, self.any_value()])
+
+    def call_params(self):
+        tool = self.choice(self.tools) if self.tools else {"name": "odata_service_info"}
+        params = {}
+        if self.rng.random() < 0.95:
+            if self.rng.random() < 0.8:
+                params["name"] = tool["name"]
+            else:
+                name = tool["name"]
+                params["name"] = self.choice(["", "nope", 42, None, [name], name + '"', 'a"b\\c',
+                                              name.upper(), f" {name} ", name + "\u0000",
+                                              self.huge[:self.choice((1024, len(self.huge)))]])
+        r = self.rng.random()
+        if r < 0.05:
+            return params
+        if r < 0.15:
+            params["arguments"] = self.choice([None, [], "x", 1, self.deep(), self.wide()])
+        else:
+            params["arguments"] = self.arguments(tool)
+        return params
+
+    def arguments(self, tool):
+        schema = tool.get("inputSchema") or {}
+        required = set(schema.get("required") or [])
+        arguments = {}
+        for name, prop in (schema.get("properties") or {}).items():
+            if self.rng.random() < (0.8 if name in required else 0.4):
+                arguments[name] = self.value_for(name, prop if isinstance(prop, dict) else {})
+        if self.rng.random() < 0.1:
+            arguments[self.choice(["$format", "$inlinecount", "unknown", "", "$filter "])] = self.any_value()
+        return arguments
+
+    def value_for(self, name, prop):
+        if name in FILTER_PARAMS:
+            return self.filter_value()
+        if name in PAGING_PARAMS:
+            return self.choice([10, 0, -1, 2 ** 31, 2 ** 63, Raw("1e400"), 1.5, "10", "abc", None, True])
+        if name in FIELD_LIST_PARAMS:
+            return self.choice(["", ",,,", "Nope", "ID desc desc", "*", ",".join(self.fields),
+                                "/".join(["Nav"] * 50), self.huge[:4096], None, ["ID"]])
+        if self.rng.random() < 0.4:
+            return self.any_value()
+        kind = prop.get("type")
+        if kind == "integer":
+            return self.choice([self.rng.randint(-5, 5000), 2 ** 63, -2 ** 63 - 1])
+        if kind == "number":
+            return self.choice([self.rng.uniform(-1e6, 1e6), 1e308, Raw("1e400"), -0.0])
+        if kind == "boolean":
+            return self.rng.random() < 0.5
+        return self.choice(["x", "1", "O'Brien", "100%", "a/b", "ß€😀", "\ud800", "'", "''"])
+
+    def filter_value(self):
+        if self.rng.random() < 0.1:
+            return self.choice([None, 1, ["ID eq 1"], {"ID": 1}, ""])
+        expr = self.filter_expr()
+        if self.rng.random() < 0.5:
+            return expr
+        n = self.choice((100, 5000))
+        return self.choice([
+            "(" + expr, expr + ")", expr.replace("'", "", 1), expr + " and", "not", expr + " %00",
+            "(" * n + expr + ")" * n, f"{self.choice(self.fields)} eq '' or 1 eq 1 or '' eq ''",
+            expr + "&$top=1", expr.replace(" ", "\n"), expr.replace(" eq ", " == "),
+            expr + " " + self.huge[:self.choice((1024, len(self.huge)))],
+            " and ".join([expr] * 500), "$filter=" + expr,
+        ])
+
+    def filter_expr(self, depth=0):
+        r = self.rng.random()
+        if depth < 2 and r < 0.3:
+            op = self.choice(["and", "or"])
+            return f"({self.filter_expr(depth + 1)} {op} {self.filter_expr(depth + 1)})"
+        if depth < 2 and r < 0.35:
+            return f"not ({self.filter_expr(depth + 1)})"
+        field = self.choice(self.fields)
+        if r < 0.55:
+            return self.choice([f"substringof('a', {field})", f"startswith({field}, 'a')",
+                                f"contains({field},'a')", f"length({field}) gt 3",
+                                f"tolower({field}) eq 'x'", f"substringof({field})",
+                                f"endswith({field}, 'a', 'b')", f"nosuchfunc({field})"])
+        op = self.choice(["eq", "ne", "gt", "lt", "ge", "le", "has", "in"])
+        literal = self.choice(["'text'", "5", "5.5", "-1", "true", "null", "'O''Brien'",
+                               "datetime'2024-01-01T00:00:00'", "datetime'not a date'",
+                               "guid'00000000-0000-0000-0000-000000000000'", "99999999999999999999",
+                               "'ß€😀'", "X'FF'"])
+        return f"{field} {op} {literal}"
+
+    def any_value(self, depth=0):
+        r = self.rng.random()
+        if depth < 3 and r < 0.1:
+            return {self.choice(["a", "", "$filter", "\u0000"]): self.any_value(depth + 1)}
+        if depth < 3 and r < 0.15:
+            return [self.any_value(depth + 1) for _ in range(self.rng.randint(0, 3))]
+        if r < 0.2:
+            return self.deep()
+        if r < 0.25:
+            return self.huge[:self.choice((1024, 65536, len(self.huge)))]
+        return self.choice([None, True, False, 0, -1, 2 ** 64, 1.5, Raw("1e999"), Raw("-0"),
+                            "", "text", "'", '"', "\\", "\u0000", "\ud800", "ß€😀", "null"])
+
+    def deep(self):
+        depth = self.choice((64, 1000, 10001, 100000))
+        if self.rng.random() < 0.5:
+            return Deep(depth, None, "[", "]")
+        return Deep(depth, None, '{"a":', "}")
+
+    def wide(self):
+        return Wide(self.choice((1000, 10000)))
+
+    def seed_case(self):
+        """A test_mcp_client.py edge case with one part replaced or removed"""
+        msg = copy.deepcopy(self.choice(EDGE_CASES)["request"])
+        params = msg.get("params")
+        if isinstance(params, dict) and "name" in params and self.tools:
+            params["name"] = self.choice(self.tools)["name"]
+        targets = [(msg, key) for key in msg]
+        if isinstance(params, dict):
+            targets += [(params, key) for key in params]
+        container, key = self.choice(targets)
+        if self.rng.random() < 0.3:
+            del container[key]
+        else:
+            container[key] = self.any_value()
+        return msg
+
+    def mangled(self):
+        msg = self.envelope("tools/call", self.call_params())
+        size = len(encode_value(msg))
+        return self.choice([
+            Mangled(msg, keep=self.rng.randint(0, max(size - 1, 0))),
+            Mangled(msg, prefix=b"\xef\xbb\xbf"),
+            Mangled(msg, prefix=b"garbage "),
+            Mangled(msg, suffix=b"}"),
+            Mangled(msg, suffix=b" trailing"),
+            Mangled(msg, suffix=b'{"jsonrpc":"2.0","id":1,"method":"ping"}'),
+            Mangled(msg, suffix=b"\xff\xfe"),
+            Mangled(msg, prefix=b"\x00" * 16),
+            Mangled(msg, keep=0),
+            Mangled(msg, keep=0, prefix=b" \t "),
+        ])
+
+
+def shrink(value):
+    """Smaller variants of a case, roughly biggest reductions first"""
+    if isinstance(value, Mangled):
+        if value.prefix:
+            yield Mangled(value.message, value.keep, b"", value.suffix)
+        if value.suffix:
+            yield Mangled(value.message, value.keep, value.prefix, b"")
+        if value.keep:
+            yield Mangled(value.message, value.keep // 2, value.prefix, value.suffix)
+        for smaller in shrink(value.message):
+            yield Mangled(smaller, value.keep, value.prefix, value.suffix)
+    elif isinstance(value, Deep):
+        yield value.inner
+        if value.depth > 1:
+            yield Deep(value.depth // 2, value.inner, value.open, value.close)
+            yield Deep(value.depth - 1, value.inner, value.open, value.close)
+        for smaller in shrink(value.inner):
+            yield Deep(value.depth, smaller, value.open, value.close)
+    elif isinstance(value, dict):
+        for key in value:
+            yield {k: v for k, v in value.items() if k != key}
+        for key, item in value.items():
+            for smaller in shrink(item):
+                yield {**value, key: smaller}
+    elif isinstance(value, list):
+        if len(value) > 1:
+            half = len(value) // 2
+            yield value[:half]
+            yield value[half:]
+        for i in range(len(value)):
+            yield value[:i] + value[i + 1:]
+        for i, item in enumerate(value):
+            for smaller in shrink(item):
+                yield value[:i] + [smaller] + value[i + 1:]
+    elif isinstance(value, str):
+        if value:
+            yield ""
+        if len(value) > 1:
+            yield value[:len(value) // 2]
+            yield value[:-1]
+    elif isinstance(value, Wide):
+        yield {}
+        if value.size > 1:
+            yield Wide(value.size // 2)
+    elif isinstance(value, Raw):
+        yield 0
+    elif isinstance(value, (int, float)) and not isinstance(value, bool) and value != 0:
+        yield 0
+
+
+class FuzzSession:
+    """One persistent server process. Cases are pipelined, each followed by a ping"""
+
+    def __init__(self, command, timeout):
+        self.command = command
+        self.timeout = timeout
+        self.proc = None
+        self.pending = deque()
+        self.stderr = deque(maxlen=STDERR_LINES)
+        self.sync_ids = itertools.count(1)
+        self.starts = 0
+        self.stray_lines = 0
+        self.hung = False
+        self._reader = None
+        self._lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+
+    @property
+    def alive(self):
+        return self._reader is not None and not self._reader.done()
+
+    async def ensure_running(self):
+        async with self._lock:
+            if self.alive:
+                return
+            self.starts += 1
+            self.hung = False
+            self.stderr.clear()
+            self.proc = await asyncio.create_subprocess_exec(
+                *self.command, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE, limit=DEFAULT_LINE_LIMIT)
+            stderr_task = asyncio.create_task(self._drain_stderr(self.proc))
+            self._reader = asyncio.create_task(self._read_loop(self.proc, stderr_task))
+            init = b"".join(encode_case(msg) for msg in INIT_MESSAGES)
+            status, detail, lines = await self.run(init)
+            if status != "ok" or not lines:
+                raise MCPClientError(f"Server failed to initialize ({status}: {detail or 'no response'})")
+
+    async def _drain_stderr(self, proc):
+        while True:
+            line = await proc.stderr.readline()
+            if not line:
+                return
+            self.stderr.append(line)
+
+    async def _read_loop(self, proc, stderr_task):
+        try:
+            while True:
+                try:
+                    line = await proc.stdout.readline()
+                except ValueError:
+                    line = b"<line over the read limit>\n"
+                if not line:
+                    break
+                if SYNC_MARK in line and self.pending:
+                    try:
+                        msg = json.loads(line)
+                    except ValueError:
+                        msg = None
+                    if isinstance(msg, dict) and msg.get("id") == self.pending[0][0]:
+                        _, future, _, _ = self.pending.popleft()
+                        if not future.done():
+                            future.set_result(("ok", ""))
+                        if self.pending:
+                            self.pending[0][3].set()
+                        continue
+                if self.pending:
+                    self.pending[0][2].append(line)
+                else:
+                    self.stray_lines += 1
+        finally:
+            # Popen.kill() polls first and can reap the child before asyncio's
+            # watcher does, which loses the exit code, so only kill a server
+            # that keeps running after closing stdout
+            try:
+                await asyncio.wait_for(proc.wait(), 1.0)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+            try:
+                await asyncio.wait_for(stderr_task, 1.0)
+            except asyncio.TimeoutError:
+                stderr_task.cancel()
+            # The head case was being handled when the server died or stalled;
+            # whatever was queued behind it never ran
+            if self.hung:
+                status, detail = "hang", ""
+            else:
+                status, detail = "crash", panic_summary(self.stderr, proc.returncode)
+            while self.pending:
+                _, future, _, _ = self.pending.popleft()
+                if not future.done():
+                    future.set_result((status, detail))
+                status, detail = "lost", ""
+
+    def kill(self, hung=False):
+        if hung and self.pending:
+            self.hung = True
+        if self.proc is not None and self.proc.returncode is None:
+            self.proc.kill()
+
+    async def run(self, data):
+        """Send one case; returns (status, detail, stdout lines of the case)"""
+        sync_id = f"{SYNC_PREFIX}{next(self.sync_ids)}"
+        ping = encode_case({"jsonrpc": "2.0", "id": sync_id, "method": "ping"})
+        future = asyncio.get_running_loop().create_future()
+        at_head = asyncio.Event()
+        lines = []
+        try:
+            async with self._write_lock:
+                if not self.alive:
+                    return "lost", "", lines
+                if self.proc.stdin.is_closing():
+                    # The server is gone; let the reader collect its exit status
+                    await asyncio.wait([self._reader])
+                    return "lost", "", lines
+                self.pending.append((sync_id, future, lines, at_head))
+                if len(self.pending) == 1:
+                    at_head.set()
+                self.proc.stdin.write(data + ping)
+                await asyncio.wait_for(self.proc.stdin.drain(), self.timeout)
+            # The hang timeout starts once the cases queued ahead are answered;
+            # if the server dies first, the reader resolves every future
+            head_wait = asyncio.ensure_future(at_head.wait())
+            await asyncio.wait({head_wait, future}, return_when=asyncio.FIRST_COMPLETED)
+            head_wait.cancel()
+            status, detail = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.kill(hung=True)
+            status, detail = await future
+        except (BrokenPipeError, ConnectionResetError):
+            status, detail = await future
+        return status, detail, lines
+
+    async def close(self):
+        if self.alive:
+            self.proc.stdin.close()
+            try:
+                await asyncio.wait_for(asyncio.shield(self._reader), 5.0)
+            except asyncio.TimeoutError:
+                self.kill()
+                await self._reader
+
+
+class Finding:
+    def __init__(self, kind, signature, case, execution):
+        self.kind = kind
+        self.signature = signature
+        self.case = case
+        self.first_exec = execution
+        self.count = 0
+        self.minimized = None
+        self.minimize_runs = 0
+
+
+class FuzzStats:
+    def __init__(self):
+        self.execs = 0
+        self.lost = 0
+        self.bytes_sent = 0
+        self.responses = Counter()
+        self.findings = {}
+        self.started = time.perf_counter()
+
+    def record(self, case, data, status, detail, lines):
+        if status == "lost":
+            self.lost += 1
+            return
+        self.execs += 1
+        self.bytes_sent += len(data)
+        kind, label = classify(case, status, detail, lines)
+        if kind is None:
+            self.responses[label] += 1
+            return
+        finding = self.findings.get(label)
+        if finding is None:
+            finding = self.findings[label] = Finding(kind, label, case, self.execs)
+            print(f"❌ New finding at exec {self.execs:,}: {label}")
+        finding.count += 1
+
+
+async def fuzz_worker(session, grammar, stats, deadline, max_execs):
+    loop = asyncio.get_running_loop()
+    while loop.time() < deadline and (not max_execs or stats.execs < max_execs):
+        await session.ensure_running()
+        case = grammar.message()
+        data = encode_case(case)
+        status, detail, lines = await session.run(data)
+        stats.record(case, data, status, detail, lines)
+
+
+async def report_progress(stats, sessions, every):
+    last_execs, last_time = 0, time.perf_counter()
+    while True:
+        await asyncio.sleep(every)
+        now = time.perf_counter()
+        rate = (stats.execs - last_execs) / (now - last_time)
+        restarts = sum(max(s.starts - 1, 0) for s in sessions)
+        print(f"⏱️  {now - stats.started:6.0f}s {stats.execs:>10,} execs {rate:>8,.0f}/s  "
+              f"{len(stats.findings)} findings  {restarts} restarts")
+        last_execs, last_time = stats.execs, now
+
+
+async def minimize(finding, session, budget):
+    """Greedy shrink of the first case while the signature stays the same"""
+    best, best_size = finding.case, len(encode_case(finding.case))
+    tried = set()
+    improved = True
+    while improved and finding.minimize_runs < budget:
+        improved = False
+        for candidate in shrink(best):
+            data = encode_case(candidate)
+            digest = hashlib.sha1(data).digest()
+            if len(data) >= best_size or digest in tried:
+                continue
+            tried.add(digest)
+            await session.ensure_running()
+            status, detail, lines = await session.run(data)
+            finding.minimize_runs += 1
+            if classify(candidate, status, detail, lines)[1] == finding.signature:
+                best, best_size = candidate, len(data)
+                improved = True
+                break
+            if finding.minimize_runs >= budget:
+                break
+    finding.minimized = best
+
+
+def write_reproducer(finding, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    digest = hashlib.sha1(finding.signature.encode()).hexdigest()[:10]
+    path = os.path.join(out_dir, f"{finding.kind}-{digest}.jsonl")
+    with open(path, "wb") as f:
+        for msg in INIT_MESSAGES:
+            f.write(encode_case(msg))
+        f.write(encode_case(finding.minimized if finding.minimized is not None else finding.case))
+    return path
+
+
+async def run_fuzz(args, command):
+    async with MCPStdioClient(command, timeout=args.timeout) as client:
+        await client.initialize("mcp-fuzz")
+        tools = await client.list_tools()
+    print(f"🚀 {args.sessions} sessions x {args.depth} in flight, {len(tools)} tools, seed {args.seed}")
+
+    sessions = [FuzzSession(command, args.timeout) for _ in range(args.sessions)]
+    stats = FuzzStats()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + args.duration
+    progress = asyncio.create_task(report_progress(stats, sessions, args.print_every))
+    try:
+        await asyncio.gather(*(s.ensure_running() for s in sessions))
+        stats.started = time.perf_counter()
+        await asyncio.gather(*(
+            fuzz_worker(session, Grammar(tools, random.Random(f"{args.seed}:{i}:{slot}"), args.max_string),
+                        stats, deadline, args.execs)
+            for i, session in enumerate(sessions) for slot in range(args.depth)))
+    finally:
+        elapsed = time.perf_counter() - stats.started
+        progress.cancel()
+        await asyncio.gather(*(s.close() for s in sessions), return_exceptions=True)
+
+    restarts = sum(max(s.starts - 1, 0) for s in sessions)
+    print("\n=== Fuzzing Summary ===")
+    print(f"  executions      {stats.execs:,} in {elapsed:.1f}s ({stats.execs / max(elapsed, 1e-9):,.0f}/s)")
+    print(f"  sent            {stats.bytes_sent / 1024 / 1024:.1f} MiB")
+    for label, count in stats.responses.most_common():
+        print(f"  {label:<15} {count:,}")
+    print(f"  restarts        {restarts}")
+    if stats.lost:
+        print(f"  lost            {stats.lost:,} (queued behind a crash or hang)")
+
+    if stats.findings and args.minimize_budget:
+        print(f"\n🔁 Minimizing {len(stats.findings)} finding(s), up to {args.minimize_budget} runs each")
+        session = FuzzSession(command, args.timeout)
+        try:
+            for finding in stats.findings.values():
+                await minimize(finding, session, args.minimize_budget)
+        finally:
+            await session.close()
+    return stats
+
+
+def print_findings(findings, out_dir):
+    print("\n=== Findings ===")
+    if not findings:
+        print("✅ No crashes, hangs, non-JSON output or missing responses")
+        return
+    for finding in sorted(findings.values(), key=lambda f: (f.kind, -f.count)):
+        original = len(encode_case(finding.case))
+        print(f"\n❌ {finding.signature}")
+        line = f"   {finding.count:,} hits, first at exec {finding.first_exec:,}"
+        if finding.minimized is not None:
+            minimized = encode_case(finding.minimized)
+            line += f", minimized {original:,} → {len(minimized):,} bytes in {finding.minimize_runs} runs"
+        else:
+            minimized = encode_case(finding.case)
+        print(line)
+        text = minimized.decode(errors="replace").rstrip("\n")
+        print(f"   {text[:300]}{' ...' if len(text) > 300 else ''}")
+        print(f"   📝 {write_reproducer(finding, out_dir)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grammar-based protocol fuzzer for odata-mcp")
+    parser.add_argument("--sessions", "-c", type=int, default=4,
+                        help="persistent server processes (default: 4)")
+    parser.add_argument("--depth", type=int, default=8,
+                        help="cases in flight per session (default: 8)")
+    parser.add_argument("--duration", "-d", type=parse_duration, default=60.0,
+                        help="how long to fuzz, e.g. 90s, 30m, 4h (default: 60s)")
+    parser.add_argument("--execs", type=int, default=0,
+                        help="stop after this many executions (default: no limit)")
+    parser.add_argument("--timeout", type=float, default=5.0,
+                        help="seconds without an answer before a case counts as a hang (default: 5)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the grammar")
+    parser.add_argument("--max-string", type=int, default=1 << 20,
+                        help="length of the longest generated string (default: 1 MiB)")
+    parser.add_argument("--minimize-budget", type=int, default=200,
+                        help="executions spent shrinking each finding, 0 to skip (default: 200)")
+    parser.add_argument("--out", default="fuzz-findings",
+                        help="directory for reproducers (default: fuzz-findings)")
+    parser.add_argument("--print-every", type=float, default=5.0,
+                        help="seconds between progress lines (default: 5)")
+    parser.add_argument("--service", help="fuzz against a real OData service instead of the stand-in")
+    add_spec_arguments(parser)
+    parser.add_argument("server_command", nargs=argparse.REMAINDER,
+                        help="odata-mcp binary and extra arguments (default: ./odata-mcp)")
+    args = parser.parse_args()
+
+    command = args.server_command or ["./odata-mcp"]
+    standin = None
+    if args.service:
+        service_url = args.service
+    else:
+        standin = StandInProcess(spec_from_args(args)).start()
+        service_url = standin.url
+        print(f"📡 Stand-in OData v{args.odata_version} service at {service_url}")
+    command = command + ["--service", service_url]
+    print(f"Server command: {shlex.join(command)}")
+
+    try:
+        stats = asyncio.run(run_fuzz(args, command))
+    except MCPClientError as e:
+        raise SystemExit(f"❌ {e}")
+    finally:
+        if standin:
+            standin.stop()
+
+    print_findings(stats.findings, args.out)
+    if stats.findings:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,790 @@
+#!/usr/bin/env python3
+"""
+Hints file compiler, checker and bulk matcher for odata-mcp
+
+odata-mcp loads hints.json once and, for the odata_service_info tool,
+calls hint.Manager.GetHints: every hint's pattern is tried in turn with
+matchesPattern, and the matches are merged by priority. This tool decodes
+a hints file the way the Go loader does and compiles it into an index:
+
+  - a character trie over the literal prefix of anchored patterns
+    ("https://erp:44300/sap/*"),
+  - an Aho-Corasick automaton over the longest literal of floating patterns
+    ("*SRA020_PO_TRACKING_SRV*"),
+  - a dict for the exact-URL shortcut matchesPattern takes first.
+
+Each candidate the index yields is confirmed with a compiled port of
+matchesPattern, so the results are the same as odata-mcp's, quirks
+included. The file can then be checked, or resolved for many URLs:
+
+    python3 mcp_hints.py check hints.json
+    python3 mcp_hints.py match hints.json https://gw/sap/opu/odata/sap/SRA020_PO_TRACKING_SRV/
+    python3 mcp_hints.py bench hints.json --urls service_urls.txt
+    python3 mcp_hints.py bench hints.json --synthetic 500 --generate 20000 --json hints-bench.json
+
+check reports what the Go loader rejects and fields it ignores. When
+hints.json fails to decode, odata-mcp drops the whole file and only says
+so with --verbose. check also reports patterns that matchesPattern
+treats differently from a plain glob, and conflicts: two hints at the same
+priority that can match one URL (a witness URL is shown) and set
+different values for service_type or for the same field, entity or
+function hint. Which of them wins depends on file order. bench resolves
+and merges every URL with the index and with a linear scan that runs
+matchesPattern per hint, as odata-mcp does. It reports both match times,
+checks that the two agree and lists the conflicts it met. --synthetic
+adds generated hints to benchmark a catalog larger than the real one.
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from collections import Counter, defaultdict, deque
+
+# matchesPattern backslash-escapes these before its literal strings.Index search
+GO_ESCAPED = ".+^$()[]{}|"
+# SetCLIHint gives the --hint hint this priority
+CLI_PRIORITY = 1000
+MERGED_LISTS = ("known_issues", "workarounds", "notes")
+MERGED_MAPS = ("field_hints", "entity_hints", "function_hints")
+
+# Go struct layouts of internal/hint: field name -> kind
+FIELD_HINT = {"type": "string", "format": "string", "example": "string",
+              "description": "string", "required": "bool"}
+ENTITY_HINT = {"description": "string", "notes": ("list", "string"), "examples": ("list", "string")}
+FUNCTION_HINT = {"description": "string", "parameters": ("list", "string"),
+                 "examples": ("list", "string")}
+EXAMPLE = {"description": "string", "query": "string", "note": "string"}
+SERVICE_HINT = {
+    "pattern": "string", "priority": "int", "service_type": "string",
+    "known_issues": ("list", "string"), "workarounds": ("list", "string"),
+    "field_hints": ("map", FIELD_HINT), "entity_hints": ("map", ENTITY_HINT),
+    "function_hints": ("map", FUNCTION_HINT), "examples": ("list", EXAMPLE),
+    "notes": ("list", "string"),
+}
+HINT_CONFIG = {"version": "string", "hints": ("list", SERVICE_HINT)}
+
+
+def _json_type(value):
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)):
+        return "number"
+    return {str: "string", list: "array", dict: "object"}.get(type(value), "null")
+
+
+def _zero(kind):
+    if isinstance(kind, dict):
+        return {name: _zero(sub) for name, sub in kind.items()}
+    if isinstance(kind, tuple):
+        return [] if kind[0] == "list" else {}
+    return {"string": "", "int": 0, "bool": False}[kind]
+
+
+def go_decode(value, kind, path, report):
+    """Decode like encoding/json into the struct layout `kind`
+
+    Field names match case-insensitively, unknown fields are ignored and
+    null leaves the zero value. A type mismatch is an error that makes
+    json.Unmarshal (and LoadFromFile) fail; decoding carries on with the
+    zero value so that the rest of the file can still be checked.
+    """
+    if value is None:
+        return _zero(kind)
+    if isinstance(kind, dict):
+        result = _zero(kind)
+        if not isinstance(value, dict):
+            report("error", path, f"cannot decode {_json_type(value)} into an object")
+            return result
+        names = {name.lower(): name for name in kind}
+        for key, item in value.items():
+            name = names.get(key.lower())
+            if name is None:
+                report("warning", f"{path}.{key}", "unknown field, ignored by odata-mcp")
+                continue
+            result[name] = go_decode(item, kind[name], f"{path}.{key}", report)
+        return result
+    if isinstance(kind, tuple):
+        container, item_kind = kind
+        if container == "list":
+            if not isinstance(value, list):
+                report("error", path, f"cannot decode {_json_type(value)} into an array")
+                return []
+            return [go_decode(item, item_kind, f"{path}[{i}]", report) for i, item in enumerate(value)]
+        if not isinstance(value, dict):
+            report("error", path, f"cannot decode {_json_type(value)} into a map")
+            return {}
+        return {key: go_decode(item, item_kind, f"{path}.{key}", report) for key, item in value.items()}
+    if kind == "int":
+        if isinstance(value, int) and not isinstance(value, bool) and -2 ** 63 <= value < 2 ** 63:
+            return value
+        report("error", path, f"cannot decode {json.dumps(value)} into int")
+        return 0
+    expected = str if kind == "string" else bool
+    if type(value) is not expected:
+        report("error", path, f"cannot decode {_json_type(value)} into {kind}")
+        return _zero(kind)
+    return value
+
+
+def go_escape(pattern):
+    for ch in GO_ESCAPED:
+        pattern = pattern.replace(ch, "\\" + ch)
+    return pattern
+
+
+def go_matches(url, pattern):
+    """Line-by-line port of Manager.matchesPattern, the linear reference"""
+    if url == pattern:
+        return True
+    pattern = go_escape(pattern)
+    parts = pattern.split("*")
+    pos = 0
+    for i, part in enumerate(parts):
+        if not part:
+            continue
+        part = part.replace("?", ".")
+        idx = url.find(part, pos)
+        if idx == -1:
+            return False
+        if i == 0 and pattern[0] != "*" and idx != pos:
+            return False
+        pos = idx + len(part)
+    # An empty pattern panics here in Go (pattern[len(pattern)-1])
+    if pattern[-1] != "*":
+        last = parts[-1]
+        if last and not url.endswith(last):
+            return False
+    return True
+
+
+class CompiledPattern:
+    """matchesPattern for one pattern with the escaping and splitting done once"""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        escaped = go_escape(pattern)
+        self.escaped = escaped
+        parts = escaped.split("*")
+        searches = [part.replace("?", ".") for part in parts]
+        # Anchored patterns start with a literal that must be a prefix of the URL
+        self.prefix = searches[0]
+        self.rest = [part for part in searches[1:] if part]
+        # The suffix check uses the escaped part without the "?" replacement
+        self.suffix = "" if escaped.endswith("*") else parts[-1]
+        self.literal = max((part for part in searches if part), key=len, default="")
+
+    def search(self, url, start=0):
+        """The wildcard branch, with the prefix already known to match at url[:start]"""
+        pos = start
+        for part in self.rest:
+            idx = url.find(part, pos)
+            if idx == -1:
+                return False
+            pos = idx + len(part)
+        return not self.suffix or url.endswith(self.suffix)
+
+    def matches(self, url):
+        if url == self.pattern:
+            return True
+        if self.prefix and not url.startswith(self.prefix):
+            return False
+        return self.search(url, len(self.prefix))
+
+    def tokens(self):
+        """The pattern as a glob for overlap analysis: None is '*', '?' is a literal '.'"""
+        if self.escaped != self.pattern:
+            # The wildcard branch needs a backslash in the URL; only the exact URL is left
+            return list(self.pattern)
+        return [None if ch == "*" else "." if ch == "?" else ch for ch in self.pattern]
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton that reports which keywords occur in a string"""
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+
+    def add(self, word, value):
+        state = 0
+        for ch in word:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            state = nxt
+        self.out[state].append(value)
+
+    def build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+        return self
+
+    def find(self, text):
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        hits = []
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                hits.extend(out[state])
+        return hits
+
+    def __len__(self):
+        return len(self.goto)
+
+
+class Hint:
+    """One decoded ServiceHint, with its maps converted as GetHints does"""
+
+    def __init__(self, index, decoded):
+        self.index = index
+        self.pattern = decoded["pattern"]
+        self.priority = decoded["priority"]
+        self.service_type = decoded["service_type"]
+        self.lists = {key: decoded[key] for key in MERGED_LISTS}
+        self.maps = {
+            "field_hints": {name: {key: value for key, value in field.items() if value}
+                            for name, field in decoded["field_hints"].items()},
+            "entity_hints": {name: {key: value for key, value in entity.items() if value}
+                             for name, entity in decoded["entity_hints"].items()},
+            "function_hints": {name: {key: value for key, value in function.items() if value}
+                               for name, function in decoded["function_hints"].items()},
+        }
+        self.examples = [{key: value for key, value in example.items() if value or key != "note"}
+                         for example in decoded["examples"]]
+        self.compiled = CompiledPattern(self.pattern)
+
+    @property
+    def label(self):
+        return "--hint" if self.index is None else f"hints[{self.index}] {json.dumps(self.pattern)}"
+
+
+class HintsFile:
+    """A decoded hints file plus everything the Go loader would complain about"""
+
+    def __init__(self, path, raw):
+        self.path = path
+        self.problems = []
+        config = go_decode(raw, HINT_CONFIG, "$", self.report)
+        self.version = config["version"]
+        self.hints = [Hint(i, decoded) for i, decoded in enumerate(config["hints"])]
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError) as e:
+            raise SystemExit(f"❌ Cannot read {path}: {e}")
+        return cls(path, raw)
+
+    def report(self, severity, where, message):
+        self.problems.append((severity, where, message))
+
+    @property
+    def refused(self):
+        return any(severity == "error" for severity, _, _ in self.problems)
+
+
+def parse_cli_hint(text):
+    """SetCLIHint: JSON that decodes into a ServiceHint, otherwise a plain note"""
+    errors = []
+    try:
+        raw = json.loads(text)
+        if not isinstance(raw, (dict, type(None))):
+            raise ValueError
+        decoded = go_decode(raw, SERVICE_HINT, "--hint",
+                            lambda severity, where, message: severity == "error" and errors.append(message))
+    except ValueError:
+        errors.append(text)
+    if errors:
+        decoded = go_decode({"pattern": "*", "notes": [text]}, SERVICE_HINT, "--hint", lambda *a: None)
+    decoded["priority"] = CLI_PRIORITY
+    return Hint(None, decoded)
+
+
+class HintIndex:
+    """Indexed equivalent of running matchesPattern over every hint"""
+
+    def __init__(self, hints):
+        self.hints = hints
+        self.exact = defaultdict(list)
+        self.trie = {}
+        self.keywords = KeywordAutomaton()
+        self.unindexed = []
+        self.trie_nodes = 1
+        self.counts = Counter()
+        for i, hint in enumerate(hints):
+            compiled = hint.compiled
+            self.exact[compiled.pattern].append(i)
+            if compiled.prefix:
+                node = self.trie
+                for ch in compiled.prefix:
+                    if ch not in node:
+                        node[ch] = {}
+                        self.trie_nodes += 1
+                    node = node[ch]
+                # "" never labels an edge, so it holds the hints ending at this node
+                node.setdefault("", []).append(i)
+                self.counts["prefix"] += 1
+            elif compiled.literal:
+                self.keywords.add(compiled.literal, i)
+                self.counts["keyword"] += 1
+            else:
+                self.unindexed.append(i)
+                self.counts["unindexed"] += 1
+        self.keywords.build()
+
+    def match(self, url):
+        """Indices of the matching hints in file order, as GetHints collects them"""
+        hints = self.hints
+        found = set(self.exact.get(url, ()))
+        node = self.trie
+        for depth, ch in enumerate(url, 1):
+            node = node.get(ch)
+            if node is None:
+                break
+            for i in node.get("", ()):
+                if hints[i].compiled.search(url, depth):
+                    found.add(i)
+        for i in self.keywords.find(url):
+            if i not in found and hints[i].compiled.search(url):
+                found.add(i)
+        for i in self.unindexed:
+            if hints[i].compiled.search(url):
+                found.add(i)
+        return sorted(found)
+
+
+def linear_match(hints, url):
+    return [i for i, hint in enumerate(hints) if go_matches(url, hint.pattern)]
+
+
+def merge_strings(existing, new):
+    seen = set()
+    result = []
+    for value in list(existing) + list(new):
+        if value not in seen:
+            seen.add(value)
+            result.append(value)
+    return result
+
+
+def merge_hints(matching, source):
+    """GetHints after matching: priority sort, then merge from the lowest up"""
+    if not matching:
+        return None
+    ordered = list(matching)
+    # The same in-place swap sort as GetHints; it is not stable for equal priorities
+    for i in range(len(ordered) - 1):
+        for j in range(i + 1, len(ordered)):
+            if ordered[j].priority > ordered[i].priority:
+                ordered[i], ordered[j] = ordered[j], ordered[i]
+    result = {}
+    for hint in reversed(ordered):
+        if hint.service_type:
+            result["service_type"] = hint.service_type
+        for key in MERGED_LISTS:
+            if hint.lists[key]:
+                result[key] = merge_strings(result.get(key, []), hint.lists[key])
+        for key in MERGED_MAPS:
+            if hint.maps[key]:
+                result.setdefault(key, {}).update(hint.maps[key])
+        if hint.examples:
+            result.setdefault("examples", []).extend(hint.examples)
+    if source:
+        result["hint_source"] = source
+    return result
+
+
+class Resolver:
+    """GetHints for one loaded file and an optional --hint"""
+
+    def __init__(self, hints_file, cli_hint=None):
+        self.hints = [hint for hint in hints_file.hints if hint.pattern]
+        self.index = HintIndex(self.hints)
+        self.cli_hint = cli_hint
+        self.source = "CLI argument" if cli_hint else f"Hints file: {hints_file.path}"
+
+    def matching(self, matched):
+        return ([self.cli_hint] if self.cli_hint else []) + [self.hints[i] for i in matched]
+
+    def resolve(self, url):
+        return merge_hints(self.matching(self.index.match(url)), self.source)
+
+
+def conflicting_keys(a, b):
+    """Values two hints would both set differently when merged"""
+    keys = []
+    if a.service_type and b.service_type and a.service_type != b.service_type:
+        keys.append("service_type")
+    for section in MERGED_MAPS:
+        for name in sorted(a.maps[section].keys() & b.maps[section].keys()):
+            if a.maps[section][name] != b.maps[section][name]:
+                keys.append(f"{section}.{name}")
+    return keys
+
+
+def overlap_witness(a, b):
+    """A URL matched by both patterns, or None
+
+    Searches the product of the two patterns as globs and confirms the
+    result with the compiled matchers, so only real overlaps are returned.
+    """
+    for candidate in (a.pattern, b.pattern):
+        if a.compiled.matches(candidate) and b.compiled.matches(candidate):
+            return candidate
+    left, right = a.compiled.tokens(), b.compiled.tokens()
+    end = (len(left), len(right))
+    parents = {(0, 0): None}
+    queue = deque([(0, 0)])
+    while queue:
+        state = queue.popleft()
+        if state == end:
+            break
+        i, j = state
+        x = left[i] if i < len(left) else False
+        y = right[j] if j < len(right) else False
+        moves = []
+        if x is None:
+            moves.append(((i + 1, j), ""))
+            if y:
+                moves.append(((i, j + 1), y))
+        if y is None:
+            moves.append(((i, j + 1), ""))
+            if x:
+                moves.append(((i + 1, j), x))
+        if x and y and x == y:
+            moves.append(((i + 1, j + 1), x))
+        for nxt, ch in moves:
+            if nxt not in parents:
+                parents[nxt] = (state, ch)
+                queue.append(nxt)
+    if end not in parents:
+        return None
+    chars = []
+    state = end
+    while parents[state]:
+        state, ch = parents[state]
+        chars.append(ch)
+    witness = "".join(reversed(chars))
+    if a.compiled.matches(witness) and b.compiled.matches(witness):
+        return witness
+    return None
+
+
+def pattern_notes(hint):
+    """Ways matchesPattern treats this pattern unlike a plain glob"""
+    pattern = hint.pattern
+    if not pattern:
+        return [("error", "empty pattern: matchesPattern panics for every URL (pattern[len(pattern)-1])")]
+    notes = []
+    escaped = sorted({ch for ch in pattern if ch in GO_ESCAPED})
+    if escaped:
+        reach = "never matches a real URL" if "*" in pattern else f"only matches the URL {pattern} exactly"
+        notes.append(("warning", f"contains {' '.join(escaped)}, which matchesPattern backslash-escapes "
+                                 f"before its literal search, so it {reach}"))
+    elif "*" not in pattern:
+        notes.append(("warning", "has no '*': matchesPattern also accepts any URL that starts and ends "
+                                 "with it"))
+    if "?" in pattern and not escaped:
+        note = "'?' only matches a literal '.'"
+        if hint.compiled.suffix and "?" in hint.compiled.suffix:
+            note += ", and the suffix check after the last '*' compares the '?' itself"
+        notes.append(("warning", note))
+    if hint.priority >= CLI_PRIORITY:
+        notes.append(("warning", f"priority {hint.priority} ties with or outranks the --hint CLI hint"))
+    return notes
+
+
+def static_conflicts(hints):
+    """Conflicting same-priority hint pairs that share at least one URL"""
+    by_priority = defaultdict(list)
+    for hint in hints:
+        if hint.pattern:
+            by_priority[hint.priority].append(hint)
+    conflicts = []
+    for priority, group in sorted(by_priority.items(), reverse=True):
+        for n, a in enumerate(group):
+            for b in group[n + 1:]:
+                keys = conflicting_keys(a, b)
+                if not keys:
+                    continue
+                witness = overlap_witness(a, b)
+                if witness is not None:
+                    conflicts.append((priority, a, b, keys, witness))
+    return conflicts
+
+
+def run_check(args):
+    hints_file = HintsFile.load(args.hints_file)
+    hints = hints_file.hints
+    started = time.perf_counter()
+    index = HintIndex([hint for hint in hints if hint.pattern])
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    print(f"=== Hints File {args.hints_file} ===")
+    priorities = sorted({hint.priority for hint in hints})
+    span = f", priorities {priorities[0]}..{priorities[-1]}" if priorities else ""
+    print(f"  version {hints_file.version or '-'}, {len(hints)} hints{span}")
+    print(f"  compiled in {compile_ms:.1f} ms: {index.counts['prefix']} prefix patterns in a "
+          f"{index.trie_nodes}-node trie, {index.counts['keyword']} floating patterns in a "
+          f"{len(index.keywords)}-state keyword automaton, {index.counts['unindexed']} unindexed")
+
+    problems = list(hints_file.problems)
+    for hint in hints:
+        for severity, message in pattern_notes(hint):
+            problems.append((severity, hint.label, message))
+    by_pattern = defaultdict(list)
+    for hint in hints:
+        by_pattern[hint.pattern].append(hint)
+    for pattern, same in by_pattern.items():
+        if pattern and len(same) > 1:
+            problems.append(("warning", json.dumps(pattern),
+                             f"repeated in hints {', '.join(str(hint.index) for hint in same)}"))
+
+    errors = sum(severity == "error" for severity, _, _ in problems)
+    print(f"\n=== Problems ({len(problems)}) ===")
+    for severity, where, message in problems:
+        print(f"  {'❌' if severity == 'error' else '⚠️ '} {where}: {message}")
+    if hints_file.refused:
+        print("  ❌ odata-mcp cannot decode this file and runs without any hints "
+              "(reported only with --verbose)")
+
+    conflicts = static_conflicts(hints)
+    print(f"\n=== Same-priority Conflicts ({len(conflicts)}) ===")
+    for priority, a, b, keys, witness in conflicts:
+        print(f"  ❌ priority {priority}: {a.label} and {b.label}")
+        print(f"     both match {witness}")
+        print(f"     and set {', '.join(keys)} differently; file order decides the winner")
+
+    if errors or conflicts:
+        print(f"\n❌ {errors} error(s), {len(conflicts)} conflict(s)")
+        sys.exit(1)
+    print("\n✅ No errors or conflicts")
+
+
+def run_match(args):
+    hints_file = HintsFile.load(args.hints_file)
+    if hints_file.refused:
+        print(f"⚠️  odata-mcp cannot decode {args.hints_file}; run `check` for details", file=sys.stderr)
+    cli_hint = parse_cli_hint(args.hint) if args.hint is not None else None
+    resolver = Resolver(hints_file, cli_hint)
+    results = {}
+    for url in args.urls:
+        matched = resolver.index.match(url)
+        results[url] = merge_hints(resolver.matching(matched), resolver.source)
+        if args.json:
+            continue
+        labels = [hint.label for hint in resolver.matching(matched)] or ["no hints"]
+        print(f"=== {url} ===")
+        print(f"  matched: {', '.join(labels)}")
+        if results[url] is not None:
+            # json.Marshal sorts map keys
+            print(json.dumps(results[url], indent=2, sort_keys=True, ensure_ascii=False))
+        print()
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True, ensure_ascii=False))
+
+
+SYNTHETIC_WORDS = ("ORDERS", "MATERIAL", "PLANT", "INVOICE", "DELIVERY", "CUSTOMER", "VENDOR", "STOCK")
+SYNTHETIC_FIELDS = ("PurchaseOrder", "Material", "Plant", "CompanyCode", "Supplier", "Customer")
+URL_HOSTS = ("https://gw", "https://erp-0001:44300", "http://localhost:8080")
+URL_FILLERS = ("", "/", "/sap/opu/odata/sap/", "ZORDERS_SRV/", "v2/", "Tenant7/", "?$format=json")
+
+
+def synthetic_hints(count, rng, first_index):
+    """Generated raw hints that look like a large catalog; some share URLs and fields"""
+    hints = []
+    for i in range(first_index, first_index + count):
+        word = SYNTHETIC_WORDS[i % len(SYNTHETIC_WORDS)]
+        pattern = (f"https://erp-{i:04d}:44300/sap/opu/odata/sap/*",
+                   f"*/sap/opu/odata/sap/Z{word}_{i}_SRV*",
+                   f"*Z{word}_{i - 1}_SRV*",
+                   f"https://svc-{i:04d}*/odata/*",
+                   f"*/odata/v4/tenant{i}/*")[i % 5]
+        hint = {"pattern": pattern, "priority": rng.choice((0, 5, 10, 20, 50)),
+                "notes": [f"Synthetic hint {i}"]}
+        if i % 3 == 0:
+            hint["service_type"] = f"Synthetic {word} service"
+        if i % 2 == 0:
+            field = rng.choice(SYNTHETIC_FIELDS)
+            hint["field_hints"] = {field: {"type": "Edm.String", "description": f"Set by hint {i}"}}
+        hints.append(hint)
+    return hints
+
+
+def generate_urls(hints, count, rng):
+    """URLs that instantiate the patterns, plus a quarter that match nothing on purpose"""
+    urls = []
+    patterns = [hint.pattern for hint in hints if hint.pattern]
+    for n in range(count):
+        if not patterns or n % 4 == 3:
+            urls.append(f"https://host{rng.randrange(10 ** 6)}/odata/Service{n}/")
+            continue
+        pattern = rng.choice(patterns)
+        urls.append("".join(rng.choice(URL_HOSTS if not i else URL_FILLERS) if ch == "*"
+                            else "." if ch == "?" else ch for i, ch in enumerate(pattern)))
+    return urls
+
+
+def read_urls(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def best_of(repeat, fn):
+    """Fastest of `repeat` runs, and the last result"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def run_bench(args):
+    hints_file = HintsFile.load(args.hints_file)
+    if hints_file.refused:
+        print(f"⚠️  odata-mcp cannot decode {args.hints_file}; run `check` for details")
+    rng = random.Random(args.seed)
+    if args.synthetic:
+        first = len(hints_file.hints)
+        for n, raw in enumerate(synthetic_hints(args.synthetic, rng, first)):
+            decoded = go_decode(raw, SERVICE_HINT, f"$.synthetic[{n}]", hints_file.report)
+            hints_file.hints.append(Hint(first + n, decoded))
+    cli_hint = parse_cli_hint(args.hint) if args.hint is not None else None
+
+    started = time.perf_counter()
+    resolver = Resolver(hints_file, cli_hint)
+    compile_s = time.perf_counter() - started
+    hints = resolver.hints
+    if args.urls:
+        urls = read_urls(args.urls)
+        origin = args.urls
+    else:
+        urls = generate_urls(hints, args.generate, rng)
+        origin = f"generated, seed {args.seed}"
+    if not urls:
+        raise SystemExit("❌ No URLs to match")
+    print(f"📡 {len(hints)} hints ({args.synthetic} synthetic), {len(urls)} URLs ({origin})")
+
+    index = resolver.index
+    indexed_s, indexed = best_of(args.repeat, lambda: [index.match(url) for url in urls])
+    linear_s, linear = best_of(args.repeat, lambda: [linear_match(hints, url) for url in urls])
+    merge_s, merged = best_of(args.repeat, lambda: [merge_hints(resolver.matching(matched), resolver.source)
+                                                    for matched in indexed])
+    mismatches = [(url, a, b) for url, a, b in zip(urls, indexed, linear) if a != b]
+
+    per_url = Counter(min(len(matched), 3) for matched in indexed)
+    conflicts = {}
+    for url, matched in zip(urls, indexed):
+        by_priority = defaultdict(list)
+        for i in matched:
+            by_priority[hints[i].priority].append(hints[i])
+        for group in by_priority.values():
+            for n, a in enumerate(group):
+                for b in group[n + 1:]:
+                    keys = conflicting_keys(a, b)
+                    if keys:
+                        entry = conflicts.setdefault((a.index, b.index), [a, b, keys, url, 0])
+                        entry[4] += 1
+
+    def us(seconds):
+        return seconds / len(urls) * 1e6
+
+    print(f"\n=== Bulk Match ({len(urls)} URLs, {len(hints)} hints, best of {args.repeat}) ===")
+    print(f"  compile          {compile_s * 1000:9.1f} ms   {index.counts['prefix']} prefix, "
+          f"{index.counts['keyword']} keyword, {index.counts['unindexed']} unindexed patterns")
+    print(f"  indexed match    {indexed_s * 1000:9.1f} ms   {us(indexed_s):8.2f} µs/URL")
+    print(f"  linear match     {linear_s * 1000:9.1f} ms   {us(linear_s):8.2f} µs/URL   "
+          f"(matchesPattern per hint, as odata-mcp does)")
+    print(f"  speedup          {linear_s / max(indexed_s, 1e-9):9.1f}x")
+    print(f"  merge            {merge_s * 1000:9.1f} ms   {us(merge_s):8.2f} µs/URL")
+    print(f"  matches per URL  " + "  ".join(f"{'3+' if k == 3 else k}: {per_url[k]}" for k in range(4)))
+    print(f"  no hints         {sum(result is None for result in merged)} URLs")
+
+    print(f"\n=== Same-priority Conflicts Seen ({len(conflicts)}) ===")
+    ranked = sorted(conflicts.values(), key=lambda entry: -entry[4])
+    for a, b, keys, url, count in ranked[:args.top]:
+        print(f"  ⚠️  {count:>6} URLs  priority {a.priority}: {a.label} and {b.label}: {', '.join(keys)}")
+        print(f"             e.g. {url}")
+    if len(ranked) > args.top:
+        print(f"  ... and {len(ranked) - args.top} more (--top)")
+
+    if mismatches:
+        print(f"\n❌ Indexed and linear matchers disagree on {len(mismatches)} URLs")
+        for url, a, b in mismatches[:5]:
+            print(f"  {url}: indexed {a}, linear {b}")
+    else:
+        print("\n✅ Indexed and linear matchers agree on every URL")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "hints": len(hints), "synthetic": args.synthetic, "urls": len(urls),
+                "compile_ms": compile_s * 1000, "indexed_us_per_url": us(indexed_s),
+                "linear_us_per_url": us(linear_s), "merge_us_per_url": us(merge_s),
+                "matches_per_url": statistics.mean(len(matched) for matched in indexed),
+                "conflicts": [{"priority": a.priority, "hints": [a.index, b.index],
+                               "patterns": [a.pattern, b.pattern], "keys": keys,
+                               "example": url, "urls": count}
+                              for a, b, keys, url, count in conflicts.values()],
+                "mismatches": len(mismatches),
+            }, f, indent=2)
+        print(f"\n📝 Results written to {args.json}")
+    if mismatches:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile, check and bulk-match odata-mcp hints files")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    check = commands.add_parser("check", help="decode problems, pattern quirks and conflicts")
+    check.add_argument("hints_file", nargs="?", default="hints.json")
+
+    match = commands.add_parser("match", help="merged hints for some service URLs")
+    match.add_argument("hints_file")
+    match.add_argument("urls", nargs="+", metavar="URL")
+
+    bench = commands.add_parser("bench", help="resolve many URLs, time the matchers, list conflicts")
+    bench.add_argument("hints_file", nargs="?", default="hints.json")
+    bench.add_argument("--urls", metavar="FILE", help="service URLs, one per line (default: generated)")
+    bench.add_argument("--generate", type=int, default=10000, metavar="N",
+                       help="number of generated URLs without --urls (default: 10000)")
+    bench.add_argument("--synthetic", type=int, default=0, metavar="N",
+                       help="add N generated hints to the catalog (default: 0)")
+    bench.add_argument("--repeat", type=int, default=3, help="timed passes, best counts (default: 3)")
+    bench.add_argument("--seed", type=int, default=1, help="seed for generated URLs and hints (default: 1)")
+    bench.add_argument("--top", type=int, default=20, help="conflicts to list (default: 20)")
+    bench.add_argument("--json", metavar="FILE", help="also write the results as JSON")
+
+    for sub in (match, bench):
+        sub.add_argument("--hint", help="the odata-mcp --hint value, JSON or plain text")
+    match.add_argument("--json", action="store_true", help="print the results as one JSON object")
+
+    args = parser.parse_args()
+    {"check": run_check, "match": run_match, "bench": run_bench}[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
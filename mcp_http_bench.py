@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Streamable-HTTP and SSE benchmark for odata-mcp
+
+Compares the ways a client can call tools over --transport streamable-http:
+
+  json        plain JSON POSTs on pooled keep-alive connections
+  json-close  plain JSON POSTs with Connection: close (cost of no pooling)
+  sse         Accept: text/event-stream, so tools/call is upgraded to SSE
+  resume      SSE plus a Last-Event-ID header (resume event after the result)
+
+For every mode it reports time to first byte, full response latency and
+requests per second with many concurrent clients. The server holds SSE
+streams open, so an SSE call ends once its events have arrived and its
+connection is dropped. The new-connection count shows that cost.
+
+    python3 mcp_http_bench.py --clients 16 --duration 10 ./odata-mcp
+    python3 mcp_http_bench.py --url http://localhost:8080/mcp --modes json,sse
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+from collections import Counter
+
+from mcp_client import MCPClientError, MCPStreamableHTTPClient
+from mcp_loadgen import Workload, parse_mix, response_error, start_http_server
+from odata_standin import StandInProcess, add_spec_arguments, print_upstream_stats, spec_from_args
+from view_trace import LatencyHistogram
+
+# mode -> (extra headers, SSE events to wait for; None means plain JSON)
+MODES = {
+    "json": ({}, None),
+    "json-close": ({"Connection": "close"}, None),
+    "sse": ({"Accept": "application/json, text/event-stream"}, ("message",)),
+    "resume": ({"Accept": "application/json, text/event-stream", "Last-Event-ID": "bench-0"},
+               ("message", "resume")),
+}
+DEFAULT_MODES = "json,json-close,sse,resume"
+
+
+class ModeStats:
+    def __init__(self, mode):
+        self.mode = mode
+        self.ttfb = LatencyHistogram()
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.upgraded = 0
+        self.connections = 0
+        self.errors = Counter()
+        self.elapsed = 0.0
+
+    @property
+    def error_count(self):
+        return sum(self.errors.values())
+
+
+def decode_result(response, until):
+    """JSON-RPC message carried by a plain or SSE response, plus an error text"""
+    if response.status != 200:
+        return None, f"HTTP {response.status}"
+    if response.is_event_stream:
+        events = {event["event"]: event for event in response.events}
+        missing = [name for name in until or () if name not in events]
+        if missing:
+            return None, f"missing {', '.join(missing)} event"
+        return json.loads(events["message"]["data"]), None
+    return json.loads(response.body), None
+
+
+async def client_loop(client, workload, mode, stats, ids, measure_from, deadline, timeout):
+    headers, until = MODES[mode]
+    loop = asyncio.get_running_loop()
+    while loop.time() < deadline:
+        _, name, arguments = workload.next_call()
+        message = {"jsonrpc": "2.0", "id": next(ids), "method": "tools/call",
+                   "params": {"name": name, "arguments": arguments}}
+        started = time.perf_counter()
+        response = None
+        try:
+            if until:
+                response = await client.post_events(message, headers, until, timeout)
+            else:
+                response = await client.post(message, headers, timeout)
+            result, error = decode_result(response, until)
+            if result is not None:
+                error = response_error(result)
+        except asyncio.TimeoutError:
+            error = "timeout"
+        except (MCPClientError, OSError, ValueError) as e:
+            error = str(e) or type(e).__name__
+        finished = time.perf_counter()
+        if loop.time() < measure_from:
+            continue
+        stats.requests += 1
+        if error is not None:
+            stats.errors[error] += 1
+            continue
+        stats.ttfb.add(int((response.received_at - started) * 1e9))
+        stats.latency.add(int((finished - started) * 1e9))
+        if response.is_event_stream:
+            stats.upgraded += 1
+
+
+async def run_mode(url, mode, tools, args):
+    workload = Workload(tools, parse_mix(args.mix), args.rows, args.top, args.seed)
+    if not workload.kinds:
+        raise SystemExit(f"❌ None of the tool types in --mix {args.mix} were generated")
+    clients = [MCPStreamableHTTPClient(url, timeout=args.timeout) for _ in range(args.clients)]
+    for client in clients:
+        await client.start()
+    stats = ModeStats(mode)
+    ids = itertools.count(1)
+    loop = asyncio.get_running_loop()
+    measure_from = loop.time() + args.warmup
+    deadline = measure_from + args.duration
+    opened_before = None
+
+    def snapshot_connections():
+        nonlocal opened_before
+        opened_before = sum(client.opened for client in clients)
+    loop.call_at(measure_from, snapshot_connections)
+
+    try:
+        await asyncio.gather(*(client_loop(client, workload, mode, stats, ids, measure_from,
+                                           deadline, args.timeout) for client in clients))
+    finally:
+        await asyncio.gather(*(client.close() for client in clients))
+    stats.elapsed = max(loop.time() - measure_from, 1e-9)
+    stats.connections = sum(client.opened for client in clients) - (opened_before or 0)
+    return stats
+
+
+def _ms(ns):
+    return f"{ns / 1e6:.2f}" if ns is not None else "-"
+
+
+def print_report(results):
+    print("\n=== Streamable HTTP Results ===")
+    print(f"  {'mode':<11} {'requests':>8} {'errors':>6} {'req/s':>8} {'ttfb p50':>9} {'ttfb p99':>9} "
+          f"{'full p50':>9} {'full p99':>9} {'SSE':>5} {'new conns':>9}  (ms)")
+    for stats in results:
+        ok = stats.requests - stats.error_count
+        print(f"  {stats.mode:<11} {stats.requests:>8} {stats.error_count:>6} "
+              f"{ok / stats.elapsed:>8.1f} {_ms(stats.ttfb.percentile(50) if ok else None):>9} "
+              f"{_ms(stats.ttfb.percentile(99) if ok else None):>9} "
+              f"{_ms(stats.latency.percentile(50) if ok else None):>9} "
+              f"{_ms(stats.latency.percentile(99) if ok else None):>9} "
+              f"{stats.upgraded / ok * 100 if ok else 0:>4.0f}% {stats.connections:>9}")
+    for stats in results:
+        for error, count in stats.errors.most_common(3):
+            print(f"  ❌ {stats.mode}: {count} x {error}")
+
+
+def report_json(results):
+    report = {}
+    for stats in results:
+        ok = stats.requests - stats.error_count
+        report[stats.mode] = {
+            "requests": stats.requests,
+            "errors": stats.error_count,
+            "throughput": ok / stats.elapsed,
+            "sse_upgraded": stats.upgraded,
+            "new_connections": stats.connections,
+            "ttfb_ms": {p: stats.ttfb.percentile(p) / 1e6 for p in (50, 90, 99)} if ok else None,
+            "latency_ms": {p: stats.latency.percentile(p) / 1e6 for p in (50, 90, 99)} if ok else None,
+        }
+    return report
+
+
+async def run_bench(args, url):
+    probe = MCPStreamableHTTPClient(url, timeout=args.timeout)
+    await probe.start()
+    await probe.initialize("mcp-http-bench")
+    tools = await probe.list_tools()
+    await probe.close()
+
+    results = []
+    for mode in args.modes:
+        print(f"⏱️  {mode}: {args.clients} clients, {args.duration:g}s (+{args.warmup:g}s warm-up)...",
+              flush=True)
+        results.append(await run_mode(url, mode, tools, args))
+    return results
+
+
+async def run_with_server(args, command):
+    server, url = await start_http_server(command, args.timeout)
+    try:
+        return await run_bench(args, url)
+    finally:
+        server.terminate()
+        await server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streamable-HTTP / SSE benchmark for odata-mcp")
+    parser.add_argument("--modes", default=DEFAULT_MODES,
+                        help=f"comma-separated modes to compare (default: {DEFAULT_MODES})")
+    parser.add_argument("--clients", "-c", type=int, default=8,
+                        help="concurrent clients, one keep-alive connection each (default: 8)")
+    parser.add_argument("--duration", "-d", type=float, default=5.0,
+                        help="measured seconds per mode (default: 5)")
+    parser.add_argument("--warmup", type=float, default=1.0,
+                        help="seconds before measuring starts, per mode (default: 1)")
+    parser.add_argument("--mix", default="filter=1",
+                        help="weighted tool types to call (default: filter=1)")
+    parser.add_argument("--top", type=int, default=10, help="$top for filter/search calls (default: 10)")
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="seconds to wait for each response (default: 30)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the call mix")
+    parser.add_argument("--url", help="benchmark an already running server, e.g. http://localhost:8080/mcp")
+    parser.add_argument("--service", help="OData service for the spawned server instead of the stand-in")
+    parser.add_argument("--json", metavar="FILE", help="also write the results as JSON")
+    add_spec_arguments(parser)
+    parser.add_argument("server_command", nargs=argparse.REMAINDER,
+                        help="odata-mcp binary and extra arguments (default: ./odata-mcp)")
+    args = parser.parse_args()
+    args.modes = [mode.strip() for mode in args.modes.split(",")]
+    unknown = [mode for mode in args.modes if mode not in MODES]
+    if unknown:
+        parser.error(f"unknown mode(s): {', '.join(unknown)} (choose from {', '.join(MODES)})")
+
+    standin = None
+    try:
+        if args.url:
+            results = asyncio.run(run_bench(args, args.url))
+        else:
+            service_url = args.service
+            if not service_url:
+                standin = StandInProcess(spec_from_args(args)).start()
+                service_url = standin.url
+                print(f"📡 Stand-in OData v{args.odata_version} service at {service_url}")
+            command = (args.server_command or ["./odata-mcp"]) + ["--service", service_url]
+            results = asyncio.run(run_with_server(args, command))
+        upstream = standin.stats() if standin else None
+    finally:
+        if standin:
+            standin.stop()
+
+    print_report(results)
+    if upstream:
+        print_upstream_stats(upstream)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report_json(results), f, indent=2)
+        print(f"\n📝 Results written to {args.json}")
+
+    if any(stats.error_count or not stats.requests for stats in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
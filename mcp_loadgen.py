@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Load generator and throughput benchmark for odata-mcp
+
+Starts the stand-in OData service (odata_standin.py), points odata-mcp at it
+and drives N concurrent client sessions with a weighted mix of tools/call
+requests. Reports throughput, latency percentiles and error rate per tool
+type, plus how many upstream OData requests each MCP call cost.
+
+    python3 mcp_loadgen.py --sessions 8 --duration 30 --latency-ms 20 ./odata-mcp
+    python3 mcp_loadgen.py --transport streamable-http --sessions 32 ./odata-mcp
+    python3 mcp_loadgen.py --service https://host/sap/opu/odata/sap/ZSRV/ ./odata-mcp --user u --password p
+
+Over stdio every session is its own odata-mcp process; over streamable-http
+all sessions share one server process and each has its own keep-alive
+connections.
+"""
+import argparse
+import asyncio
+import json
+import random
+import shlex
+import sys
+import time
+from collections import Counter, defaultdict
+
+from mcp_client import MCPClientError, MCPStdioClient, MCPStreamableHTTPClient, free_port
+from odata_standin import StandInProcess, add_spec_arguments, print_upstream_stats, spec_from_args
+from view_trace import LatencyHistogram
+
+DEFAULT_MIX = "filter=4,get=3,count=2,search=1"
+
+# Operation part of generated tool names (see constants.ToolOperationNames),
+# including the --tool-shrink spellings
+TOOL_OPERATIONS = {
+    "filter": "filter", "count": "count", "search": "search", "get": "get",
+    "create": "create", "update": "update", "upd": "update",
+    "delete": "delete", "del": "delete",
+}
+
+
+def tool_type(name):
+    """Classify a generated tool name as filter/count/get/... or info/function"""
+    if name.startswith("odata_service_info"):
+        return "info"
+    segments = name.split("_")
+    if segments[0] in TOOL_OPERATIONS:
+        return TOOL_OPERATIONS[segments[0]]
+    # --no-postfix names are <prefix>_<EntitySet>_<op>
+    for segment in reversed(segments):
+        if segment in TOOL_OPERATIONS:
+            return TOOL_OPERATIONS[segment]
+    return "function"
+
+
+def parse_mix(text):
+    """Parse "filter=4,get=3" into {"filter": 4.0, "get": 3.0}"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def build_arguments(tool, kind, rows, top, rng):
+    """Arguments for one call: random keys for required properties, $top for reads"""
+    schema = tool.get("inputSchema") or {}
+    properties = schema.get("properties") or {}
+    arguments = {}
+    for prop in schema.get("required") or []:
+        prop_type = (properties.get(prop) or {}).get("type")
+        if prop == "search_term":
+            arguments[prop] = "Item"
+        elif prop_type == "integer":
+            arguments[prop] = rng.randint(1, rows)
+        elif prop_type == "number":
+            arguments[prop] = float(rng.randint(1, rows))
+        elif prop_type == "boolean":
+            arguments[prop] = True
+        else:
+            arguments[prop] = str(rng.randint(1, rows))
+    if kind in ("filter", "search"):
+        for name in ("$top", "top"):
+            if name in properties:
+                arguments[name] = top
+                break
+    return arguments
+
+
+def response_error(response):
+    """Error text of a tools/call response, or None on success"""
+    if 'error' in response:
+        return response['error'].get('message', 'unknown error')
+    result = response.get('result') or {}
+    if result.get('isError'):
+        content = result.get('content') or [{}]
+        return str(content[0].get('text', 'tool error'))[:200]
+    return None
+
+
+class LoadStats:
+    """Latency histograms, call and error counts per tool type"""
+
+    def __init__(self):
+        self.latency = defaultdict(LatencyHistogram)
+        self.calls = Counter()
+        self.errors = Counter()
+        self.error_messages = defaultdict(Counter)
+
+    def record(self, kind, elapsed_ns, error=None):
+        self.calls[kind] += 1
+        self.latency[kind].add(elapsed_ns)
+        if error is not None:
+            self.errors[kind] += 1
+            self.error_messages[kind][error] += 1
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    def total_latency(self):
+        total = LatencyHistogram()
+        for hist in self.latency.values():
+            total.merge(hist)
+        return total
+
+
+class Workload:
+    """Weighted choice of tool type, then a random tool of that type"""
+
+    def __init__(self, tools, mix, rows, top, seed):
+        self.rows = rows
+        self.top = top
+        self.rng = random.Random(seed)
+        self.by_type = defaultdict(list)
+        for tool in tools:
+            self.by_type[tool_type(tool['name'])].append(tool)
+        self.mix = {kind: weight for kind, weight in mix.items()
+                    if weight > 0 and self.by_type.get(kind)}
+        self.missing = sorted(kind for kind in mix if not self.by_type.get(kind))
+        self.kinds = list(self.mix)
+        self.weights = [self.mix[kind] for kind in self.kinds]
+
+    def next_call(self):
+        kind = self.rng.choices(self.kinds, self.weights)[0]
+        tool = self.rng.choice(self.by_type[kind])
+        return kind, tool['name'], build_arguments(tool, kind, self.rows, self.top, self.rng)
+
+
+async def worker(session, workload, stats, measure_from, deadline, timeout, think):
+    loop = asyncio.get_running_loop()
+    while loop.time() < deadline:
+        kind, name, arguments = workload.next_call()
+        started = time.perf_counter_ns()
+        try:
+            error = response_error(await session.call_tool(name, arguments, timeout=timeout))
+        except asyncio.TimeoutError:
+            error = "timeout"
+        except (MCPClientError, OSError) as e:
+            error = str(e)
+        elapsed = time.perf_counter_ns() - started
+        if loop.time() >= measure_from:
+            stats.record(kind, elapsed, error)
+        if error is not None and error.startswith("Server exited"):
+            return
+        if think:
+            await asyncio.sleep(think)
+
+
+async def open_stdio_sessions(command, count, timeout):
+    sessions = [MCPStdioClient(command, timeout=timeout) for _ in range(count)]
+    await asyncio.gather(*(s.start() for s in sessions))
+    await asyncio.gather(*(s.initialize("mcp-loadgen") for s in sessions))
+    return sessions, None
+
+
+async def start_http_server(command, timeout):
+    """Start odata-mcp on streamable-http at a free local port and wait for /health"""
+    host, port = free_port()
+    server = await asyncio.create_subprocess_exec(
+        *command, "--transport", "streamable-http", "--http-addr", f"{host}:{port}",
+        stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.DEVNULL)
+    url = f"http://{host}:{port}/mcp"
+    try:
+        await MCPStreamableHTTPClient(url).wait_until_ready(timeout)
+    except MCPClientError:
+        server.kill()
+        await server.wait()
+        raise
+    return server, url
+
+
+async def open_http_sessions(command, count, timeout, pipeline, headers=None):
+    server, url = await start_http_server(command, timeout)
+    sessions = [MCPStreamableHTTPClient(url, timeout=timeout, connections=pipeline, headers=headers)
+                for _ in range(count)]
+    await asyncio.gather(*(s.start() for s in sessions))
+    await asyncio.gather(*(s.initialize("mcp-loadgen") for s in sessions))
+    return sessions, server
+
+
+async def run_load(args, command, standin):
+    if args.transport == "stdio":
+        sessions, server = await open_stdio_sessions(command, args.sessions, args.timeout)
+    else:
+        sessions, server = await open_http_sessions(command, args.sessions, args.timeout,
+                                                    args.pipeline)
+    try:
+        tools = await sessions[0].list_tools()
+        workload = Workload(tools, parse_mix(args.mix), args.rows, args.top, args.seed)
+        if not workload.kinds:
+            raise SystemExit(f"❌ None of the tool types in --mix {args.mix} were generated "
+                             f"({len(tools)} tools)")
+        for kind in workload.missing:
+            print(f"⚠️  No {kind} tools generated, dropping it from the mix")
+
+        print(f"🚀 {args.sessions} {args.transport} sessions x {args.pipeline} in flight, "
+              f"{args.duration:g}s (+{args.warmup:g}s warm-up), {len(tools)} tools")
+        stats = LoadStats()
+        loop = asyncio.get_running_loop()
+        measure_from = loop.time() + args.warmup
+        deadline = measure_from + args.duration
+        if standin:
+            loop.call_at(measure_from, lambda: loop.run_in_executor(None, standin.reset))
+        tasks = [worker(session, workload, stats, measure_from, deadline, args.timeout,
+                        args.think_ms / 1000.0)
+                 for session in sessions for _ in range(args.pipeline)]
+        started = time.perf_counter()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started - args.warmup
+        return stats, max(elapsed, 1e-9), workload
+    finally:
+        await asyncio.gather(*(s.close() for s in sessions), return_exceptions=True)
+        if server is not None:
+            server.terminate()
+            await server.wait()
+
+
+def _ms(ns):
+    return f"{ns / 1e6:.1f}"
+
+
+def print_report(stats, elapsed):
+    print("\n=== Load Test Results ===")
+    kinds = sorted(stats.calls, key=lambda kind: -stats.calls[kind])
+    rows = [(kind, stats.calls[kind], stats.errors[kind], stats.latency[kind]) for kind in kinds]
+    rows.append(("TOTAL", stats.total_calls, sum(stats.errors.values()), stats.total_latency()))
+    print(f"  {'tool type':<10} {'calls':>8} {'errors':>7} {'err%':>6} {'req/s':>9} "
+          f"{'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}  (ms)")
+    for kind, calls, errors, hist in rows:
+        if not calls:
+            continue
+        print(f"  {kind:<10} {calls:>8} {errors:>7} {errors / calls * 100:>5.1f}% "
+              f"{calls / elapsed:>9.1f} {_ms(hist.percentile(50)):>8} {_ms(hist.percentile(90)):>8} "
+              f"{_ms(hist.percentile(99)):>8} {_ms(hist.max):>8}")
+
+    for kind, messages in sorted(stats.error_messages.items()):
+        for message, count in messages.most_common(3):
+            print(f"  ❌ {kind}: {count} x {message}")
+
+
+def report_json(args, stats, elapsed, upstream):
+    def summary(calls, errors, hist):
+        return {
+            "calls": calls, "errors": errors,
+            "error_rate": errors / calls if calls else 0.0,
+            "throughput": calls / elapsed,
+            "latency_ms": None if not calls else {
+                "mean": hist.mean / 1e6,
+                "p50": hist.percentile(50) / 1e6,
+                "p90": hist.percentile(90) / 1e6,
+                "p99": hist.percentile(99) / 1e6,
+                "max": hist.max / 1e6,
+            },
+        }
+
+    return {
+        "transport": args.transport,
+        "sessions": args.sessions,
+        "pipeline": args.pipeline,
+        "duration": elapsed,
+        "mix": args.mix,
+        "tool_types": {kind: summary(stats.calls[kind], stats.errors[kind], stats.latency[kind])
+                       for kind in stats.calls},
+        "total": summary(stats.total_calls, sum(stats.errors.values()), stats.total_latency()),
+        "upstream": upstream,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput benchmark for odata-mcp")
+    parser.add_argument("--transport", choices=("stdio", "streamable-http"), default="stdio",
+                        help="MCP transport to drive (default: stdio)")
+    parser.add_argument("--sessions", "-c", type=int, default=4,
+                        help="concurrent client sessions (default: 4)")
+    parser.add_argument("--pipeline", type=int, default=1, metavar="N",
+                        help="requests in flight per session (default: 1)")
+    parser.add_argument("--duration", "-d", type=float, default=10.0,
+                        help="measured seconds (default: 10)")
+    parser.add_argument("--warmup", type=float, default=1.0,
+                        help="seconds of load before measuring starts (default: 1)")
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help=f"weighted tool types (default: {DEFAULT_MIX})")
+    parser.add_argument("--top", type=int, default=10, help="$top for filter/search calls (default: 10)")
+    parser.add_argument("--think-ms", type=float, default=0.0,
+                        help="pause between calls of one worker (default: 0)")
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="seconds to wait for each response (default: 30)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the call mix")
+    parser.add_argument("--service", help="benchmark a real OData service instead of the stand-in")
+    parser.add_argument("--json", metavar="FILE", help="also write the results as JSON")
+    add_spec_arguments(parser)
+    parser.add_argument("server_command", nargs=argparse.REMAINDER,
+                        help="odata-mcp binary and extra arguments (default: ./odata-mcp)")
+    args = parser.parse_args()
+
+    command = args.server_command or ["./odata-mcp"]
+    standin = None
+    if args.service:
+        service_url = args.service
+    else:
+        standin = StandInProcess(spec_from_args(args)).start()
+        service_url = standin.url
+        print(f"📡 Stand-in OData v{args.odata_version} service at {service_url}")
+    command = command + ["--service", service_url]
+    print(f"Server command: {shlex.join(command)}")
+
+    try:
+        stats, elapsed, _ = asyncio.run(run_load(args, command, standin))
+        upstream = standin.stats() if standin else None
+    finally:
+        if standin:
+            standin.stop()
+
+    print_report(stats, elapsed)
+    if upstream:
+        print_upstream_stats(upstream, stats.total_calls)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report_json(args, stats, elapsed, upstream), f, indent=2)
+        print(f"\n📝 Results written to {args.json}")
+
+    total_errors = sum(stats.errors.values())
+    if not stats.total_calls or total_errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Response payload profiler for odata-mcp generated tools
+
+Runs a sample of filter, search and get calls for every entity set through
+one persistent MCP session and reports, per tool:
+
+  - payload bytes (the tool result text) and item counts
+  - how often applySizeLimits truncated the result (--max-items or
+    --max-response-size) as flagged in "@odata.metadata"
+  - bytes per field across all returned items, envelope included
+  - __metadata overhead: a second session with --response-metadata runs the
+    same calls and the byte difference is reported
+  - estimated tokens (tiktoken's cl100k_base when installed, else bytes / 4)
+
+    python3 mcp_payload_profile.py --rows 500 --properties 20 ./odata-mcp
+    python3 mcp_payload_profile.py --service https://host/sap/opu/odata/sap/ZSRV/ ./odata-mcp --user u --password p
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+from collections import Counter, defaultdict
+
+from mcp_client import MCPClientError, MCPStdioClient
+from mcp_loadgen import TOOL_OPERATIONS, response_error, tool_type
+from odata_standin import StandInProcess, add_spec_arguments, spec_from_args
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+PROFILED_TYPES = ("filter", "search", "get")
+COMPACT = (",", ":")
+
+
+def estimate_tokens(text):
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return (len(text.encode()) + 3) // 4
+
+
+def entity_set_of(name):
+    """Entity set part of a generated entity tool name"""
+    if "_for_" in name:
+        name = name[:name.rindex("_for_")]
+    op, _, rest = name.partition("_")
+    if op in TOOL_OPERATIONS:
+        return rest
+    return name.rsplit("_", 1)[0]
+
+
+def result_text(response):
+    result = response.get('result') or {}
+    content = result.get('content') or [{}]
+    return content[0].get('text', '')
+
+
+def result_items(doc):
+    """Entities in a tool result: the value array or the single entity"""
+    if not isinstance(doc, dict):
+        return []
+    value = doc.get('value', doc.get('results', doc))
+    if isinstance(value, list):
+        return [item for item in value if isinstance(item, dict)]
+    if isinstance(value, dict):
+        return [value]
+    return []
+
+
+def field_bytes(item):
+    """Serialized size of each "key":value member of an entity"""
+    sizes = {}
+    for key, value in item.items():
+        encoded = json.dumps(value, separators=COMPACT, ensure_ascii=False).encode()
+        sizes[key] = len(json.dumps(key)) + 1 + len(encoded) + 1
+    return sizes
+
+
+class ToolProfile:
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+        self.calls = 0
+        self.errors = Counter()
+        self.payload = []
+        self.items = []
+        self.tokens = []
+        self.truncated = Counter()
+        self.fields = Counter()
+        # Payload size by plan index, for comparing the same call across sessions
+        self.payload_by_call = {}
+        self.metadata_payload = {}
+
+    def add(self, text, index=None):
+        self.calls += 1
+        size = len(text.encode())
+        self.payload.append(size)
+        if index is not None:
+            self.payload_by_call[index] = size
+        self.tokens.append(estimate_tokens(text))
+        try:
+            doc = json.loads(text)
+        except ValueError:
+            self.items.append(0)
+            return
+        items = result_items(doc)
+        self.items.append(len(items))
+        for item in items:
+            self.fields.update(field_bytes(item))
+        meta = doc.get('@odata.metadata') if isinstance(doc, dict) else None
+        if isinstance(meta, dict) and meta.get('truncated'):
+            reason = "max_response_size" if 'max_response_size' in meta else "max_items"
+            self.truncated[reason] += 1
+
+    def add_error(self, message):
+        self.calls += 1
+        self.errors[message] += 1
+
+    @property
+    def ok_calls(self):
+        return len(self.payload)
+
+    @property
+    def envelope(self):
+        return max(sum(self.payload) - sum(self.fields.values()), 0)
+
+    @property
+    def metadata_overhead(self):
+        """Average extra bytes per call with --response-metadata, or None
+
+        Only calls that succeeded in both sessions are compared.
+        """
+        both = self.payload_by_call.keys() & self.metadata_payload.keys()
+        if not both:
+            return None
+        return statistics.mean(self.metadata_payload[i] - self.payload_by_call[i] for i in both)
+
+    def to_json(self):
+        return {
+            "tool": self.name, "type": self.kind, "calls": self.calls,
+            "errors": sum(self.errors.values()),
+            "payload_bytes": {"mean": statistics.mean(self.payload) if self.payload else 0,
+                              "max": max(self.payload, default=0),
+                              "total": sum(self.payload)},
+            "items": {"mean": statistics.mean(self.items) if self.items else 0,
+                      "max": max(self.items, default=0)},
+            "tokens": {"mean": statistics.mean(self.tokens) if self.tokens else 0,
+                       "max": max(self.tokens, default=0)},
+            "truncated": dict(self.truncated),
+            "field_bytes": dict(self.fields.most_common()),
+            "envelope_bytes": self.envelope,
+            "metadata_overhead_bytes": self.metadata_overhead,
+        }
+
+
+def plan_calls(tools, tops, search_term):
+    """(tool, arguments) for filter and search calls; get calls are planned from results"""
+    plan = []
+    for tool in tools:
+        kind = tool_type(tool['name'])
+        properties = (tool.get('inputSchema') or {}).get('properties') or {}
+        top_name = "$top" if "$top" in properties else "top" if "top" in properties else None
+        for top in tops:
+            arguments = {}
+            if top is not None and top_name:
+                arguments[top_name] = top
+            if kind == "search":
+                arguments["search_term"] = search_term
+            if kind in ("filter", "search"):
+                plan.append((tool, arguments))
+    return plan
+
+
+def plan_get_calls(get_tools, samples_by_set, samples):
+    """Key arguments for get tools, taken from items the filter calls returned"""
+    plan = []
+    for tool in get_tools:
+        schema = tool.get('inputSchema') or {}
+        keys = schema.get('required') or []
+        items = samples_by_set.get(entity_set_of(tool['name']), [])
+        seen = set()
+        for item in items:
+            if not keys or any(key not in item for key in keys):
+                continue
+            arguments = {key: item[key] for key in keys}
+            marker = json.dumps(arguments, sort_keys=True)
+            if marker in seen:
+                continue
+            seen.add(marker)
+            plan.append((tool, arguments))
+            if len(seen) >= samples:
+                break
+    return plan
+
+
+async def run_plan(client, plan, timeout):
+    """Call every (tool, arguments) in order, returning (tool, arguments, text, error) tuples"""
+    results = []
+    for tool, arguments in plan:
+        try:
+            response = await client.call_tool(tool['name'], arguments, timeout=timeout)
+        except (asyncio.TimeoutError, MCPClientError) as e:
+            results.append((tool, arguments, None, str(e) or "timeout"))
+            continue
+        error = response_error(response)
+        results.append((tool, arguments, None if error else result_text(response), error))
+    return results
+
+
+async def profile_session(command, tops, search_term, samples, timeout):
+    async with MCPStdioClient(command, timeout=timeout) as client:
+        await client.initialize("mcp-payload-profile")
+        tools = [t for t in await client.list_tools() if tool_type(t['name']) in PROFILED_TYPES]
+        read_tools = [t for t in tools if tool_type(t['name']) != "get"]
+        plan = plan_calls(read_tools, tops, search_term)
+        results = await run_plan(client, plan, timeout)
+
+        samples_by_set = defaultdict(list)
+        for tool, _, text, _ in results:
+            if text and tool_type(tool['name']) == "filter":
+                try:
+                    samples_by_set[entity_set_of(tool['name'])].extend(result_items(json.loads(text)))
+                except ValueError:
+                    pass
+        get_tools = [t for t in tools if tool_type(t['name']) == "get"]
+        get_plan = plan_get_calls(get_tools, samples_by_set, samples)
+        results += await run_plan(client, get_plan, timeout)
+        return results, plan + get_plan
+
+
+async def profile(args, command):
+    results, plan = await profile_session(command, args.tops, args.search_term,
+                                          args.samples, args.timeout)
+    profiles = {}
+    for index, (tool, _, text, error) in enumerate(results):
+        profile = profiles.setdefault(tool['name'], ToolProfile(tool['name'], tool_type(tool['name'])))
+        if error is not None:
+            profile.add_error(error)
+        else:
+            profile.add(text, index)
+
+    if args.compare_metadata:
+        async with MCPStdioClient(command + ["--response-metadata"], timeout=args.timeout) as client:
+            await client.initialize("mcp-payload-profile")
+            for index, (tool, _, text, error) in enumerate(await run_plan(client, plan, args.timeout)):
+                if text is not None and error is None:
+                    profiles[tool['name']].metadata_payload[index] = len(text.encode())
+    return list(profiles.values())
+
+
+def _kib(value):
+    return f"{value / 1024:.1f}"
+
+
+def print_report(profiles, top_fields):
+    print(f"\n=== Payload Profile ({len(profiles)} tools) ===")
+    width = max((len(p.name) for p in profiles), default=4)
+    print(f"  {'tool':<{width}} {'calls':>5} {'err':>4} {'avg KiB':>8} {'max KiB':>8} "
+          f"{'items':>6} {'trunc':>5} {'~tokens':>8} {'__metadata':>11}")
+    profiles = sorted(profiles, key=lambda p: -max(p.payload, default=0))
+    for p in profiles:
+        overhead = p.metadata_overhead
+        meta = "-" if overhead is None else f"+{_kib(overhead)} KiB"
+        print(f"  {p.name:<{width}} {p.calls:>5} {sum(p.errors.values()):>4} "
+              f"{_kib(statistics.mean(p.payload) if p.payload else 0):>8} {_kib(max(p.payload, default=0)):>8} "
+              f"{statistics.mean(p.items) if p.items else 0:>6.1f} {sum(p.truncated.values()):>5} "
+              f"{statistics.mean(p.tokens) if p.tokens else 0:>8.0f} {meta:>11}")
+
+    print(f"\n📦 Largest fields (top {top_fields} per tool, share of payload bytes):")
+    for p in profiles:
+        total = sum(p.payload)
+        if not total or not p.fields:
+            continue
+        parts = [f"{field} {size / total * 100:.0f}%" for field, size in p.fields.most_common(top_fields)]
+        parts.append(f"envelope {p.envelope / total * 100:.0f}%")
+        print(f"  {p.name}: " + ", ".join(parts))
+
+    truncating = [p for p in profiles if p.truncated]
+    if truncating:
+        print("\n✂️  Truncated responses:")
+        for p in truncating:
+            reasons = ", ".join(f"{reason} x{count}" for reason, count in p.truncated.items())
+            print(f"  {p.name}: {sum(p.truncated.values())}/{p.ok_calls} calls ({reasons})")
+
+    errors = [p for p in profiles if p.errors]
+    if errors:
+        print("\n❌ Errors:")
+        for p in errors:
+            for message, count in p.errors.most_common(2):
+                print(f"  {p.name}: {count} x {message[:120]}")
+
+    all_payload = [size for p in profiles for size in p.payload]
+    if all_payload:
+        tokens = [t for p in profiles for t in p.tokens]
+        print(f"\n📊 {len(all_payload)} responses, {_kib(sum(all_payload))} KiB total, "
+              f"median {_kib(statistics.median(all_payload))} KiB, "
+              f"max {_kib(max(all_payload))} KiB, ~{sum(tokens)} tokens "
+              f"({'cl100k_base' if _ENCODING else 'bytes/4 estimate'})")
+
+
+def parse_tops(text):
+    tops = []
+    for part in text.split(","):
+        part = part.strip().lower()
+        tops.append(None if part in ("none", "") else int(part))
+    return tops
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile response payloads of odata-mcp tools")
+    parser.add_argument("--tops", default="none,10,100",
+                        help="$top values for filter/search calls, 'none' omits $top (default: none,10,100)")
+    parser.add_argument("--samples", type=int, default=3,
+                        help="get calls per entity set, keys taken from filter results (default: 3)")
+    parser.add_argument("--search-term", default="a", help="search_term for search tools (default: a)")
+    parser.add_argument("--no-metadata-compare", dest="compare_metadata", action="store_false",
+                        help="skip the second session with --response-metadata")
+    parser.add_argument("--top-fields", type=int, default=5,
+                        help="largest fields to list per tool (default: 5)")
+    parser.add_argument("--timeout", type=float, default=60.0,
+                        help="seconds to wait for each response (default: 60)")
+    parser.add_argument("--service", help="profile a real OData service instead of the stand-in")
+    parser.add_argument("--json", metavar="FILE", help="also write the profile as JSON")
+    add_spec_arguments(parser)
+    parser.add_argument("server_command", nargs=argparse.REMAINDER,
+                        help="odata-mcp binary and extra arguments (default: ./odata-mcp)")
+    args = parser.parse_args()
+    args.tops = parse_tops(args.tops)
+
+    standin = None
+    try:
+        service_url = args.service
+        if not service_url:
+            standin = StandInProcess(spec_from_args(args)).start()
+            service_url = standin.url
+            print(f"📡 Stand-in OData v{args.odata_version} service at {service_url}")
+        command = (args.server_command or ["./odata-mcp"]) + ["--service", service_url]
+        profiles = asyncio.run(profile(args, command))
+    finally:
+        if standin:
+            standin.stop()
+
+    if not profiles:
+        print("❌ No filter, search or get tools to profile")
+        sys.exit(1)
+    print_report(profiles, args.top_fields)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"tools": [p.to_json() for p in profiles]}, f, indent=2)
+        print(f"\n📝 Profile written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
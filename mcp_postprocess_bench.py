@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+End-to-end cost of odata-mcp response post-processing
+
+Every entity set read passes through applySizeLimits (which marshals the
+whole result once to check --max-response-size), convertLegacyDates
+(utils.ConvertDatesInResponse) and stripMetadata, and each pass copies the
+data. This benchmark has the stand-in OData service (odata_standin.py)
+return large result sets with many /Date(...)/ columns, decimal strings
+and nested inline entities that each carry their own __metadata. It then
+times the same filter call on fresh servers for every combination of
+
+  - --legacy-dates / --no-legacy-dates
+  - --response-metadata on or off (off means stripMetadata runs)
+  - each --max-items value
+
+    python3 mcp_postprocess_bench.py ./odata-mcp
+    python3 mcp_postprocess_bench.py --rows 10000 --max-items 100,10000 --calls 20 ./odata-mcp
+    python3 mcp_postprocess_bench.py --date-properties 30 --inline-depth 3 --json post.json ./odata-mcp
+
+For each run it reports the median MCP latency and the upstream time the
+stand-in spent on the read. The server column is the difference, that is
+the time odata-mcp spent decoding, transforming and encoding. The added
+column compares each run with the run that skips both passes (legacy dates
+off, metadata kept) at the same --max-items. The RSS columns are the
+server's resident set after the calls and its peak (VmHWM, Linux only).
+A configuration whose server exits or stops answering within --timeout is
+reported as failed, and the rest of the matrix still runs.
+
+The stand-in always returns every requested row. --max-items only trims
+the result inside odata-mcp, after the full payload has been fetched and
+decoded. utils.ConvertNumericsInMap only runs on create and update
+payloads, so decimal strings in reads reach the client unchanged.
+"""
+import argparse
+import asyncio
+import json
+import random
+import shlex
+import statistics
+import sys
+import time
+
+from mcp_client import MCPClientError, MCPStdioClient
+from mcp_loadgen import build_arguments, response_error, tool_type
+from mcp_payload_profile import entity_set_of, result_items, result_text
+from mcp_soak import sample_process
+from mcp_startup_bench import peak_rss_kb
+from odata_standin import StandInProcess, add_spec_arguments, spec_from_args
+
+DEFAULT_MAX_ITEMS = "100,1000,5000"
+
+
+def server_flags(legacy_dates, keep_metadata, max_items, max_response_size):
+    flags = ["--legacy-dates"] if legacy_dates else ["--no-legacy-dates"]
+    if keep_metadata:
+        flags.append("--response-metadata")
+    return flags + ["--max-items", str(max_items), "--max-response-size", str(max_response_size)]
+
+
+async def find_filter_tool(command, entity_set, timeout):
+    async with MCPStdioClient(command, timeout=timeout) as client:
+        await client.initialize("mcp-postprocess-bench")
+        tools = await client.list_tools()
+    for tool in tools:
+        if tool_type(tool['name']) == "filter" and entity_set_of(tool['name']) == entity_set:
+            return tool
+    raise SystemExit(f"❌ No filter tool for {entity_set} among {len(tools)} tools")
+
+
+async def measure_config(command, tool, arguments, args, standin):
+    """Time one server configuration; returns a result row"""
+    async with MCPStdioClient(command, timeout=args.timeout) as client:
+        await client.initialize("mcp-postprocess-bench")
+        for _ in range(args.warmup):
+            await client.call_tool(tool['name'], arguments)
+        standin.reset()
+        latencies = []
+        errors = 0
+        response = None
+        for _ in range(args.calls):
+            started = time.perf_counter()
+            response = await client.call_tool(tool['name'], arguments)
+            latencies.append(time.perf_counter() - started)
+            errors += response_error(response) is not None
+        upstream = standin.stats()
+        sample = sample_process(client.proc.pid) or {}
+        peak = peak_rss_kb(client.proc.pid)
+
+    text = result_text(response)
+    try:
+        items = len(result_items(json.loads(text)))
+    except ValueError:
+        items = 0
+    reads = upstream["counts"]["entity_set"] + upstream["counts"]["entity"]
+    upstream_s = upstream["seconds"]["entity_set"] + upstream["seconds"]["entity"]
+    median_s = statistics.median(latencies)
+    return {
+        "median_ms": median_s * 1000,
+        "max_ms": max(latencies) * 1000,
+        "upstream_ms": upstream_s / reads * 1000 if reads else 0.0,
+        "upstream_bytes": upstream["bytes_out"] / reads if reads else 0,
+        "server_ms": (median_s - (upstream_s / reads if reads else 0.0)) * 1000,
+        "items": items,
+        "payload_bytes": len(text.encode()),
+        "errors": errors,
+        "rss_kb": sample.get("rss_kb"),
+        "peak_rss_kb": peak,
+    }
+
+
+async def run_bench(args, spec, base_command, standin):
+    entity_set = spec.entity_set(1)
+    tool = await find_filter_tool(base_command, entity_set, args.timeout)
+    top = args.top or spec.rows
+    arguments = build_arguments(tool, "filter", spec.rows, top, random.Random(1))
+    print(f"🚀 {tool['name']} {json.dumps(arguments)}: {args.calls} calls per run "
+          f"after {args.warmup} warm-up")
+
+    results = []
+    for max_items in args.max_items:
+        for legacy_dates in (False, True):
+            for keep_metadata in (True, False):
+                flags = server_flags(legacy_dates, keep_metadata, max_items, args.max_response_size)
+                try:
+                    row = await measure_config(base_command + flags, tool, arguments, args, standin)
+                except (MCPClientError, OSError, asyncio.TimeoutError) as e:
+                    # Keep the rest of the matrix; the run shows up as failed
+                    row = {"failed": repr(e), "errors": args.calls}
+                row.update(legacy_dates=legacy_dates, metadata=keep_metadata, max_items=max_items,
+                           flags=flags)
+                results.append(row)
+                if "failed" in row:
+                    print(f"❌ {' '.join(flags[:-2]):<48} {row['failed']}")
+                else:
+                    print(f"⏱️  {' '.join(flags[:-2]):<48} {row['median_ms']:8.1f} ms  "
+                          f"{row['items']:>6} items")
+    return tool, top, results
+
+
+def _mib(kb):
+    return "-" if kb is None else f"{kb / 1024:.1f}"
+
+
+def _added(value):
+    return f"{'-':>7}" if value is None else f"{value:+7.1f}"
+
+
+def print_report(results, tool, top):
+    print(f"\n=== Post-processing Cost ({tool['name']}, $top={top}) ===")
+    print(f"  {'dates':<6} {'metadata':<9} {'max-items':>9} {'items':>6} {'KiB':>8} {'median ms':>10} "
+          f"{'max ms':>8} {'upstream':>9} {'server':>8} {'added':>8} {'RSS MiB':>8} {'peak MiB':>9}")
+    baselines = {r["max_items"]: r for r in results
+                 if not r["legacy_dates"] and r["metadata"] and "failed" not in r}
+    for r in results:
+        if "failed" in r:
+            print(f"  {'legacy' if r['legacy_dates'] else 'off':<6} {'kept' if r['metadata'] else 'stripped':<9} "
+                  f"{r['max_items']:>9}  failed: {r['failed']}")
+            continue
+        base = baselines.get(r["max_items"])
+        r["added_ms"] = r["server_ms"] - base["server_ms"] if base else None
+        added = "base" if r is base else "-" if base is None else f"{r['added_ms']:+.1f}"
+        print(f"  {'legacy' if r['legacy_dates'] else 'off':<6} {'kept' if r['metadata'] else 'stripped':<9} "
+              f"{r['max_items']:>9} {r['items']:>6} {r['payload_bytes'] / 1024:>8.1f} "
+              f"{r['median_ms']:>10.1f} {r['max_ms']:>8.1f} {r['upstream_ms']:>9.1f} "
+              f"{r['server_ms']:>8.1f} {added:>8} {_mib(r['rss_kb']):>8} {_mib(r['peak_rss_kb']):>9}")
+
+    print("\n=== Added Server Time per Pass ===")
+    for max_items in baselines:
+        by_key = {(r["legacy_dates"], r["metadata"]): r.get("added_ms")
+                  for r in results if r["max_items"] == max_items}
+        print(f"  max-items {max_items:>6}:  legacy dates {_added(by_key[(True, True)])} ms   "
+              f"strip metadata {_added(by_key[(False, False)])} ms   "
+              f"both {_added(by_key[(True, False)])} ms")
+
+    errors = sum(r["errors"] for r in results)
+    failed = sum("failed" in r for r in results)
+    if failed:
+        print(f"\n❌ {failed} of {len(results)} runs failed and were not measured")
+    if errors:
+        print(f"\n⚠️  {errors} calls returned errors or were not made; their timings are not comparable")
+    return errors
+
+
+def parse_max_items(text):
+    try:
+        return sorted({int(value) for value in text.split(",") if value.strip()})
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid --max-items list: {text!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end cost of odata-mcp response post-processing")
+    parser.add_argument("--max-items", type=parse_max_items, default=parse_max_items(DEFAULT_MAX_ITEMS),
+                        help=f"comma-separated --max-items values (default: {DEFAULT_MAX_ITEMS})")
+    parser.add_argument("--max-response-size", type=int, default=1 << 30,
+                        help="--max-response-size for every run; large so that only --max-items "
+                             "truncates (default: 1 GiB)")
+    parser.add_argument("--top", type=int, default=0,
+                        help="$top of the filter call (default: --rows)")
+    parser.add_argument("--calls", type=int, default=10, help="measured calls per run (default: 10)")
+    parser.add_argument("--warmup", type=int, default=2, help="unmeasured calls per run (default: 2)")
+    parser.add_argument("--timeout", type=float, default=120.0,
+                        help="seconds to wait for each response (default: 120)")
+    parser.add_argument("--json", metavar="FILE", help="also write the results as JSON")
+    add_spec_arguments(parser)
+    parser.set_defaults(entity_sets=1, rows=5000, date_properties=10, decimal_properties=10,
+                        inline_depth=2, payload_bytes=32, read_only=True)
+    parser.add_argument("server_command", nargs=argparse.REMAINDER,
+                        help="odata-mcp binary and extra arguments (default: ./odata-mcp)")
+    args = parser.parse_args()
+    if args.calls < 1:
+        parser.error("--calls must be at least 1")
+
+    spec = spec_from_args(args)
+    standin = StandInProcess(spec).start()
+    print(f"📡 Stand-in OData v{args.odata_version} service at {standin.url}: {spec.rows} rows, "
+          f"{spec.date_properties + 1} date and {spec.decimal_properties + 1} decimal columns, "
+          f"{spec.inline_depth} inline levels")
+    command = (args.server_command or ["./odata-mcp"]) + ["--service", standin.url]
+    print(f"Server command: {shlex.join(command)}")
+    try:
+        tool, top, results = asyncio.run(run_bench(args, spec, command, standin))
+    finally:
+        standin.stop()
+
+    errors = print_report(results, tool, top)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"tool": tool['name'], "top": top, "spec": spec.to_args(), "results": results},
+                      f, indent=2)
+        print(f"\n📝 Results written to {args.json}")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
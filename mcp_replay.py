@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Trace replay for reproducible odata-mcp load tests
+
+Streams a --trace-mcp log, re-sends every recorded inbound message
+(TRANSPORT_IN data.raw) to a fresh odata-mcp and compares each response
+with the recorded TRANSPORT_RAW_OUT. Latency is TRANSPORT_IN to
+TRANSPORT_OUT in the recording and send to receive in the replay.
+
+    python3 mcp_replay.py trace.log -- ./odata-mcp --service https://...
+    python3 mcp_replay.py trace.log --speed 10 -- ./odata-mcp ...
+    python3 mcp_replay.py trace.log --fast --concurrency 8 -- ./odata-mcp ...
+
+By default requests are sent at their original offsets from the first
+request. --speed scales that timeline, and --fast ignores it and keeps up
+to --concurrency requests in flight. The stdio server answers one message
+at a time, so replay latency under --fast includes queueing. A request
+whose id is still in flight from an earlier request waits for that
+response before it is sent, and its latency starts when it is sent.
+
+Tool results often carry data that changes between runs. --ignore-key
+drops a key at any depth before comparing, and JSON inside tool result text
+is compared structurally.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import Counter, defaultdict, deque
+
+from mcp_client import MCPClientError, MCPStdioClient, message_key
+from view_trace import (LatencyHistogram, decode_raw, iter_entries, iter_lines,
+                        latest_trace_file, parse_timestamp_ns, tool_name)
+
+REPLAY_LEVELS = ('TRANSPORT_IN', 'TRANSPORT_OUT', 'TRANSPORT_RAW_OUT')
+
+
+class ReplayCall:
+    """One recorded request, its recorded response and its replayed response"""
+
+    __slots__ = ('line_no', 'label', 'message', 'recorded_ts', 'recorded_latency',
+                 'recorded', 'replay_latency', 'replayed', 'replay_error', 'replay_done')
+
+    def __init__(self, line_no, label, message, recorded_ts):
+        self.line_no = line_no
+        self.label = label
+        self.message = message
+        self.recorded_ts = recorded_ts
+        self.recorded_latency = None
+        self.recorded = None
+        self.replay_latency = None
+        self.replayed = None
+        self.replay_error = None
+        self.replay_done = False
+
+
+def normalize(value, ignore):
+    """Drop ignored keys and decode JSON embedded in strings for comparison"""
+    if isinstance(value, dict):
+        return {k: normalize(v, ignore) for k, v in value.items() if k not in ignore}
+    if isinstance(value, list):
+        return [normalize(v, ignore) for v in value]
+    if isinstance(value, str) and value[:1] in ('{', '['):
+        try:
+            return normalize(json.loads(value), ignore)
+        except ValueError:
+            pass
+    return value
+
+
+def first_difference(a, b, path="$"):
+    """JSON path of the first difference between two normalized values, or None"""
+    if isinstance(a, dict) and isinstance(b, dict):
+        for key in sorted(set(a) | set(b), key=str):
+            if key not in a or key not in b:
+                return f"{path}.{key}"
+            diff = first_difference(a[key], b[key], f"{path}.{key}")
+            if diff:
+                return diff
+        return None
+    if isinstance(a, list) and isinstance(b, list):
+        if len(a) != len(b):
+            return f"{path} (length {len(a)} vs {len(b)})"
+        for i, (x, y) in enumerate(zip(a, b)):
+            diff = first_difference(x, y, f"{path}[{i}]")
+            if diff:
+                return diff
+        return None
+    return None if a == b else path
+
+
+class ReplayReport:
+    """Comparison results and recorded vs replayed latency per method/tool"""
+
+    def __init__(self, ignore_keys, max_examples=10):
+        self.ignore = set(ignore_keys)
+        self.max_examples = max_examples
+        self.outcomes = Counter()
+        self.differences = Counter()
+        self.examples = []
+        self.recorded_latency = defaultdict(LatencyHistogram)
+        self.replay_latency = defaultdict(LatencyHistogram)
+        self.notifications = 0
+        self.skipped = 0
+
+    def finish(self, call):
+        """Record the outcome of a call once both sides are known"""
+        if call.recorded_latency is not None:
+            self.recorded_latency[call.label].add(call.recorded_latency)
+        if call.replay_latency is not None and call.replay_error is None:
+            self.replay_latency[call.label].add(call.replay_latency)
+
+        if call.replay_error is not None:
+            outcome, detail = "replay error", call.replay_error
+        elif call.recorded is None:
+            outcome, detail = "not recorded", None
+        else:
+            recorded = normalize({k: v for k, v in call.recorded.items() if k != 'id'}, self.ignore)
+            replayed = normalize({k: v for k, v in call.replayed.items() if k != 'id'}, self.ignore)
+            detail = first_difference(recorded, replayed)
+            outcome = "identical" if detail is None else "different"
+        self.outcomes[outcome] += 1
+        if outcome != "identical":
+            self.differences[call.label] += 1
+            if len(self.examples) < self.max_examples:
+                self.examples.append((call.line_no, call.label, outcome, detail, call))
+
+    @property
+    def failed(self):
+        return sum(count for outcome, count in self.outcomes.items() if outcome != "identical")
+
+
+class TraceReplayer:
+    def __init__(self, client, report, speed=1.0, fast=False, concurrency=1, timeout=30.0):
+        self.client = client
+        self.report = report
+        self.speed = speed
+        self.fast = fast
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.awaiting_recording = defaultdict(deque)
+        self.awaiting_raw = defaultdict(deque)
+        self.tasks = set()
+        self.slots = None
+        # Traces reuse ids; a request waits here until the earlier one with
+        # the same id has been answered. Values are [lock, users].
+        self.id_locks = {}
+
+    async def _send(self, call):
+        started = time.perf_counter_ns()
+        call.replayed = await self.client.send(call.message, self.timeout)
+        call.replay_latency = time.perf_counter_ns() - started
+
+    async def _replay(self, call):
+        msg_id = call.message['id']
+        key = None if msg_id is None else message_key(msg_id)
+        try:
+            if key is None:
+                await self._send(call)
+            else:
+                entry = self.id_locks.setdefault(key, [asyncio.Lock(), 0])
+                entry[1] += 1
+                try:
+                    async with entry[0]:
+                        await self._send(call)
+                finally:
+                    entry[1] -= 1
+                    if not entry[1]:
+                        del self.id_locks[key]
+        except asyncio.TimeoutError:
+            call.replay_error = "timeout"
+        except MCPClientError as e:
+            call.replay_error = str(e)
+        finally:
+            call.replay_done = True
+            if self.slots:
+                self.slots.release()
+        if call.recorded is not None or call.replay_error is not None:
+            self.report.finish(call)
+
+    def _on_response(self, level, entry):
+        """Match TRANSPORT_OUT / TRANSPORT_RAW_OUT entries to their requests"""
+        if level == 'TRANSPORT_OUT':
+            data = entry.get('data') or {}
+            key = message_key(data.get('id') if isinstance(data, dict) else None)
+            if self.awaiting_recording.get(key):
+                call = self.awaiting_recording[key].popleft()
+                ts = parse_timestamp_ns(entry.get('timestamp'))
+                if ts is not None and call.recorded_ts is not None:
+                    call.recorded_latency = ts - call.recorded_ts
+                self.awaiting_raw[key].append(call)
+        else:
+            msg = decode_raw(entry)
+            if msg is None:
+                return
+            key = message_key(msg.get('id'))
+            if self.awaiting_raw.get(key):
+                call = self.awaiting_raw[key].popleft()
+                call.recorded = msg
+                if call.replay_done and call.replay_error is None:
+                    self.report.finish(call)
+
+    async def run(self, trace_file):
+        loop = asyncio.get_running_loop()
+        self.slots = asyncio.Semaphore(self.concurrency) if self.fast else None
+        start = None
+        first_ts = None
+        with open(trace_file, 'rb') as f:
+            for line_no, _, level, entry in iter_entries(iter_lines(f), REPLAY_LEVELS):
+                if entry is None:
+                    continue
+                if level != 'TRANSPORT_IN':
+                    self._on_response(level, entry)
+                    continue
+                msg = decode_raw(entry)
+                if msg is None or 'method' not in msg:
+                    self.report.skipped += 1
+                    continue
+
+                ts = parse_timestamp_ns(entry.get('timestamp'))
+                if self.fast:
+                    await self.slots.acquire()
+                elif ts is not None:
+                    if start is None:
+                        start, first_ts = loop.time(), ts
+                    delay = start + (ts - first_ts) / 1e9 / self.speed - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+                if 'id' not in msg:
+                    self.report.notifications += 1
+                    await self.client.write(msg)
+                    if self.slots:
+                        self.slots.release()
+                    continue
+
+                label = msg['method']
+                tool = tool_name(msg)
+                if tool:
+                    label = f"{label} {tool}"
+                call = ReplayCall(line_no, label, msg, ts)
+                # The server answers a null id with 0
+                recorded_id = 0 if msg['id'] is None else msg['id']
+                self.awaiting_recording[message_key(recorded_id)].append(call)
+                task = asyncio.create_task(self._replay(call))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+
+        if self.tasks:
+            await asyncio.gather(*list(self.tasks))
+        # Anything still waiting for a recorded response was never answered in the trace
+        for queue in list(self.awaiting_recording.values()) + list(self.awaiting_raw.values()):
+            for call in queue:
+                if call.replay_error is None:
+                    self.report.finish(call)
+
+
+def _ms(value_ns):
+    return "-" if value_ns is None else f"{value_ns / 1e6:.1f}"
+
+
+def _delta(recorded, replayed):
+    if not recorded or replayed is None:
+        return "-"
+    return f"{(replayed - recorded) / recorded * 100:+.0f}%"
+
+
+def print_report(report, elapsed):
+    print("\n=== Replay Results ===")
+    total = sum(report.outcomes.values())
+    print(f"Requests replayed: {total} in {elapsed:.1f}s "
+          f"(+{report.notifications} notifications, {report.skipped} unparseable lines skipped)")
+    for outcome in ("identical", "different", "not recorded", "replay error"):
+        if report.outcomes[outcome]:
+            print(f"  {outcome:<13} {report.outcomes[outcome]:>7}")
+
+    labels = sorted(set(report.recorded_latency) | set(report.replay_latency),
+                    key=lambda label: -report.replay_latency[label].count)
+    if labels:
+        width = max(len(label) for label in labels)
+        print(f"\n⏱️  Latency, recorded vs replay (ms):")
+        print(f"  {'':<{width}} {'count':>6} {'rec p50':>8} {'rep p50':>8} {'Δp50':>6} "
+              f"{'rec p99':>8} {'rep p99':>8} {'Δp99':>6}")
+        for label in labels:
+            rec, rep = report.recorded_latency[label], report.replay_latency[label]
+            print(f"  {label:<{width}} {rep.count:>6} {_ms(rec.percentile(50)):>8} "
+                  f"{_ms(rep.percentile(50)):>8} {_delta(rec.percentile(50), rep.percentile(50)):>6} "
+                  f"{_ms(rec.percentile(99)):>8} {_ms(rep.percentile(99)):>8} "
+                  f"{_delta(rec.percentile(99), rep.percentile(99)):>6}")
+
+    if report.examples:
+        print(f"\n❌ Mismatches by request ({report.failed} total):")
+        for label, count in report.differences.most_common(10):
+            print(f"  {count:>6} x {label}")
+        print(f"\nFirst {len(report.examples)}:")
+        for line_no, label, outcome, detail, call in report.examples:
+            where = f" at {detail}" if detail else ""
+            print(f"  Line {line_no}: {label} (id: {call.message.get('id')}) {outcome}{where}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a --trace-mcp log against a fresh odata-mcp",
+                                     usage="%(prog)s [options] [trace_file] -- odata-mcp [args...]")
+    parser.add_argument("trace_file", nargs="?", help="trace to replay (default: latest /tmp/mcp_trace_*.log)")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="timeline speed-up, e.g. 2 or 10 (default: 1, original timing)")
+    parser.add_argument("--fast", action="store_true",
+                        help="ignore the recorded timing and send as fast as possible")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="requests in flight with --fast (default: 1)")
+    parser.add_argument("--ignore-key", action="append", default=[], metavar="KEY",
+                        help="ignore this key at any depth when comparing (repeatable)")
+    parser.add_argument("--examples", type=int, default=10, help="mismatches to show (default: 10)")
+    parser.add_argument("--timeout", type=float, default=60.0,
+                        help="seconds to wait for each response (default: 60)")
+    argv = sys.argv[1:]
+    command = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, command = argv[:split], argv[split + 1:]
+    args = parser.parse_args(argv)
+    if not command:
+        parser.error("a server command is required, e.g. -- ./odata-mcp --service https://...")
+    trace_file = args.trace_file or latest_trace_file()
+    if not trace_file:
+        parser.error("no trace file given and none found in /tmp")
+
+    mode = (f"as fast as possible, {args.concurrency} in flight" if args.fast
+            else "original timing" if args.speed == 1 else f"{args.speed:g}x speed")
+    print(f"🔁 Replaying {trace_file} ({mode})")
+    report = ReplayReport(args.ignore_key, args.examples)
+
+    async def replay():
+        async with MCPStdioClient(command, timeout=args.timeout) as client:
+            await TraceReplayer(client, report, args.speed, args.fast, args.concurrency,
+                                args.timeout).run(trace_file)
+
+    started = time.perf_counter()
+    asyncio.run(replay())
+    print_report(report, time.perf_counter() - started)
+    if report.failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
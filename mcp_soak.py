@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Soak test with leak detection for long-running odata-mcp servers
+
+Drives the mcp_loadgen.py workload against the stand-in OData service
+(odata_standin.py) for hours. At a fixed interval it samples the server's
+resident set size, open file descriptors and thread count from /proc
+(Linux only). After the run it fits a linear trend to each series and
+reports a pass/fail leak verdict.
+
+    python3 mcp_soak.py --duration 4h ./odata-mcp
+    python3 mcp_soak.py --transport streamable-http --sse --sessions 8 --duration 2h ./odata-mcp
+    python3 mcp_soak.py --duration 30m --csv soak.csv --json soak.json ./odata-mcp
+
+A series leaks when its fitted growth is above the --max-*-growth limit
+per hour and the median of the last third of the samples is above the
+median of the first third by more than the noise floor. Samples taken
+during --warmup are shown but not fitted, so the heap, connection pools
+and caches can settle first.
+
+Over stdio every session is its own server process, and the samples are
+summed over all of them. Over streamable-http there is one shared server.
+--sse upgrades every call to an SSE stream and so exercises stream
+context cleanup. --reconnect-every drops idle keep-alive connections so
+clients come and go. Go does not expose goroutines in /proc. A goroutine
+leak shows up as RSS growth, and as thread growth once the goroutines
+block in syscalls.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+from mcp_client import MCPClientError
+from mcp_loadgen import (DEFAULT_MIX, LoadStats, Workload, open_http_sessions, open_stdio_sessions,
+                         parse_mix, response_error)
+from odata_standin import StandInProcess, add_spec_arguments, print_upstream_stats, spec_from_args
+
+SSE_HEADERS = {"Accept": "application/json, text/event-stream"}
+
+# metric -> (label, scale for display, noise floor in raw units)
+METRICS = {
+    "rss_kb": ("RSS MiB", 1 / 1024, 1024),
+    "fds": ("open FDs", 1, 2),
+    "threads": ("threads", 1, 2),
+}
+
+
+def parse_duration(text):
+    """Seconds from 90, 90s, 30m or 4h"""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smh]?)\s*", text)
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid duration: {text!r} (use e.g. 90s, 30m, 4h)")
+    return float(match.group(1)) * {"": 1, "s": 1, "m": 60, "h": 3600}[match.group(2)]
+
+
+def sample_process(pid):
+    """RSS in KiB, open file descriptors and threads of one process, or None if it is gone"""
+    try:
+        sample = {"rss_kb": 0, "threads": 0}
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    sample["rss_kb"] = int(line.split()[1])
+                elif line.startswith("Threads:"):
+                    sample["threads"] = int(line.split()[1])
+        sample["fds"] = len(os.listdir(f"/proc/{pid}/fd"))
+        return sample
+    except (OSError, ValueError):
+        return None
+
+
+def fit_trend(times, values):
+    """Least-squares slope per second, intercept and R² of values over times"""
+    n = len(times)
+    mean_t = sum(times) / n
+    mean_v = sum(values) / n
+    var_t = sum((t - mean_t) ** 2 for t in times)
+    if var_t == 0:
+        return 0.0, mean_v, 0.0
+    slope = sum((t - mean_t) * (v - mean_v) for t, v in zip(times, values)) / var_t
+    intercept = mean_v - slope * mean_t
+    ss_tot = sum((v - mean_v) ** 2 for v in values)
+    ss_res = sum((v - (intercept + slope * t)) ** 2 for t, v in zip(times, values))
+    return slope, intercept, 1 - ss_res / ss_tot if ss_tot else 0.0
+
+
+def analyze(samples, warmup, limits):
+    """Trend and leak verdict per metric over the samples taken after warm-up"""
+    fitted = [s for s in samples if s["elapsed"] >= warmup]
+    results = {}
+    for metric, (_, _, noise) in METRICS.items():
+        if len(fitted) < 6:
+            results[metric] = None
+            continue
+        times = [s["elapsed"] for s in fitted]
+        values = [s[metric] for s in fitted]
+        slope, _, r2 = fit_trend(times, values)
+        third = len(values) // 3
+        early = statistics.median(values[:third])
+        late = statistics.median(values[-third:])
+        per_hour = slope * 3600
+        results[metric] = {
+            "per_hour": per_hour,
+            "r2": r2,
+            "early_median": early,
+            "late_median": late,
+            "limit_per_hour": limits[metric],
+            "leak": per_hour > limits[metric] and late - early > noise,
+        }
+    return results
+
+
+class Soak:
+    """Shared state of a soak run: the current sample window and the time series"""
+
+    def __init__(self, pids, interval):
+        self.pids = pids
+        self.interval = interval
+        self.window = LoadStats()
+        self.samples = []
+        self.calls = 0
+        self.errors = 0
+        self.exited = False
+
+    def take_sample(self, elapsed):
+        window, self.window = self.window, LoadStats()
+        previous = self.samples[-1]["elapsed"] if self.samples else 0.0
+        sample = {"elapsed": elapsed, "rss_kb": 0, "fds": 0, "threads": 0}
+        for pid in self.pids:
+            process = sample_process(pid)
+            if process is None:
+                self.exited = True
+                continue
+            for metric in METRICS:
+                sample[metric] += process[metric]
+        latency = window.total_latency()
+        errors = sum(window.errors.values())
+        self.calls += window.total_calls
+        self.errors += errors
+        sample.update({
+            "calls": window.total_calls,
+            "errors": errors,
+            "throughput": window.total_calls / max(elapsed - previous, 1e-9) if self.samples else 0.0,
+            "p50_ms": latency.percentile(50) / 1e6 if window.total_calls else None,
+            "p99_ms": latency.percentile(99) / 1e6 if window.total_calls else None,
+        })
+        self.samples.append(sample)
+        return sample
+
+
+async def soak_worker(soak, session, workload, deadline, timeout, think):
+    loop = asyncio.get_running_loop()
+    while loop.time() < deadline and not soak.exited:
+        kind, name, arguments = workload.next_call()
+        started = time.perf_counter_ns()
+        try:
+            error = response_error(await session.call_tool(name, arguments, timeout=timeout))
+        except asyncio.TimeoutError:
+            error = "timeout"
+        except (MCPClientError, OSError) as e:
+            error = str(e)
+        soak.window.record(kind, time.perf_counter_ns() - started, error)
+        if error is not None and error.startswith("Server exited"):
+            return
+        if think:
+            await asyncio.sleep(think)
+
+
+def _fmt(value, digits=1):
+    return "-" if value is None else f"{value:.{digits}f}"
+
+
+def print_sample_header():
+    print(f"  {'elapsed':>8} {'RSS MiB':>9} {'FDs':>5} {'threads':>7} {'req/s':>8} {'errors':>6} "
+          f"{'p50 ms':>8} {'p99 ms':>8}")
+
+
+def print_sample(sample):
+    print(f"  {sample['elapsed'] / 60:>7.1f}m {sample['rss_kb'] / 1024:>9.1f} {sample['fds']:>5} "
+          f"{sample['threads']:>7} {sample['throughput']:>8.1f} {sample['errors']:>6} "
+          f"{_fmt(sample['p50_ms']):>8} {_fmt(sample['p99_ms']):>8}", flush=True)
+
+
+async def sampler(soak, started, deadline, print_every):
+    loop = asyncio.get_running_loop()
+    last_printed = None
+    while not soak.exited:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return
+        await asyncio.sleep(min(soak.interval, remaining))
+        sample = soak.take_sample(loop.time() - started)
+        if last_printed is None or sample["elapsed"] - last_printed >= print_every or loop.time() >= deadline:
+            print_sample(sample)
+            last_printed = sample["elapsed"]
+        if loop.time() >= deadline:
+            return
+
+
+async def reconnector(sessions, every, deadline):
+    loop = asyncio.get_running_loop()
+    while loop.time() + every < deadline:
+        await asyncio.sleep(every)
+        await asyncio.gather(*(session.close() for session in sessions))
+
+
+async def run_soak(args, command):
+    if args.transport == "stdio":
+        sessions, server = await open_stdio_sessions(command, args.sessions, args.timeout)
+        pids = [session.proc.pid for session in sessions]
+    else:
+        sessions, server = await open_http_sessions(command, args.sessions, args.timeout, args.pipeline,
+                                                    SSE_HEADERS if args.sse else None)
+        pids = [server.pid]
+    try:
+        tools = await sessions[0].list_tools()
+        workload = Workload(tools, parse_mix(args.mix), args.rows, args.top, args.seed)
+        if not workload.kinds:
+            raise SystemExit(f"❌ None of the tool types in --mix {args.mix} were generated")
+
+        soak = Soak(pids, args.interval)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + args.duration
+        print(f"🚀 Soaking {args.sessions} {args.transport} sessions x {args.pipeline} in flight "
+              f"for {args.duration / 60:g}m, sampling every {args.interval:g}s "
+              f"(first {args.warmup:g}s not fitted)")
+        print_sample_header()
+        soak.take_sample(0.0)
+        print_sample(soak.samples[0])
+        tasks = [soak_worker(soak, session, workload, deadline, args.timeout, args.think_ms / 1000.0)
+                 for session in sessions for _ in range(args.pipeline)]
+        tasks.append(sampler(soak, started, deadline, args.print_every))
+        if args.reconnect_every and args.transport != "stdio":
+            tasks.append(reconnector(sessions, args.reconnect_every, deadline))
+        await asyncio.gather(*tasks)
+        return soak
+    finally:
+        await asyncio.gather(*(s.close() for s in sessions), return_exceptions=True)
+        if server is not None:
+            server.terminate()
+            await server.wait()
+
+
+def print_verdict(soak, trends):
+    print("\n=== Leak Analysis ===")
+    print(f"  {'metric':<9} {'first third':>12} {'last third':>12} {'trend / h':>11} {'limit / h':>10} "
+          f"{'R²':>6}  verdict")
+    failed = False
+    for metric, (label, scale, _) in METRICS.items():
+        trend = trends[metric]
+        if trend is None:
+            print(f"  {label:<9} {'-':>12} {'-':>12} {'-':>11} {'-':>10} {'-':>6}  not enough samples")
+            continue
+        digits = 1 if scale != 1 else 0
+        verdict = "❌ LEAK" if trend["leak"] else "✅ ok"
+        failed = failed or trend["leak"]
+        print(f"  {label:<9} {trend['early_median'] * scale:>12.{digits}f} "
+              f"{trend['late_median'] * scale:>12.{digits}f} {trend['per_hour'] * scale:>+11.2f} "
+              f"{trend['limit_per_hour'] * scale:>10.{digits}f} {trend['r2']:>6.2f}  {verdict}")
+
+    print(f"\n  {soak.calls} calls, {soak.errors} errors")
+    if soak.exited:
+        print("❌ Server process exited during the soak")
+    elif any(trend is None for trend in trends.values()):
+        print("⚠️  Too few samples after warm-up for a verdict: run longer or sample more often")
+    elif failed:
+        print("❌ FAIL: resource usage keeps growing under a steady workload")
+    else:
+        print("✅ PASS: no sustained growth in RSS, file descriptors or threads")
+    return not failed and not soak.exited and all(trends.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test with leak detection for odata-mcp")
+    parser.add_argument("--transport", choices=("stdio", "streamable-http"), default="stdio",
+                        help="MCP transport to drive (default: stdio)")
+    parser.add_argument("--sessions", "-c", type=int, default=1,
+                        help="concurrent client sessions (default: 1)")
+    parser.add_argument("--pipeline", type=int, default=1, metavar="N",
+                        help="requests in flight per session (default: 1)")
+    parser.add_argument("--duration", "-d", type=parse_duration, default=parse_duration("1h"),
+                        help="total soak time, e.g. 90s, 30m, 4h (default: 1h)")
+    parser.add_argument("--warmup", type=parse_duration, default=parse_duration("5m"),
+                        help="time excluded from the trend fit (default: 5m)")
+    parser.add_argument("--interval", type=parse_duration, default=parse_duration("10s"),
+                        help="sampling interval (default: 10s)")
+    parser.add_argument("--print-every", type=parse_duration, default=parse_duration("1m"),
+                        help="how often to print a sample (default: 1m)")
+    parser.add_argument("--sse", action="store_true",
+                        help="streamable-http: accept SSE so every call opens a stream")
+    parser.add_argument("--reconnect-every", type=parse_duration, metavar="DURATION",
+                        help="streamable-http: drop idle keep-alive connections this often")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"weighted tool types (default: {DEFAULT_MIX})")
+    parser.add_argument("--top", type=int, default=10, help="$top for filter/search calls (default: 10)")
+    parser.add_argument("--think-ms", type=float, default=0.0,
+                        help="pause between calls of one worker (default: 0)")
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="seconds to wait for each response (default: 30)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the call mix")
+    parser.add_argument("--max-rss-growth", type=float, default=8.0, metavar="MIB",
+                        help="RSS growth per hour counted as a leak (default: 8 MiB)")
+    parser.add_argument("--max-fd-growth", type=float, default=10.0, metavar="N",
+                        help="open file descriptor growth per hour counted as a leak (default: 10)")
+    parser.add_argument("--max-thread-growth", type=float, default=4.0, metavar="N",
+                        help="thread growth per hour counted as a leak (default: 4)")
+    parser.add_argument("--service", help="soak against a real OData service instead of the stand-in")
+    parser.add_argument("--csv", metavar="FILE", help="write the time series as CSV")
+    parser.add_argument("--json", metavar="FILE", help="write the time series and verdict as JSON")
+    add_spec_arguments(parser)
+    parser.add_argument("server_command", nargs=argparse.REMAINDER,
+                        help="odata-mcp binary and extra arguments (default: ./odata-mcp)")
+    args = parser.parse_args()
+    if args.sse and args.transport == "stdio":
+        parser.error("--sse needs --transport streamable-http")
+    if not os.path.isdir("/proc/self/fd"):
+        raise SystemExit("❌ The soak test samples /proc and only runs on Linux")
+
+    standin = None
+    if args.service:
+        service_url = args.service
+    else:
+        standin = StandInProcess(spec_from_args(args)).start()
+        service_url = standin.url
+        print(f"📡 Stand-in OData v{args.odata_version} service at {service_url}")
+    command = (args.server_command or ["./odata-mcp"]) + ["--service", service_url]
+
+    try:
+        soak = asyncio.run(run_soak(args, command))
+        upstream = standin.stats() if standin else None
+    except KeyboardInterrupt:
+        raise SystemExit("\n❌ Soak interrupted")
+    finally:
+        if standin:
+            standin.stop()
+
+    limits = {"rss_kb": args.max_rss_growth * 1024, "fds": args.max_fd_growth,
+              "threads": args.max_thread_growth}
+    trends = analyze(soak.samples, args.warmup, limits)
+    passed = print_verdict(soak, trends)
+    if upstream:
+        print_upstream_stats(upstream, soak.calls)
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(soak.samples[0]))
+            writer.writeheader()
+            writer.writerows(soak.samples)
+        print(f"\n📝 Time series written to {args.csv}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"transport": args.transport, "sessions": args.sessions, "sse": args.sse,
+                       "duration": args.duration, "warmup": args.warmup, "interval": args.interval,
+                       "calls": soak.calls, "errors": soak.errors, "server_exited": soak.exited,
+                       "passed": passed, "trends": trends, "samples": soak.samples}, f, indent=2)
+        print(f"\n📝 Results written to {args.json}")
+
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Startup and tools/list scaling benchmark for odata-mcp
+
+For each metadata size the stand-in service (odata_standin.py) serves a
+synthetic EDMX document with that many entity sets. A fresh odata-mcp
+process is started against it and the benchmark records:
+
+  - time from spawn to the first initialize response (GetMetadata, parsing
+    and generateTools all happen before the server answers)
+  - time from spawn to the first tools/list response
+  - tools/list response size in bytes and number of tools
+  - peak RSS of the server process (VmHWM from /proc, Linux only)
+
+    python3 mcp_startup_bench.py --sizes 10,100,1000,10000 --runs 3 ./odata-mcp
+
+The marginal column is the extra tools/list time per added entity set
+between consecutive sizes. It stays flat while startup scales linearly;
+where it climbs, startup has stopped scaling linearly.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+from mcp_client import MCPClientError, MCPStdioClient
+from odata_standin import ServiceSpec, StandInServer, generate_metadata
+
+DEFAULT_SIZES = "10,100,1000,10000"
+
+
+def peak_rss_kb(pid):
+    """Peak resident set size of a running process in KiB, or None"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+async def measure_startup(command, timeout):
+    """Start one server and time initialize and tools/list from spawn"""
+    client = MCPStdioClient(command, timeout=timeout)
+    await client.start()
+    try:
+        response = await client.request("initialize", {
+            "protocolVersion": "2024-11-05",
+            "capabilities": {},
+            "clientInfo": {"name": "mcp-startup-bench", "version": "1.0"}
+        })
+        initialize_s = time.perf_counter() - client.started_at
+        if 'error' in response:
+            raise RuntimeError(f"initialize failed: {response['error'].get('message')}")
+        await client.notify("initialized")
+
+        before = client.bytes_read
+        tools = await client.list_tools()
+        tools_list_s = time.perf_counter() - client.started_at
+        return {
+            "initialize_s": initialize_s,
+            "tools_list_s": tools_list_s,
+            "tools_list_bytes": client.bytes_read - before,
+            "tools": len(tools),
+            "peak_rss_kb": peak_rss_kb(client.proc.pid),
+        }
+    finally:
+        await client.close()
+
+
+def median_run(runs):
+    """Per-field median over repeated runs of one size"""
+    result = {}
+    for key in runs[0]:
+        values = [run[key] for run in runs if run[key] is not None]
+        result[key] = statistics.median(values) if values else None
+    return result
+
+
+def marginal_us(previous, current):
+    """Extra tools/list time per added entity set, in microseconds"""
+    added = current["entity_sets"] - previous["entity_sets"]
+    if added <= 0:
+        return None
+    return (current["tools_list_s"] - previous["tools_list_s"]) / added * 1e6
+
+
+def bench_size(args, size):
+    spec = ServiceSpec(odata_version=args.odata_version, entity_sets=size,
+                       properties=args.properties, rows=10, read_only=args.read_only)
+    runs = []
+    with StandInServer(spec) as standin:
+        command = args.server_command + ["--service", standin.url]
+        for _ in range(args.runs):
+            runs.append(asyncio.run(measure_startup(command, args.timeout)))
+        stats = standin.stats()
+    result = median_run(runs)
+    result["entity_sets"] = size
+    result["metadata_bytes"] = len(standin.httpd.metadata)
+    result["metadata_requests"] = stats["counts"]["metadata"]
+    result["runs"] = runs
+    return result
+
+
+def _fmt(value, scale=1.0, digits=1):
+    return "-" if value is None else f"{value * scale:.{digits}f}"
+
+
+def print_table(results):
+    print("\n=== Startup Scaling ===")
+    print(f"  {'sets':>6} {'EDMX KiB':>9} {'tools':>7} {'init ms':>9} {'list ms':>9} "
+          f"{'list KiB':>9} {'RSS MiB':>8} {'marginal':>9}")
+    previous = None
+    for r in results:
+        r["marginal_us_per_set"] = marginal_us(previous, r) if previous else None
+        rss = r["peak_rss_kb"] / 1024 if r["peak_rss_kb"] else None
+        print(f"  {r['entity_sets']:>6} {r['metadata_bytes'] / 1024:>9.1f} {r['tools']:>7.0f} "
+              f"{_fmt(r['initialize_s'], 1000):>9} {_fmt(r['tools_list_s'], 1000):>9} "
+              f"{r['tools_list_bytes'] / 1024:>9.1f} {_fmt(rss):>8} "
+              f"{_fmt(r['marginal_us_per_set'], digits=0):>6} us")
+        previous = r
+
+    # Small steps are dominated by spawn noise and can come out negative
+    marginals = [r for r in results if (r["marginal_us_per_set"] or 0) > 0]
+    if len(marginals) >= 2 and marginals[-1]["marginal_us_per_set"] > 2 * marginals[0]["marginal_us_per_set"]:
+        growth = marginals[-1]["marginal_us_per_set"] / marginals[0]["marginal_us_per_set"]
+        print(f"\n⚠️  Cost per entity set grows {growth:.1f}x by {marginals[-1]['entity_sets']} "
+              f"entity sets: startup is not scaling linearly")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup and tools/list scaling benchmark for odata-mcp")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"comma-separated entity set counts (default: {DEFAULT_SIZES})")
+    parser.add_argument("--runs", type=int, default=3, help="runs per size, median is reported (default: 3)")
+    parser.add_argument("--odata-version", choices=("2", "4"), default="2",
+                        help="OData protocol version of the stand-in (default: 2)")
+    parser.add_argument("--properties", type=int, default=10,
+                        help="extra properties per entity type (default: 10)")
+    parser.add_argument("--read-only", action="store_true",
+                        help="mark entity sets read-only so only read tools are generated")
+    parser.add_argument("--timeout", type=float, default=300.0,
+                        help="seconds to wait for each response (default: 300)")
+    parser.add_argument("--json", metavar="FILE", default="startup_scaling.json",
+                        help="where to write the results (default: startup_scaling.json)")
+    parser.add_argument("--edmx-dir", metavar="DIR",
+                        help="also save the generated EDMX documents in DIR")
+    parser.add_argument("server_command", nargs=argparse.REMAINDER,
+                        help="odata-mcp binary and extra arguments (default: ./odata-mcp)")
+    args = parser.parse_args()
+    args.server_command = args.server_command or ["./odata-mcp"]
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+
+    results = []
+    for size in sizes:
+        if args.edmx_dir:
+            spec = ServiceSpec(odata_version=args.odata_version, entity_sets=size,
+                               properties=args.properties, read_only=args.read_only)
+            with open(f"{args.edmx_dir}/standin_{size}.xml", "w") as f:
+                f.write(generate_metadata(spec))
+        print(f"⏱️  {size} entity sets x {args.runs} runs...", flush=True)
+        try:
+            results.append(bench_size(args, size))
+        except (RuntimeError, MCPClientError, OSError, asyncio.TimeoutError) as e:
+            # Report and save the sizes measured so far
+            print(f"❌ {size} entity sets: {e!r}")
+            break
+
+    if not results:
+        sys.exit(1)
+    print_table(results)
+
+    with open(args.json, "w") as f:
+        json.dump({"odata_version": args.odata_version, "properties": args.properties,
+                   "read_only": args.read_only, "command": args.server_command,
+                   "results": results}, f, indent=2)
+    print(f"\n📝 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Cold-start profiler for odata-mcp, broken down by startup phase
+
+Starts odata-mcp many times against the stand-in OData service
+(odata_standin.py), each time with --trace-mcp and its own TMPDIR so that
+every run writes its own trace. One run's startup is split into phases
+using four clocks on the same machine:
+
+  process start    spawn -> stand-in receives the first $metadata request
+                   (exec, Go runtime init, flag parsing, hints file load,
+                   connecting to the service)
+  metadata fetch   first -> last startup request as the stand-in serves
+                   them ($metadata, plus the service document on fallback)
+  parse + tools    last startup request done -> TRACE "Trace logging
+                   started" (EDMX parsing, tool generation, server setup)
+  transport ready  trace started -> first TRANSPORT_IN (stdio transport
+                   set up and the waiting initialize request read)
+  first response   first TRANSPORT_IN -> first TRANSPORT_OUT
+  delivery         TRANSPORT_OUT -> the client has the response
+
+The trace logger is created after tool generation, so the trace alone
+cannot show the earlier phases; the stand-in's request spans fill the gap.
+Each trace line is fsynced, so the last three phases include that cost.
+
+    python3 mcp_startup_profile.py ./odata-mcp
+    python3 mcp_startup_profile.py --runs 30 --hints-sizes 0,hints.json,5000,50000 ./odata-mcp
+    python3 mcp_startup_profile.py --entity-sets 2000 --metadata-latency-ms 50 --json startup.json ./odata-mcp
+
+Every hints file configuration is run in two modes, interleaved:
+
+  cold  the pages of the server command's files (binary, hints file) are
+        dropped from the page cache with posix_fadvise before the run, or
+        the whole cache with --drop-caches (root only, Linux)
+  warm  the run follows one that has just read the same files
+
+Hints sizes are numbers of generated hints (mcp_hints.synthetic_hints) or
+paths of existing hints files. Each configuration gets an explicit
+--hints-file, so a hints.json next to the binary does not leak in.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shlex
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from mcp_client import MCPClientError, MCPStdioClient
+from mcp_hints import synthetic_hints
+from mcp_startup_bench import peak_rss_kb
+from odata_standin import StandInProcess, add_spec_arguments, spec_from_args
+from view_trace import decode_line, iter_lines, parse_timestamp_ns
+
+DEFAULT_HINTS_SIZES = "0,hints.json,10000"
+MODES = ("cold", "warm")
+# (name, start mark, end mark)
+PHASES = (
+    ("process start", "spawn", "upstream_start"),
+    ("metadata fetch", "upstream_start", "upstream_end"),
+    ("parse + tools", "upstream_end", "trace_start"),
+    ("transport ready", "trace_start", "first_in"),
+    ("first response", "first_in", "first_out"),
+    ("delivery", "first_out", "received"),
+)
+TOTAL = "total"
+
+
+def evict_from_page_cache(paths, drop_caches=False):
+    """Drop cached pages so the next run reads them from disk; returns the method used"""
+    if drop_caches:
+        try:
+            os.sync()
+            with open("/proc/sys/vm/drop_caches", "w") as f:
+                f.write("3\n")
+            return "drop_caches"
+        except OSError:
+            pass
+    if not hasattr(os, "posix_fadvise"):
+        return None
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    return "fadvise"
+
+
+def command_files(command):
+    """Files the server command reads at start: the binary and any file arguments"""
+    files = []
+    binary = shutil.which(command[0]) or command[0]
+    for arg in [binary] + command[1:]:
+        if os.path.isfile(arg):
+            files.append(os.path.realpath(arg))
+    return files
+
+
+def trace_marks(trace_dir):
+    """Timestamps (ns) of trace start and the first request and response"""
+    marks = {}
+    for name in os.listdir(trace_dir):
+        if not (name.startswith("mcp_trace_") and name.endswith(".log")):
+            continue
+        with open(os.path.join(trace_dir, name), "rb") as f:
+            for _, _, line in iter_lines(f):
+                level, entry = decode_line(line)
+                if entry is None:
+                    continue
+                if level == "TRACE" and entry.get("message") == "Trace logging started":
+                    key = "trace_start"
+                elif level == "TRANSPORT_IN":
+                    key = "first_in"
+                elif level == "TRANSPORT_OUT":
+                    key = "first_out"
+                else:
+                    continue
+                if key not in marks:
+                    marks[key] = parse_timestamp_ns(entry.get("timestamp"))
+                if len(marks) == 3:
+                    return marks
+    return marks
+
+
+def upstream_marks(spans, spawn_ns):
+    spans = [span for span in spans if span["start_ns"] >= spawn_ns]
+    if not spans:
+        return {}, []
+    return ({"upstream_start": min(span["start_ns"] for span in spans),
+             "upstream_end": max(span["end_ns"] for span in spans)},
+            [span["kind"] for span in sorted(spans, key=lambda span: span["start_ns"])])
+
+
+async def launch(command, env, timeout):
+    """Start one server, send initialize at once; returns (spawn ns, received ns, peak RSS)"""
+    client = MCPStdioClient(command, timeout=timeout, env=env)
+    spawn_ns = time.time_ns()
+    await client.start()
+    try:
+        response = await client.request("initialize", {
+            "protocolVersion": "2024-11-05",
+            "capabilities": {},
+            "clientInfo": {"name": "mcp-startup-profile", "version": "1.0"}
+        })
+        received_ns = time.time_ns()
+        if 'error' in response:
+            raise RuntimeError(f"initialize failed: {response['error'].get('message')}")
+        return spawn_ns, received_ns, peak_rss_kb(client.proc.pid)
+    finally:
+        await client.close()
+
+
+def profile_run(command, standin, timeout):
+    """One traced start; returns its marks, phases (ms) and upstream requests"""
+    with tempfile.TemporaryDirectory(prefix="mcp-startup-") as trace_dir:
+        # os.TempDir() in Go reads TMPDIR (TMP/TEMP on Windows)
+        env = dict(os.environ, TMPDIR=trace_dir, TMP=trace_dir, TEMP=trace_dir)
+        standin.reset()
+        spawn_ns, received_ns, rss = asyncio.run(launch(command, env, timeout))
+        marks = trace_marks(trace_dir)
+    if "trace_start" not in marks:
+        raise RuntimeError("no --trace-mcp trace was written")
+    upstream, kinds = upstream_marks(standin.stats().get("spans", []), spawn_ns)
+    marks.update(upstream, spawn=spawn_ns, received=received_ns)
+    phases = {}
+    for name, start, end in PHASES:
+        if marks.get(start) is not None and marks.get(end) is not None:
+            phases[name] = (marks[end] - marks[start]) / 1e6
+    phases[TOTAL] = (received_ns - spawn_ns) / 1e6
+    return {"marks": marks, "phases_ms": phases, "upstream": kinds, "peak_rss_kb": rss}
+
+
+def prepare_hints(sizes, directory, seed):
+    """(label, path, hint count) per requested size or existing file"""
+    configs = []
+    for item in sizes:
+        if item.isdigit():
+            count = int(item)
+            path = os.path.join(directory, f"hints_{count}.json")
+            with open(path, "w") as f:
+                json.dump({"version": "1.0", "hints": synthetic_hints(count, random.Random(seed), 0)}, f)
+            configs.append((f"{count} hints", path, count))
+        elif os.path.isfile(item):
+            with open(item) as f:
+                count = len(json.load(f).get("hints") or [])
+            configs.append((os.path.basename(item), item, count))
+        else:
+            print(f"⚠️  Skipping hints size {item!r}: not a number or an existing file")
+    return configs
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def phase_values(runs, phase):
+    return [run["phases_ms"][phase] for run in runs if phase in run["phases_ms"]]
+
+
+def median_phase(runs, phase):
+    values = phase_values(runs, phase)
+    return statistics.median(values) if values else None
+
+
+def _ms(value, width=9, sign=False):
+    if value is None:
+        return f"{'-':>{width}}"
+    return f"{value:>+{width}.2f}" if sign else f"{value:>{width}.2f}"
+
+
+def print_config(label, mode, runs):
+    total = median_phase(runs, TOTAL)
+    print(f"\n=== {label}, {mode}: {len(runs)} runs, median {total:.1f} ms to first response ===")
+    print(f"  {'phase':<16} {'p50':>9} {'p90':>9} {'max':>9} {'stdev':>9} {'share':>6}")
+    for name in [phase for phase, _, _ in PHASES] + [TOTAL]:
+        values = phase_values(runs, name)
+        if not values:
+            print(f"  {name:<16} {'-':>9}")
+            continue
+        median = statistics.median(values)
+        stdev = statistics.stdev(values) if len(values) > 1 else 0.0
+        share = f"{median / total * 100:5.0f}%" if total and name != TOTAL else ""
+        print(f"  {name:<16} {_ms(median)} {_ms(percentile(values, 90))} {_ms(max(values))} "
+              f"{_ms(stdev)} {share:>6}")
+
+
+def print_comparison(configs, results):
+    names = [phase for phase, _, _ in PHASES] + [TOTAL]
+    columns = [(label, mode) for label, _, _ in configs for mode in MODES if results.get((label, mode))]
+    print("\n=== Median Phase Times (ms) ===")
+    print(f"  {'phase':<16} " + " ".join(f"{f'{label} {mode}':>18}" for label, mode in columns))
+    for name in names:
+        print(f"  {name:<16} " + " ".join(f"{_ms(median_phase(results[key], name), 18)}" for key in columns))
+
+    print("\n=== Cold minus Warm (ms, medians) ===")
+    print(f"  {'phase':<16} " + " ".join(f"{label:>18}" for label, _, _ in configs))
+    for name in names:
+        cells = []
+        for label, _, _ in configs:
+            cold, warm = (median_phase(results.get((label, mode), []), name) for mode in MODES)
+            cells.append(_ms(None if cold is None or warm is None else cold - warm, 18, sign=True))
+        print(f"  {name:<16} " + " ".join(cells))
+
+    if len(configs) > 1:
+        base_label, _, _ = configs[0]
+        print(f"\n=== Hints File Effect (warm, ms vs {base_label}) ===")
+        print(f"  {'phase':<16} " + " ".join(f"{label:>18}" for label, _, _ in configs[1:]))
+        for name in names:
+            base = median_phase(results.get((base_label, "warm"), []), name)
+            cells = []
+            for label, _, _ in configs[1:]:
+                value = median_phase(results.get((label, "warm"), []), name)
+                cells.append(_ms(None if base is None or value is None else value - base, 18, sign=True))
+            print(f"  {name:<16} " + " ".join(cells))
+
+
+def print_findings(configs, results):
+    print()
+    label = configs[0][0]
+    warm = results.get((label, "warm"))
+    if warm:
+        total = median_phase(warm, TOTAL)
+        name, value = max(((phase, median_phase(warm, phase) or 0.0) for phase, _, _ in PHASES),
+                          key=lambda item: item[1])
+        print(f"🎯 Largest warm phase ({label}): {name}, {value:.1f} ms of {total:.1f} ms "
+              f"({value / total * 100:.0f}%)")
+    cold = results.get((label, "cold"))
+    if cold and warm:
+        name, value = max(((phase, (median_phase(cold, phase) or 0.0) - (median_phase(warm, phase) or 0.0))
+                           for phase, _, _ in PHASES), key=lambda item: item[1])
+        print(f"🎯 A cold page cache costs most in: {name}, {value:+.1f} ms")
+    sized = [(count, median_phase(results.get((label, "warm"), []), TOTAL))
+             for label, _, count in configs]
+    sized = [(count, value) for count, value in sized if value is not None]
+    if len(sized) > 1 and max(count for count, _ in sized) > min(count for count, _ in sized):
+        (low_count, low), (high_count, high) = min(sized), max(sized)
+        per_1000 = (high - low) / (high_count - low_count) * 1000
+        print(f"🎯 Hints file: {per_1000:+.2f} ms to first response per 1000 hints "
+              f"({low_count} -> {high_count} hints)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start profiler for odata-mcp by startup phase")
+    parser.add_argument("--runs", type=int, default=10, help="measured runs per mode and hints file (default: 10)")
+    parser.add_argument("--hints-sizes", default=DEFAULT_HINTS_SIZES,
+                        help=f"comma-separated generated hint counts or hints file paths "
+                             f"(default: {DEFAULT_HINTS_SIZES})")
+    parser.add_argument("--modes", default=",".join(MODES),
+                        help="page cache modes to run: cold, warm or both (default: cold,warm)")
+    parser.add_argument("--drop-caches", action="store_true",
+                        help="cold runs drop the whole page cache (root, Linux) instead of only the "
+                             "server's files")
+    parser.add_argument("--seed", type=int, default=1, help="seed for generated hints (default: 1)")
+    parser.add_argument("--timeout", type=float, default=120.0,
+                        help="seconds to wait for the initialize response (default: 120)")
+    parser.add_argument("--json", metavar="FILE", help="also write every run as JSON")
+    add_spec_arguments(parser)
+    parser.set_defaults(entity_sets=100, properties=10)
+    parser.add_argument("server_command", nargs=argparse.REMAINDER,
+                        help="odata-mcp binary and extra arguments (default: ./odata-mcp)")
+    args = parser.parse_args()
+
+    modes = [mode for mode in MODES if mode in args.modes.split(",")]
+    if not modes:
+        parser.error(f"--modes must name at least one of {', '.join(MODES)}")
+    spec = spec_from_args(args)
+    standin = StandInProcess(spec).start()
+    hints_dir = tempfile.mkdtemp(prefix="mcp-startup-hints-")
+    results = {}
+    eviction = None
+    try:
+        configs = prepare_hints(args.hints_sizes.split(","), hints_dir, args.seed)
+        if not configs:
+            raise SystemExit("❌ No hints file configurations to run")
+        base = (args.server_command or ["./odata-mcp"]) + ["--service", standin.url, "--trace-mcp"]
+        print(f"📡 Stand-in OData v{args.odata_version} service at {standin.url}: "
+              f"{spec.entity_sets} entity sets")
+        print(f"Server command: {shlex.join(base)} --hints-file ...")
+
+        for label, path, count in configs:
+            command = base + ["--hints-file", path]
+            files = command_files(command)
+            print(f"⏱️  {label} ({os.path.getsize(path) / 1024:.1f} KiB): {args.runs} runs x "
+                  f"{'/'.join(modes)}", flush=True)
+            # The first run only warms the cache for the warm run that follows it
+            profile_run(command, standin, args.timeout)
+            for _ in range(args.runs):
+                for mode in modes:
+                    if mode == "cold":
+                        eviction = evict_from_page_cache(files, args.drop_caches)
+                    run = profile_run(command, standin, args.timeout)
+                    run.update(mode=mode, hints=label, hints_count=count)
+                    results.setdefault((label, mode), []).append(run)
+    except (RuntimeError, MCPClientError, OSError, asyncio.TimeoutError) as e:
+        print(f"❌ Startup run failed: {e!r}")
+        sys.exit(1)
+    finally:
+        standin.stop()
+        shutil.rmtree(hints_dir, ignore_errors=True)
+
+    if "cold" in modes:
+        if eviction is None:
+            print("⚠️  posix_fadvise is not available here: cold runs are not colder than warm ones")
+        else:
+            print(f"Cold runs evicted with {eviction}")
+    upstream = sorted({tuple(run["upstream"]) for runs in results.values() for run in runs})
+    if upstream != [("metadata",)]:
+        print(f"Startup requests seen by the stand-in: {[list(kinds) for kinds in upstream]}")
+    for label, _, _ in configs:
+        for mode in modes:
+            print_config(label, mode, results[(label, mode)])
+    print_comparison(configs, results)
+    print_findings(configs, results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"command": base, "spec": spec.to_args(), "eviction": eviction,
+                       "runs": [run for runs in results.values() for run in runs]}, f, indent=2)
+        print(f"\n📝 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+Recording / replaying HTTP proxy between odata-mcp and its OData backend
+
+record   forwards every request to the real service and appends the
+         exchange to a gzip'd JSON Lines cassette
+replay   serves the cassette offline with configurable latency
+measure  starts the proxy (replay, or record with --upstream), runs
+         odata-mcp through it and shows the upstream round trips of startup
+         and of every tool call
+
+Either way, upstream calls are counted by kind: metadata, service_document,
+csrf_fetch (GET/HEAD with X-CSRF-Token: Fetch), entity_set and entity
+reads, writes, csrf_rejected (403 on a write), retry (a write repeated
+after a 403) and, when replaying, unmatched requests (answered with 404).
+
+    python3 odata_proxy.py record --upstream https://host/sap/opu/odata/sap/ZSRV/ -c zsrv.cassette
+    python3 odata_proxy.py replay -c zsrv.cassette --latency-ms 40
+    python3 odata_proxy.py measure -c zsrv.cassette -- ./odata-mcp --user u --password p
+
+record and replay print the local service URL to give odata-mcp as the
+first line on stdout. Counters are at /__proxy/stats; POST /__proxy/reset
+clears them.
+
+Cassettes never store Authorization, Cookie or Set-Cookie headers, but
+they do contain the response bodies of the recorded service.
+"""
+import argparse
+import asyncio
+import base64
+import gzip
+import hashlib
+import http.client
+import json
+import random
+import signal
+import ssl
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from odata_standin import RequestStats, print_upstream_stats
+
+STATS_PATH = "/__proxy/stats"
+RESET_PATH = "/__proxy/reset"
+CASSETTE_VERSION = 1
+
+MODIFYING_METHODS = ("POST", "PUT", "PATCH", "MERGE", "DELETE")
+HOP_BY_HOP = {"connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te",
+              "trailer", "transfer-encoding", "upgrade", "host", "content-length",
+              "accept-encoding"}
+# Response headers worth replaying; cookies and auth never reach the cassette
+RECORDED_HEADERS = ("content-type", "x-csrf-token", "location", "etag", "dataserviceversion",
+                    "odata-version", "sap-message")
+
+
+def request_key(method, path, body):
+    """Cassette lookup key: method, path with sorted query, hash of a write's body"""
+    url = urlsplit(path)
+    query = urlencode(sorted(parse_qsl(url.query, keep_blank_values=True)))
+    key = f"{method} {url.path}?{query}" if query else f"{method} {url.path}"
+    if method in MODIFYING_METHODS and body:
+        key += " #" + hashlib.sha1(body).hexdigest()[:16]
+    return key
+
+
+def classify(method, path, headers, service_path):
+    """Kind of upstream request, using the same names as the stand-in service"""
+    url_path = urlsplit(path).path
+    if url_path.endswith("/$metadata"):
+        return "metadata"
+    if headers.get("X-CSRF-Token", "").lower() == "fetch" and method in ("GET", "HEAD"):
+        return "csrf_fetch"
+    if method in MODIFYING_METHODS:
+        return "write"
+    if url_path.rstrip("/") == service_path.rstrip("/"):
+        return "service_document"
+    if url_path.endswith(")"):
+        return "entity"
+    return "entity_set"
+
+
+def _encode_body(body):
+    try:
+        return {"text": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(body).decode("ascii")}
+
+
+def _decode_body(record):
+    if "base64" in record:
+        return base64.b64decode(record["base64"])
+    return record.get("text", "").encode("utf-8")
+
+
+class Cassette:
+    """Append-only gzip'd JSON Lines file of exchanges.
+
+    Response bodies are stored once per distinct content ({"blob": ...}
+    lines) and referenced by hash, so repeated $metadata downloads and
+    identical pages cost one copy.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = None
+        self.blobs = set()
+        self.exchanges = defaultdict(deque)
+        self.service_path = "/"
+
+    def open_for_recording(self, upstream):
+        self.file = gzip.open(self.path, "wt", encoding="utf-8")
+        self._write({"cassette": CASSETTE_VERSION, "upstream": upstream,
+                     "recorded": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())})
+
+    def _write(self, record):
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def record(self, key, kind, status, headers, body, elapsed):
+        digest = hashlib.sha1(body).hexdigest()
+        with self.lock:
+            if digest not in self.blobs:
+                self.blobs.add(digest)
+                self._write(dict({"blob": digest}, **_encode_body(body)))
+            self._write({"key": key, "kind": kind, "status": status, "headers": headers,
+                         "body": digest, "ms": round(elapsed * 1000, 3)})
+            self.file.flush()
+
+    def load(self):
+        blobs = {}
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    record = json.loads(line)
+                    if "blob" in record:
+                        blobs[record["blob"]] = _decode_body(record)
+                    elif "key" in record:
+                        record["body"] = blobs[record["body"]]
+                        self.exchanges[record["key"]].append(record)
+                    elif "upstream" in record:
+                        self.service_path = urlsplit(record["upstream"]).path or "/"
+            except (EOFError, ValueError):
+                # Recording was killed: every exchange is flushed, only the gzip trailer is missing
+                pass
+        return self
+
+    def next_exchange(self, key):
+        """Recorded exchanges for a key are served in order; the last one repeats"""
+        with self.lock:
+            queue = self.exchanges.get(key)
+            if not queue:
+                return None
+            return queue.popleft() if len(queue) > 1 else queue[0]
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+class ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "ODataProxy/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._handle()
+
+    do_HEAD = do_POST = do_PUT = do_PATCH = do_MERGE = do_DELETE = do_GET
+
+    def _handle(self):
+        started = time.perf_counter()
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        proxy = self.server.proxy
+
+        if self.path == STATS_PATH:
+            self._send(200, {"Content-Type": "application/json"},
+                       json.dumps(proxy.stats.snapshot()).encode())
+            return
+        if self.path == RESET_PATH:
+            proxy.stats.reset()
+            self._send(200, {"Content-Type": "application/json"}, b'{"status":"reset"}')
+            return
+
+        key = request_key(self.command, self.path, body)
+        kind = classify(self.command, self.path, self.headers, proxy.service_path)
+        if proxy.is_retry(kind, key):
+            kind = "retry"
+        kind, status, headers, response_body = proxy.exchange(self, key, kind, body)
+        if kind in ("write", "retry"):
+            proxy.note_write(key, status)
+        self._send(status, headers, response_body)
+        proxy.stats.record(kind, time.perf_counter() - started, len(response_body))
+        if status == 403 and kind in ("write", "retry"):
+            proxy.stats.record("csrf_rejected", 0.0, 0)
+
+    def _send(self, status, headers, body):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+
+class ODataProxy:
+    """Runs the record or replay proxy on a background thread"""
+
+    def __init__(self, cassette, upstream=None, latency_ms=0.0, jitter_ms=0.0,
+                 recorded_latency=False, latency_scale=1.0, insecure=False,
+                 host="127.0.0.1", port=0):
+        self.cassette = cassette
+        self.upstream = upstream
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.recorded_latency = recorded_latency
+        self.latency_scale = latency_scale
+        self.stats = RequestStats()
+        self.unmatched = 0
+        self._rejected = set()
+        self._rejected_lock = threading.Lock()
+        self._local = threading.local()
+
+        if upstream:
+            parts = urlsplit(upstream)
+            self.upstream_parts = parts
+            self.service_path = parts.path or "/"
+            self.ssl_context = ssl._create_unverified_context() if insecure else None
+            cassette.open_for_recording(upstream)
+        else:
+            cassette.load()
+            self.service_path = cassette.service_path
+
+        self.httpd = ThreadingHTTPServer((host, port), ProxyHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.proxy = self
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{self.service_path}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.cassette.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def is_retry(self, kind, key):
+        if kind != "write":
+            return False
+        with self._rejected_lock:
+            if key in self._rejected:
+                self._rejected.discard(key)
+                return True
+        return False
+
+    def note_write(self, key, status):
+        if status == 403:
+            with self._rejected_lock:
+                self._rejected.add(key)
+
+    def exchange(self, handler, key, kind, body):
+        """Kind to count the request as, plus status, headers and body to send"""
+        if self.upstream:
+            return (kind,) + self._forward(handler, key, kind, body)
+        record = self.cassette.next_exchange(key)
+        if record is None:
+            self.unmatched += 1
+            return "unmatched", 404, {"Content-Type": "application/json"}, json.dumps(
+                {"error": {"code": "ProxyReplay", "message": f"No recorded response for {key}"}}).encode()
+        return (kind,) + self._replay(record)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            parts = self.upstream_parts
+            if parts.scheme == "https":
+                conn = http.client.HTTPSConnection(parts.hostname, parts.port or 443,
+                                                   timeout=120, context=self.ssl_context)
+            else:
+                conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=120)
+            self._local.conn = conn
+        return conn
+
+    def _forward(self, handler, key, kind, body):
+        headers = {name: value for name, value in handler.headers.items()
+                   if name.lower() not in HOP_BY_HOP}
+        headers["Host"] = self.upstream_parts.netloc
+        headers["Accept-Encoding"] = "identity"
+        started = time.perf_counter()
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request(handler.command, handler.path, body=body or None, headers=headers)
+                response = conn.getresponse()
+                response_body = response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    return 502, {"Content-Type": "text/plain"}, b"Upstream request failed"
+        elapsed = time.perf_counter() - started
+
+        replayed_headers = {}
+        passthrough = {}
+        for name, value in response.getheaders():
+            lower = name.lower()
+            if lower in RECORDED_HEADERS:
+                replayed_headers[lower] = value
+            if lower not in HOP_BY_HOP:
+                passthrough.setdefault(name, value)
+        self.cassette.record(key, kind, response.status, replayed_headers, response_body, elapsed)
+        return response.status, passthrough, response_body
+
+    def _replay(self, record):
+        delay = self.latency_ms / 1000.0
+        if self.recorded_latency:
+            delay = record.get("ms", 0.0) / 1000.0 * self.latency_scale
+        if self.jitter_ms:
+            delay += random.uniform(0, self.jitter_ms) / 1000.0
+        if delay > 0:
+            time.sleep(delay)
+        return record["status"], record["headers"], record["body"]
+
+
+def run_server(proxy):
+    print(proxy.url, flush=True)
+    mode = f"recording {proxy.upstream}" if proxy.upstream else "replaying"
+    print(f"🎞️  OData proxy {mode} -> {proxy.cassette.path}", file=sys.stderr)
+    # Finish the cassette when stopped with kill as well as with Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        proxy.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        proxy.httpd.server_close()
+        proxy.cassette.close()
+        print_upstream_stats(proxy.stats.snapshot(), source="proxy")
+
+
+def _diff_counts(before, after):
+    counts = {}
+    for kind, count in after["counts"].items():
+        delta = count - before["counts"].get(kind, 0)
+        if delta:
+            counts[kind] = delta
+    return counts
+
+
+def _format_counts(counts):
+    total = sum(count for kind, count in counts.items() if kind != "csrf_rejected")
+    parts = ", ".join(f"{kind} {count}" for kind, count in sorted(counts.items()))
+    return f"{total:>3} round trip{'s' if total != 1 else ''}" + (f" ({parts})" if parts else "")
+
+
+async def measure_calls(proxy, command, calls, timeout):
+    """Run odata-mcp through the proxy and attribute upstream requests to each step"""
+    from mcp_client import MCPStdioClient
+    from mcp_loadgen import build_arguments, response_error, tool_type
+    from mcp_payload_profile import entity_set_of, result_items, result_text
+
+    rows = []
+    before = proxy.stats.snapshot()
+    async with MCPStdioClient(command + ["--service", proxy.url], timeout=timeout) as client:
+        await client.initialize("odata-proxy")
+        tools = await client.list_tools()
+        after = proxy.stats.snapshot()
+        rows.append(("startup (initialize + tools/list)", _diff_counts(before, after), None))
+
+        if not calls:
+            calls = default_calls(tools, build_arguments, tool_type)
+        by_name = {tool['name']: tool for tool in tools}
+        last_items = {}
+        for name, arguments in calls:
+            if arguments is None:
+                tool = by_name.get(name, {})
+                items = last_items.get(entity_set_of(name), [{}])
+                keys = (tool.get('inputSchema') or {}).get('required') or []
+                arguments = {key: items[0].get(key) for key in keys if key in items[0]}
+            before = proxy.stats.snapshot()
+            try:
+                response = await client.call_tool(name, arguments)
+                error = response_error(response)
+            except asyncio.TimeoutError:
+                response, error = None, "timeout"
+            after = proxy.stats.snapshot()
+            if response is not None and error is None and tool_type(name) == "filter":
+                try:
+                    last_items[entity_set_of(name)] = result_items(json.loads(result_text(response))) or [{}]
+                except ValueError:
+                    pass
+            rows.append((name, _diff_counts(before, after), error))
+    return rows
+
+
+def default_calls(tools, build_arguments, tool_type):
+    """One read call per tool type for the first entity set that has a filter tool.
+
+    get keys are filled in from the filter result (arguments None).
+    """
+    from mcp_payload_profile import entity_set_of
+    filters = [t for t in tools if tool_type(t['name']) == "filter"]
+    if not filters:
+        return []
+    entity_set = entity_set_of(filters[0]['name'])
+    calls = []
+    for kind in ("filter", "count", "search", "get"):
+        for tool in tools:
+            if tool_type(tool['name']) == kind and entity_set_of(tool['name']) == entity_set:
+                arguments = None if kind == "get" else build_arguments(tool, kind, 1, 5, random.Random(1))
+                calls.append((tool['name'], arguments))
+                break
+    return calls
+
+
+def parse_call(text):
+    """NAME or NAME={"json": "arguments"}"""
+    name, _, arguments = text.partition("=")
+    return name, json.loads(arguments) if arguments else {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recording / replaying proxy for OData backends")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(p):
+        p.add_argument("--cassette", "-c", required=True, help="cassette file (gzip'd JSON Lines)")
+        p.add_argument("--host", default="127.0.0.1", help="address to bind (default: 127.0.0.1)")
+        p.add_argument("--port", type=int, default=0, help="port to bind (default: any free port)")
+        p.add_argument("--insecure", action="store_true", help="skip TLS verification upstream")
+        p.add_argument("--latency-ms", type=float, default=0.0, help="replay: added latency per request")
+        p.add_argument("--jitter-ms", type=float, default=0.0, help="replay: uniform random extra latency")
+        p.add_argument("--recorded-latency", action="store_true",
+                       help="replay: sleep for the recorded upstream time instead of --latency-ms")
+        p.add_argument("--latency-scale", type=float, default=1.0,
+                       help="replay: multiply recorded latency by this factor (default: 1)")
+
+    record = sub.add_parser("record", help="forward to the real service and record a cassette")
+    add_common(record)
+    record.add_argument("--upstream", required=True, help="real OData service URL")
+    replay = sub.add_parser("replay", help="serve a cassette offline")
+    add_common(replay)
+    measure = sub.add_parser("measure", help="count upstream round trips per MCP tool call",
+                             usage="%(prog)s -c CASSETTE [--upstream URL] [--call NAME=JSON ...] -- odata-mcp [args]")
+    add_common(measure)
+    measure.add_argument("--upstream", help="record while measuring instead of replaying")
+    measure.add_argument("--call", action="append", default=[], type=parse_call,
+                         help='tool call to measure, NAME or NAME=\'{"$top": 5}\' (repeatable; '
+                              'default: one read call per tool type)')
+    measure.add_argument("--timeout", type=float, default=60.0, help="seconds per MCP response")
+
+    argv = sys.argv[1:]
+    server_command = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, server_command = argv[:split], argv[split + 1:]
+    args = parser.parse_args(argv)
+
+    proxy = ODataProxy(Cassette(args.cassette), getattr(args, "upstream", None), args.latency_ms,
+                       args.jitter_ms, args.recorded_latency, args.latency_scale, args.insecure,
+                       args.host, args.port)
+    if args.command != "measure":
+        run_server(proxy)
+        return
+
+    command = server_command or ["./odata-mcp"]
+    with proxy:
+        rows = asyncio.run(measure_calls(proxy, command, args.call, args.timeout))
+        totals = proxy.stats.snapshot()
+
+    print("\n=== Upstream Round Trips per MCP Step ===")
+    width = max(len(name) for name, _, _ in rows)
+    for name, counts, error in rows:
+        suffix = f"  ❌ {error[:80]}" if error else ""
+        print(f"  {name:<{width}}  {_format_counts(counts)}{suffix}")
+    print_upstream_stats(totals, source="proxy")
+    if proxy.unmatched:
+        print(f"\n⚠️  {proxy.unmatched} requests had no recorded response in {args.cassette}")
+    if proxy.unmatched or any(error for _, _, error in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
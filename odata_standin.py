@@ -0,0 +1,618 @@
+#!/usr/bin/env python3
+"""
+Stand-in OData v2/v4 service for benchmarking odata-mcp offline
+
+Serves a synthetic $metadata document, the service document and entity set
+reads with configurable size, latency and CSRF behaviour, and counts every
+upstream request by kind so benchmarks can relate MCP calls to OData calls.
+
+    python3 odata_standin.py --odata-version 2 --entity-sets 20 --rows 5000 \\
+        --latency-ms 25 --payload-bytes 512
+
+The first line on stdout is the service URL to hand to odata-mcp; everything
+else goes to stderr. Counters are exposed at /__standin/stats and cleared by
+a POST to /__standin/reset.
+
+Other scripts either run it in-process (StandInServer) or as a separate
+process (StandInProcess) so the service does not compete with the load
+generator for the GIL.
+"""
+import argparse
+import json
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+V2_SERVICE_PATH = "/sap/opu/odata/sap/ZSTANDIN_0001_SRV/"
+V4_SERVICE_PATH = "/odata/v4/standin/"
+V2_NAMESPACE = "ZSTANDIN_0001_SRV"
+V4_NAMESPACE = "StandIn"
+CSRF_TOKEN = "standin-csrf-token"
+STATS_PATH = "/__standin/stats"
+RESET_PATH = "/__standin/reset"
+
+# Fixed columns every synthetic entity carries; extra columns are appended as
+# Field001.. (Edm.String), Date001.. (Edm.DateTime) and Amount001.. (Edm.Decimal)
+BASE_PROPERTIES = [
+    ("ID", "Edm.Int32"),
+    ("Name", "Edm.String"),
+    ("Price", "Edm.Decimal"),
+    ("CreatedAt", "Edm.DateTime"),
+    ("Payload", "Edm.String"),
+]
+
+REQUEST_KINDS = ("metadata", "service_document", "csrf_fetch", "entity_set", "entity",
+                 "write", "csrf_rejected", "not_found")
+# Requests odata-mcp makes at startup, kept as wall-clock spans (the newest MAX_SPANS)
+SPAN_KINDS = ("metadata", "service_document")
+MAX_SPANS = 1000
+
+_KEY_PREDICATE = re.compile(r"^([^(]+)\((.*)\)$")
+_BASE_EPOCH_MS = 1700000000000
+
+
+class ServiceSpec:
+    """Shape and behaviour of the synthetic service"""
+
+    def __init__(self, odata_version: str = "2", entity_sets: int = 5, properties: int = 0,
+                 rows: int = 1000, payload_bytes: int = 64, latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0, metadata_latency_ms: Optional[float] = None,
+                 csrf: bool = False, searchable: bool = True, read_only: bool = False,
+                 date_properties: int = 0, decimal_properties: int = 0, inline_depth: int = 0):
+        if odata_version not in ("2", "4"):
+            raise ValueError(f"Unsupported OData version: {odata_version}")
+        self.odata_version = odata_version
+        self.entity_sets = entity_sets
+        self.properties = properties
+        self.rows = rows
+        self.payload_bytes = payload_bytes
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.metadata_latency_ms = latency_ms if metadata_latency_ms is None else metadata_latency_ms
+        self.csrf = csrf
+        self.searchable = searchable
+        self.read_only = read_only
+        self.date_properties = date_properties
+        self.decimal_properties = decimal_properties
+        self.inline_depth = inline_depth
+
+    @property
+    def is_v4(self) -> bool:
+        return self.odata_version == "4"
+
+    @property
+    def service_path(self) -> str:
+        return V4_SERVICE_PATH if self.is_v4 else V2_SERVICE_PATH
+
+    @property
+    def namespace(self) -> str:
+        return V4_NAMESPACE if self.is_v4 else V2_NAMESPACE
+
+    def entity_type(self, index: int) -> str:
+        return f"Entity{index:05d}"
+
+    def entity_set(self, index: int) -> str:
+        return f"Entity{index:05d}Set"
+
+    def entity_set_names(self) -> List[str]:
+        return [self.entity_set(i) for i in range(1, self.entity_sets + 1)]
+
+    def property_list(self):
+        return (BASE_PROPERTIES
+                + [(f"Field{i:03d}", "Edm.String") for i in range(1, self.properties + 1)]
+                + [(f"Date{i:03d}", "Edm.DateTime") for i in range(1, self.date_properties + 1)]
+                + [(f"Amount{i:03d}", "Edm.Decimal") for i in range(1, self.decimal_properties + 1)])
+
+    def to_args(self) -> List[str]:
+        """Command line that reproduces this spec in a separate process"""
+        args = ["--odata-version", self.odata_version,
+                "--entity-sets", str(self.entity_sets),
+                "--properties", str(self.properties),
+                "--rows", str(self.rows),
+                "--payload-bytes", str(self.payload_bytes),
+                "--latency-ms", str(self.latency_ms),
+                "--jitter-ms", str(self.jitter_ms),
+                "--metadata-latency-ms", str(self.metadata_latency_ms),
+                "--date-properties", str(self.date_properties),
+                "--decimal-properties", str(self.decimal_properties),
+                "--inline-depth", str(self.inline_depth)]
+        if self.csrf:
+            args.append("--csrf")
+        if not self.searchable:
+            args.append("--not-searchable")
+        if self.read_only:
+            args.append("--read-only")
+        return args
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser):
+    """Register the ServiceSpec options on a benchmark's argument parser"""
+    group = parser.add_argument_group("stand-in service")
+    group.add_argument("--odata-version", choices=("2", "4"), default="2",
+                       help="OData protocol version to serve (default: 2)")
+    group.add_argument("--entity-sets", type=int, default=5,
+                       help="Number of synthetic entity sets (default: 5)")
+    group.add_argument("--properties", type=int, default=0,
+                       help="Extra string properties per entity type (default: 0)")
+    group.add_argument("--rows", type=int, default=1000,
+                       help="Rows per entity set (default: 1000)")
+    group.add_argument("--payload-bytes", type=int, default=64,
+                       help="Size of the Payload column of every row (default: 64)")
+    group.add_argument("--latency-ms", type=float, default=0.0,
+                       help="Added latency per request (default: 0)")
+    group.add_argument("--jitter-ms", type=float, default=0.0,
+                       help="Uniform random jitter added on top of --latency-ms")
+    group.add_argument("--metadata-latency-ms", type=float, default=None,
+                       help="Latency of $metadata (default: same as --latency-ms)")
+    group.add_argument("--csrf", action="store_true",
+                       help="Require an X-CSRF-Token on modifying requests")
+    group.add_argument("--not-searchable", dest="searchable", action="store_false",
+                       help="Mark entity sets sap:searchable=\"false\"")
+    group.add_argument("--read-only", action="store_true",
+                       help="Mark entity sets as not creatable/updatable/deletable")
+    group.add_argument("--date-properties", type=int, default=0,
+                       help="Extra Edm.DateTime properties per entity type (default: 0)")
+    group.add_argument("--decimal-properties", type=int, default=0,
+                       help="Extra Edm.Decimal properties per entity type (default: 0)")
+    group.add_argument("--inline-depth", type=int, default=0,
+                       help="Levels of inline Details entities nested in every row, each "
+                            "with its own __metadata in v2 (default: 0)")
+
+
+def spec_from_args(args: argparse.Namespace) -> ServiceSpec:
+    return ServiceSpec(odata_version=args.odata_version, entity_sets=args.entity_sets,
+                       properties=args.properties, rows=args.rows,
+                       payload_bytes=args.payload_bytes, latency_ms=args.latency_ms,
+                       jitter_ms=args.jitter_ms, metadata_latency_ms=args.metadata_latency_ms,
+                       csrf=args.csrf, searchable=args.searchable, read_only=args.read_only,
+                       date_properties=args.date_properties,
+                       decimal_properties=args.decimal_properties, inline_depth=args.inline_depth)
+
+
+def generate_metadata(spec: ServiceSpec) -> str:
+    """Build the EDMX document for the spec"""
+    return _generate_metadata_v4(spec) if spec.is_v4 else _generate_metadata_v2(spec)
+
+
+def _property_xml(name: str, edm_type: str, v4: bool) -> str:
+    if v4 and edm_type == "Edm.DateTime":
+        edm_type = "Edm.DateTimeOffset"
+    extra = ""
+    if name == "ID":
+        extra = ' Nullable="false"'
+    elif edm_type == "Edm.Decimal":
+        extra = ' Precision="15" Scale="2"'
+    elif edm_type == "Edm.String":
+        extra = ' MaxLength="255"'
+    return f'<Property Name="{name}" Type="{edm_type}"{extra}/>'
+
+
+def _generate_metadata_v2(spec: ServiceSpec) -> str:
+    flag = "false" if spec.read_only else "true"
+    searchable = "true" if spec.searchable else "false"
+    props = "".join(_property_xml(n, t, False) for n, t in spec.property_list())
+    parts = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<edmx:Edmx Version="1.0" xmlns:edmx="http://schemas.microsoft.com/ado/2007/06/edmx"'
+        ' xmlns:m="http://schemas.microsoft.com/ado/2007/08/dataservices/metadata"'
+        ' xmlns:sap="http://www.sap.com/Protocols/SAPData">',
+        '<edmx:DataServices m:DataServiceVersion="2.0">',
+        f'<Schema Namespace="{spec.namespace}" xmlns="http://schemas.microsoft.com/ado/2008/09/edm">',
+    ]
+    for i in range(1, spec.entity_sets + 1):
+        parts.append(f'<EntityType Name="{spec.entity_type(i)}" sap:content-version="1">'
+                     f'<Key><PropertyRef Name="ID"/></Key>{props}</EntityType>')
+    parts.append(f'<EntityContainer Name="{spec.namespace}_Entities" m:IsDefaultEntityContainer="true">')
+    for i in range(1, spec.entity_sets + 1):
+        parts.append(f'<EntitySet Name="{spec.entity_set(i)}" EntityType="{spec.namespace}.{spec.entity_type(i)}"'
+                     f' sap:creatable="{flag}" sap:updatable="{flag}" sap:deletable="{flag}"'
+                     f' sap:searchable="{searchable}" sap:pageable="true" sap:content-version="1"/>')
+    parts += ['</EntityContainer>', '</Schema>', '</edmx:DataServices>', '</edmx:Edmx>']
+    return "\n".join(parts)
+
+
+def _generate_metadata_v4(spec: ServiceSpec) -> str:
+    props = "".join(_property_xml(n, t, True) for n, t in spec.property_list())
+    parts = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<edmx:Edmx Version="4.0" xmlns:edmx="http://docs.oasis-open.org/odata/ns/edmx">',
+        '<edmx:DataServices>',
+        f'<Schema Namespace="{spec.namespace}" xmlns="http://docs.oasis-open.org/odata/ns/edm">',
+    ]
+    for i in range(1, spec.entity_sets + 1):
+        parts.append(f'<EntityType Name="{spec.entity_type(i)}">'
+                     f'<Key><PropertyRef Name="ID"/></Key>{props}</EntityType>')
+    parts.append('<EntityContainer Name="Container">')
+    for i in range(1, spec.entity_sets + 1):
+        parts.append(f'<EntitySet Name="{spec.entity_set(i)}" EntityType="{spec.namespace}.{spec.entity_type(i)}"/>')
+    parts += ['</EntityContainer>', '</Schema>', '</edmx:DataServices>', '</edmx:Edmx>']
+    return "\n".join(parts)
+
+
+class RequestStats:
+    """Thread-safe request counters by kind
+
+    Requests of the SPAN_KINDS, which odata-mcp sends while it starts, are
+    also kept as wall-clock spans so they can be lined up with the
+    timestamps of a --trace-mcp log.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self.counts = {kind: 0 for kind in REQUEST_KINDS}
+        self.seconds = {kind: 0.0 for kind in REQUEST_KINDS}
+        self.bytes_out = 0
+        self.spans = deque(maxlen=MAX_SPANS)
+        self.started = time.time()
+
+    def reset(self):
+        with self.lock:
+            self._clear()
+
+    def record(self, kind: str, elapsed: float, size: int, started_ns: int = 0):
+        with self.lock:
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+            self.seconds[kind] = self.seconds.get(kind, 0.0) + elapsed
+            self.bytes_out += size
+            if kind in SPAN_KINDS and started_ns:
+                self.spans.append({"kind": kind, "start_ns": started_ns,
+                                   "end_ns": started_ns + int(elapsed * 1e9), "bytes": size})
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"counts": dict(self.counts), "seconds": dict(self.seconds),
+                    "bytes_out": self.bytes_out, "spans": list(self.spans),
+                    "uptime": time.time() - self.started}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "ODataStandIn/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def spec(self) -> ServiceSpec:
+        return self.server.spec
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_HEAD(self):
+        self._handle("HEAD")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_MERGE(self):
+        self._handle("MERGE")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def _handle(self, method: str):
+        started_ns = time.time_ns()
+        started = time.perf_counter()
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+        if url.path == STATS_PATH:
+            self._send_json(200, self.server.stats.snapshot())
+            return
+        if url.path == RESET_PATH:
+            self.server.stats.reset()
+            self._send_json(200, {"status": "reset"})
+            return
+
+        kind, status, body, headers = self._route(method, url)
+        self._delay(kind)
+        size = self._send(status, body, headers, method == "HEAD")
+        self.server.stats.record(kind, time.perf_counter() - started, size, started_ns)
+
+    def _delay(self, kind: str):
+        spec = self.spec
+        latency = spec.metadata_latency_ms if kind == "metadata" else spec.latency_ms
+        if spec.jitter_ms:
+            latency += random.uniform(0, spec.jitter_ms)
+        if latency > 0:
+            time.sleep(latency / 1000.0)
+
+    def _route(self, method: str, url):
+        spec = self.spec
+        path = unquote(url.path)
+        if not path.startswith(spec.service_path.rstrip("/")):
+            return "not_found", 404, self._error("Not found"), {}
+        resource = path[len(spec.service_path):].strip("/") if len(path) >= len(spec.service_path) else ""
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        fetch_token = self.headers.get("X-CSRF-Token", "").lower() == "fetch"
+        headers = {"x-csrf-token": CSRF_TOKEN} if fetch_token else {}
+
+        if method in ("POST", "PUT", "PATCH", "MERGE", "DELETE"):
+            if spec.csrf and self.headers.get("X-CSRF-Token") != CSRF_TOKEN:
+                return "csrf_rejected", 403, self._error("CSRF token validation failed"), \
+                    {"x-csrf-token": "Required"}
+            return self._write(method, resource)
+
+        if resource == "$metadata":
+            return "metadata", 200, self.server.metadata, {"Content-Type": "application/xml"}
+        if resource == "":
+            kind = "csrf_fetch" if fetch_token else "service_document"
+            return kind, 200, self._service_document(), headers
+
+        match = _KEY_PREDICATE.match(resource)
+        if match:
+            name, key = match.group(1), match.group(2)
+            if name not in self.server.entity_sets:
+                return "not_found", 404, self._error(f"Resource {name} not found"), headers
+            row_id = _parse_key(key)
+            if row_id is None or not 1 <= row_id <= spec.rows:
+                return "not_found", 404, self._error(f"Entity {resource} not found"), headers
+            return "entity", 200, self._entity(name, row_id, query), headers
+
+        if resource not in self.server.entity_sets:
+            return "not_found", 404, self._error(f"Resource {resource} not found"), headers
+        kind = "csrf_fetch" if fetch_token else "entity_set"
+        return kind, 200, self._collection(resource, query), headers
+
+    def _write(self, method: str, resource: str):
+        if method != "POST":
+            return "write", 204, b"", {}
+        name = resource.split("(")[0]
+        return "write", 201, self._entity(name, self.spec.rows + 1, {}), {}
+
+    def _service_document(self) -> bytes:
+        names = self.spec.entity_set_names()
+        if self.spec.is_v4:
+            doc = {"@odata.context": "$metadata",
+                   "value": [{"name": n, "kind": "EntitySet", "url": n} for n in names]}
+        else:
+            doc = {"d": {"EntitySets": names}}
+        return json.dumps(doc).encode()
+
+    def _row(self, name: str, row_id: int, select: Optional[List[str]], depth: int = 0) -> Dict[str, Any]:
+        spec = self.spec
+        created_ms = _BASE_EPOCH_MS + row_id * 60000
+        row = {}
+        if not spec.is_v4:
+            uri = f"http://{self.headers.get('Host', 'localhost')}{spec.service_path}{name}({row_id})"
+            uri += "/Details" * depth
+            row["__metadata"] = {"id": uri, "uri": uri,
+                                 "type": f"{spec.namespace}.{name[:-3]}"}
+        for prop, edm_type in spec.property_list():
+            if select and prop not in select:
+                continue
+            if prop == "ID":
+                value = row_id
+            elif prop == "Name":
+                value = f"Item {row_id}"
+            elif edm_type == "Edm.Decimal":
+                price = f"{row_id % 10000}.{row_id % 100:02d}"
+                value = float(price) if spec.is_v4 else price
+            elif edm_type == "Edm.DateTime":
+                if spec.is_v4:
+                    value = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(created_ms / 1000))
+                else:
+                    value = f"/Date({created_ms})/"
+            elif prop == "Payload":
+                value = self.server.padding
+            else:
+                value = f"{prop} {row_id}"
+            row[prop] = value
+        if depth < spec.inline_depth and not select:
+            row["Details"] = self._row(name, row_id, None, depth + 1)
+        return row
+
+    def _collection(self, name: str, query: Dict[str, str]) -> bytes:
+        spec = self.spec
+        skip = _int_option(query.get("$skip"), 0)
+        top = _int_option(query.get("$top"), spec.rows)
+        select = [s.strip() for s in query["$select"].split(",")] if query.get("$select") else None
+        first = min(skip, spec.rows)
+        last = min(first + max(top, 0), spec.rows)
+        rows = [self._row(name, i, select) for i in range(first + 1, last + 1)]
+        if spec.is_v4:
+            doc = {"@odata.context": f"$metadata#{name}", "value": rows}
+            if query.get("$count") == "true":
+                doc["@odata.count"] = spec.rows
+        else:
+            doc = {"d": {"results": rows}}
+            if query.get("$inlinecount") == "allpages":
+                doc["d"]["__count"] = str(spec.rows)
+        return json.dumps(doc).encode()
+
+    def _entity(self, name: str, row_id: int, query: Dict[str, str]) -> bytes:
+        select = [s.strip() for s in query["$select"].split(",")] if query.get("$select") else None
+        row = self._row(name, row_id, select)
+        if self.spec.is_v4:
+            row = {"@odata.context": f"$metadata#{name}/$entity", **row}
+            return json.dumps(row).encode()
+        return json.dumps({"d": row}).encode()
+
+    def _error(self, message: str) -> bytes:
+        if self.spec.is_v4:
+            return json.dumps({"error": {"code": "StandIn", "message": message}}).encode()
+        return json.dumps({"error": {"code": "StandIn",
+                                     "message": {"lang": "en", "value": message}}}).encode()
+
+    def _send_json(self, status: int, doc: Any):
+        self._send(status, json.dumps(doc).encode(), {}, False)
+
+    def _send(self, status: int, body, headers: Dict[str, str], head_only: bool) -> int:
+        if isinstance(body, str):
+            body = body.encode()
+        self.send_response(status)
+        if "Content-Type" not in headers:
+            self.send_header("Content-Type", "application/json")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and not head_only:
+            self.wfile.write(body)
+        return len(body)
+
+
+def _parse_key(key: str) -> Optional[int]:
+    if "=" in key:
+        key = key.split("=", 1)[1]
+    key = key.strip("'")
+    try:
+        return int(key)
+    except ValueError:
+        return None
+
+
+def _int_option(value: Optional[str], default: int) -> int:
+    try:
+        return int(value) if value is not None else default
+    except ValueError:
+        return default
+
+
+class StandInServer:
+    """Runs the stand-in service on a background thread of this process"""
+
+    def __init__(self, spec: ServiceSpec, host: str = "127.0.0.1", port: int = 0):
+        self.spec = spec
+        self.httpd = ThreadingHTTPServer((host, port), StandInHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.spec = spec
+        self.httpd.stats = RequestStats()
+        self.httpd.metadata = generate_metadata(spec).encode()
+        self.httpd.entity_sets = set(spec.entity_set_names())
+        self.httpd.padding = "x" * spec.payload_bytes
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{self.spec.service_path}"
+
+    def start(self) -> "StandInServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stats(self) -> Dict[str, Any]:
+        return self.httpd.stats.snapshot()
+
+    def reset(self):
+        self.httpd.stats.reset()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class StandInProcess:
+    """Runs the stand-in service as a child process and talks to its stats endpoint"""
+
+    def __init__(self, spec: ServiceSpec, port: int = 0):
+        self.spec = spec
+        self.port = port
+        self.proc = None
+        self.url = None
+
+    def start(self) -> "StandInProcess":
+        self.proc = subprocess.Popen(
+            [sys.executable, __file__, "--port", str(self.port)] + self.spec.to_args(),
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        self.url = self.proc.stdout.readline().strip()
+        if not self.url:
+            self.proc.wait()
+            raise RuntimeError(f"Stand-in service failed to start (exit code {self.proc.returncode})")
+        return self
+
+    def _control(self, path: str, method: str = "GET") -> Dict[str, Any]:
+        parts = urlsplit(self.url)
+        request = urllib.request.Request(f"{parts.scheme}://{parts.netloc}{path}",
+                                         data=b"" if method == "POST" else None, method=method)
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return json.loads(response.read())
+
+    def stats(self) -> Dict[str, Any]:
+        return self._control(STATS_PATH)
+
+    def reset(self):
+        self._control(RESET_PATH, "POST")
+
+    def stop(self):
+        if self.proc and self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(5)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def print_upstream_stats(stats: Dict[str, Any], calls: int = 0, source: str = "stand-in"):
+    """Print request counters by kind, optionally relative to a number of MCP calls"""
+    print(f"\n=== Upstream OData Requests ({source}) ===")
+    extra = sorted(kind for kind in stats["counts"] if kind not in REQUEST_KINDS)
+    for kind in list(REQUEST_KINDS) + extra:
+        count = stats["counts"].get(kind, 0)
+        if not count:
+            continue
+        avg_ms = stats["seconds"][kind] / count * 1000
+        line = f"  {kind:<18} {count:>8}  avg {avg_ms:8.2f} ms"
+        if calls:
+            line += f"  ({count / calls:.2f} per MCP call)"
+        print(line)
+    print(f"  {'bytes sent':<18} {stats['bytes_out']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in OData v2/v4 service for odata-mcp benchmarks")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=0, help="Port to bind (default: any free port)")
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+
+    server = StandInServer(spec_from_args(args), args.host, args.port)
+    print(server.url, flush=True)
+    spec = server.spec
+    print(f"📡 OData v{spec.odata_version} stand-in: {spec.entity_sets} entity sets x {spec.rows} rows, "
+          f"{spec.latency_ms:g} ms latency, {spec.payload_bytes} byte payloads", file=sys.stderr)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
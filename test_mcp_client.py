@@ -1,97 +1,108 @@
 #!/usr/bin/env python3
 """
 Test MCP client simulator to diagnose validation errors
+
+All edge cases are sent over one server session. With --pipeline N the
+client also keeps N tools/call requests in flight at once and reports
+whether the server answered them concurrently or one after another.
+
+Requests are timed; --record and --compare keep a performance baseline
+per server version (see mcp_baseline.py).
 """
-import json
-import subprocess
+import argparse
+import asyncio
 import sys
+import time
+
+from mcp_baseline import TimingRecorder, add_baseline_arguments, finish_baseline, probe_server, trial_count
+from mcp_client import MCPStdioClient
 
-def send_request(request):
+async def send_request(client, request, recorder=None, name=None):
     """Send a request to the MCP server and return the response"""
+    start = time.perf_counter()
     try:
-        proc = subprocess.Popen(
-            ['./odata-mcp'],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        stdout, stderr = proc.communicate(json.dumps(request))
-        
-        if stderr:
-            print(f"STDERR: {stderr}", file=sys.stderr)
-            
-        return json.loads(stdout) if stdout else None
+        response = await client.send(request)
     except Exception as e:
-        print(f"Error: {e}", file=sys.stderr)
+        print(f"Error: {e!r}", file=sys.stderr)
         return None
+    if recorder is not None:
+        recorder.add_request(name, request.get('method'), time.perf_counter() - start)
+    return response
 
-def test_edge_cases():
-    """Test various edge cases that might cause validation errors"""
-    tests = [
-        # Test 1: Standard initialize
-        {
-            "name": "Standard initialize",
-            "request": {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "initialize",
-                "params": {
-                    "protocolVersion": "2024-11-05",
-                    "capabilities": {},
-                    "clientInfo": {"name": "test", "version": "1.0"}
-                }
-            }
-        },
-        # Test 2: Initialize with missing params
-        {
-            "name": "Initialize without params",
-            "request": {
-                "jsonrpc": "2.0",
-                "id": 2,
-                "method": "initialize"
+# Hand-picked edge cases; mcp_fuzz.py also uses them as grammar seeds
+EDGE_CASES = [
+    # Test 1: Standard initialize
+    {
+        "name": "Standard initialize",
+        "request": {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "initialize",
+            "params": {
+                "protocolVersion": "2024-11-05",
+                "capabilities": {},
+                "clientInfo": {"name": "test", "version": "1.0"}
             }
-        },
-        # Test 3: Tools/list with extra params
-        {
-            "name": "Tools/list with cursor",
-            "request": {
-                "jsonrpc": "2.0",
-                "id": 3,
-                "method": "tools/list",
-                "params": {"cursor": None}
-            }
-        },
-        # Test 4: Tools/call with missing arguments
-        {
-            "name": "Tools/call without arguments",
-            "request": {
-                "jsonrpc": "2.0",
-                "id": 4,
-                "method": "tools/call",
-                "params": {
-                    "name": "odata_service_info_for_Z001"
-                }
+        }
+    },
+    # Test 2: Initialize with missing params
+    {
+        "name": "Initialize without params",
+        "request": {
+            "jsonrpc": "2.0",
+            "id": 2,
+            "method": "initialize"
+        }
+    },
+    # Test 3: Tools/list with extra params
+    {
+        "name": "Tools/list with cursor",
+        "request": {
+            "jsonrpc": "2.0",
+            "id": 3,
+            "method": "tools/list",
+            "params": {"cursor": None}
+        }
+    },
+    # Test 4: Tools/call with missing arguments
+    {
+        "name": "Tools/call without arguments",
+        "request": {
+            "jsonrpc": "2.0",
+            "id": 4,
+            "method": "tools/call",
+            "params": {
+                "name": "odata_service_info_for_Z001"
             }
-        },
-        # Test 5: Tools/call with null arguments
-        {
-            "name": "Tools/call with null arguments",
-            "request": {
-                "jsonrpc": "2.0",
-                "id": 5,
-                "method": "tools/call",
-                "params": {
-                    "name": "odata_service_info_for_Z001",
-                    "arguments": None
-                }
+        }
+    },
+    # Test 5: Tools/call with null arguments
+    {
+        "name": "Tools/call with null arguments",
+        "request": {
+            "jsonrpc": "2.0",
+            "id": 5,
+            "method": "tools/call",
+            "params": {
+                "name": "odata_service_info_for_Z001",
+                "arguments": None
             }
         }
-    ]
+    }
+]
+
+async def test_edge_cases(client, recorder=None, verbose=True):
+    """Test various edge cases that might cause validation errors"""
+    tests = EDGE_CASES
     
-    for test in tests:
+    # Pipeline every edge case, then report in order
+    responses = await asyncio.gather(*[send_request(client, t['request'], recorder, t['name'])
+                                       for t in tests])
+    if not verbose:
+        return
+
+    for test, response in zip(tests, responses):
         print(f"\n=== {test['name']} ===")
-        response = send_request(test['request'])
         
         if response:
             if 'error' in response:
@@ -101,7 +112,83 @@ def test_edge_cases():
         else:
             print("FAILED: No response")
 
+async def test_pipelining(client, tool, count, arguments=None, recorder=None, verbose=True):
+    """Keep `count` tools/call requests in flight and compare with a single call.
+
+    The stdio transport reads, handles and writes one message at a time, so a
+    serializing server shows a wall time close to count x the single latency.
+    """
+    if verbose:
+        print(f"\n=== Pipelining {count} x tools/call {tool} ===")
+    start = time.perf_counter()
+    single = await client.call_tool(tool, arguments)
+    single_latency = time.perf_counter() - start
+    if 'error' in single:
+        print(f"ERROR: {single['error']}")
+        return
+
+    latencies = []
+
+    async def timed_call():
+        t0 = time.perf_counter()
+        response = await client.call_tool(tool, arguments)
+        latencies.append(time.perf_counter() - t0)
+        return response
+
+    start = time.perf_counter()
+    responses = await asyncio.gather(*[timed_call() for _ in range(count)], return_exceptions=True)
+    wall = time.perf_counter() - start
+    failures = sum(1 for r in responses if isinstance(r, Exception) or 'error' in r)
+    if recorder is not None:
+        recorder.add("pipeline:single tools/call", single_latency)
+        recorder.add(f"pipeline:{count} tools/call in flight", wall)
+    if not verbose:
+        return
+
+    ratio = wall / (count * single_latency) if single_latency > 0 else 0.0
+    print(f"Single call latency: {single_latency * 1000:.1f} ms")
+    print(f"Pipelined wall time: {wall * 1000:.1f} ms for {count} calls ({failures} failed)")
+    if latencies:
+        print(f"Per-call latency:    min {min(latencies) * 1000:.1f} ms, max {max(latencies) * 1000:.1f} ms")
+    print(f"Serialization ratio: {ratio:.2f} (1.0 = fully serialized, {1 / count:.2f} = fully concurrent)")
+
+async def run_trial(args, recorder, verbose):
+    async with MCPStdioClient(args.server_command, timeout=args.timeout) as client:
+        await test_edge_cases(client, recorder, verbose)
+        if args.pipeline:
+            tool = args.tool
+            if not tool:
+                tools = await client.list_tools()
+                if not tools:
+                    print("\nNo tools available for pipelining")
+                    return
+                tool = tools[0]['name']
+            await test_pipelining(client, tool, args.pipeline, recorder=recorder, verbose=verbose)
+
+async def main(args, recorder):
+    trials = trial_count(args)
+    for trial in range(trials):
+        await probe_server(args.server_command, recorder, args.timeout)
+        await run_trial(args, recorder, verbose=trial == 0)
+    if trials > 1:
+        print(f"\nRan {trials} trials")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MCP server edge case testing")
+    parser.add_argument("--pipeline", type=int, default=0, metavar="N",
+                        help="also send N concurrent tools/call requests")
+    parser.add_argument("--tool", help="tool to pipeline (default: first tool from tools/list)")
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="seconds to wait for each response (default: 30)")
+    add_baseline_arguments(parser)
+    parser.add_argument("server_command", nargs=argparse.REMAINDER,
+                        help="server command (default: ./odata-mcp)")
+    args = parser.parse_args()
+    args.server_command = args.server_command or ['./odata-mcp']
+
     print("MCP Server Edge Case Testing")
     print("============================")
-    test_edge_cases()
\ No newline at end of file
+    recorder = TimingRecorder()
+    asyncio.run(main(args, recorder))
+    if not finish_baseline(args, "edge_cases", recorder, args.server_command):
+        sys.exit(1)
\ No newline at end of file
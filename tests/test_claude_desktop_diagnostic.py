@@ -0,0 +1,49 @@
+"""StreamedArray over responses split into small chunks"""
+import asyncio
+import json
+import unittest
+
+from claude_desktop_diagnostic import StreamedArray
+
+
+async def chunked(data, size):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def stream(text, key, size):
+    array = StreamedArray(chunked(text.encode(), size), key)
+
+    async def collect():
+        return [item async for item in array]
+
+    return asyncio.run(collect()), array
+
+
+class StreamedArrayTest(unittest.TestCase):
+    def test_numbers_split_across_chunks(self):
+        for size in (1, 2, 3):
+            items, array = stream('{"tools":[1, 2.5, 300, -4e10, 6]}', "tools", size)
+            self.assertEqual(items, [1, 2.5, 300, -4e10, 6], f"chunk size {size}")
+            self.assertEqual(array.envelope, {"tools": []})
+
+    def test_mixed_elements_and_envelope(self):
+        response = {"jsonrpc": "2.0", "id": 2, "result": {
+            "tools": [{"name": "filter_Products", "inputSchema": {"type": "object"}},
+                      "é text", True, None, [0.25, {"a": []}], 12345678901234567890],
+            "nextCursor": "c1"}}
+        text = json.dumps(response, ensure_ascii=False)
+        for size in (1, 4, 7, len(text)):
+            items, array = stream(text, "tools", size)
+            self.assertEqual(items, response["result"]["tools"], f"chunk size {size}")
+            self.assertEqual(array.count, len(items))
+            self.assertEqual(array.envelope["result"]["nextCursor"], "c1")
+            self.assertEqual(array.envelope["result"]["tools"], [])
+
+    def test_truncated_array(self):
+        with self.assertRaises(json.JSONDecodeError):
+            stream('{"tools":[1, 2', "tools", 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
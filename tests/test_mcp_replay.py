@@ -0,0 +1,71 @@
+"""Replay of traces that reuse request ids"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+from mcp_client import MCPStdioClient
+from mcp_replay import ReplayReport, TraceReplayer
+
+# Answers one line at a time, slowly enough for replayed requests to overlap
+ECHO_SERVER = """
+import json, sys, time
+for line in sys.stdin:
+    msg = json.loads(line)
+    time.sleep(0.05)
+    print(json.dumps({"jsonrpc": "2.0", "id": msg["id"], "result": {"echo": msg["params"]}}), flush=True)
+"""
+
+
+def trace_line(level, data, ts):
+    return json.dumps({"data": data, "level": level, "message": "", "timestamp": ts}, sort_keys=True)
+
+
+def write_trace(path, requests):
+    """Record each request and its echo response, all sent at the same instant"""
+    ts = "2026-01-01T00:00:00.000000001Z"
+    with open(path, "w") as f:
+        for msg in requests:
+            raw = json.dumps(msg)
+            f.write(trace_line("TRANSPORT_IN", {"raw": raw, "size": len(raw)}, ts) + "\n")
+        for msg in requests:
+            out = json.dumps({"jsonrpc": "2.0", "id": msg["id"], "result": {"echo": msg["params"]}})
+            f.write(trace_line("TRANSPORT_OUT", {"id": msg["id"], "has_result": True, "has_error": False,
+                                                 "method": ""}, ts) + "\n")
+            f.write(trace_line("TRANSPORT_RAW_OUT", {"raw": out, "size": len(out)}, ts) + "\n")
+
+
+class DuplicateIdReplayTest(unittest.TestCase):
+    def replay(self, fast):
+        requests = [{"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": f"call_{n}"}}
+                    for n in range(4)]
+        requests.append({"jsonrpc": "2.0", "id": "a", "method": "ping", "params": {}})
+        report = ReplayReport([])
+        with tempfile.TemporaryDirectory() as tmp:
+            trace = os.path.join(tmp, "trace.log")
+            server = os.path.join(tmp, "server.py")
+            write_trace(trace, requests)
+            with open(server, "w") as f:
+                f.write(ECHO_SERVER)
+
+            async def run():
+                async with MCPStdioClient([sys.executable, server], timeout=10) as client:
+                    await TraceReplayer(client, report, speed=1000, fast=fast, concurrency=4,
+                                        timeout=10).run(trace)
+
+            asyncio.run(run())
+        return report
+
+    def test_fast_concurrent_duplicate_ids(self):
+        report = self.replay(fast=True)
+        self.assertEqual(dict(report.outcomes), {"identical": 5})
+
+    def test_timed_overlapping_duplicate_ids(self):
+        report = self.replay(fast=False)
+        self.assertEqual(dict(report.outcomes), {"identical": 5})
+
+
+if __name__ == "__main__":
+    unittest.main()
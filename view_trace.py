@@ -1,148 +1,1633 @@
 #!/usr/bin/env python3
 """
 MCP Trace Viewer - Analyzes and displays MCP trace logs
+
+The trace is read once as a stream. Each line's level is peeked at without
+decoding the JSON, only the levels a summary needs are decoded, and the
+summary is built from running counters, so memory stays flat no matter how
+large the trace file grows.
+
+Requests are matched to responses by id to report per-method and per-tool
+latency percentiles (TRANSPORT_IN to TRANSPORT_OUT) and the slowest calls.
+
+For random access, `index` writes a SQLite sidecar (<trace>.idx) with the
+byte offset of every request, response and error, keyed by id, method,
+tool and timestamp. It is extended incrementally as the trace grows, and
+`query` reads only the matching lines through a memory-mapped file:
+
+    view_trace.py [analyze] [trace]            summary report (default)
+    view_trace.py --follow [trace]             live dashboard of a growing trace
+    view_trace.py fleet DIR|GLOB... [--jobs N] one merged report for many traces
+    view_trace.py index trace.log              build / refresh the sidecar
+    view_trace.py query trace.log --id 48213
+    view_trace.py query trace.log --tool filter_Orders --since 10:00 --until 10:05
+    view_trace.py timeline [trace] [-o out.json]   Chrome trace-event / Perfetto timeline
+    view_trace.py columns trace.log [--format parquet]   export columns for fast analysis
+    view_trace.py analyze trace.log.cols       summary report from the columns
+
+The timeline shows every request as a span from TRANSPORT_IN to
+TRANSPORT_RAW_OUT, split into parse, handle and marshal phases, with an
+in-flight counter, response sizes and the idle gaps between requests.
+Trace lines are fsynced as they are written, so each phase includes the
+cost of writing its own trace line.
+
+`columns` decodes the trace once, including the JSON-RPC message nested in
+each data.raw, and writes one array per field: timestamp (int64 ns), byte
+offset, line length, level, method, tool, id, payload size, flags (error,
+result, invalid JSON) and error signature. Levels, names and signatures
+are dictionary-encoded to ints listed in meta.json. The arrays are .npy
+files, written without numpy, or a Parquet file with pyarrow. `analyze`
+on that directory memory-maps them and computes the summary with numpy
+(requests are paired with responses by sorting on id), so a multi-GB trace
+is re-analyzed in milliseconds instead of being parsed again.
 """
+import argparse
+import array
+import glob
+import gzip
+import hashlib
+import heapq
 import json
+import math
+import mmap
+import re
+import shutil
+import sqlite3
+import struct
 import sys
 import os
+import tempfile
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
-from collections import defaultdict
 
-def analyze_trace(filename):
+try:
+    import numpy as np
+except ImportError:  # only needed to analyze exported columns
+    np = None
+
+# Read the trace in large blocks; lines are split out of the buffer
+READ_BUFFER_SIZE = 4 * 1024 * 1024
+
+# TraceLogger marshals a map, so keys are sorted and "level" follows "data";
+# the last occurrence of this marker on a line is therefore the real level.
+# Quotes inside JSON strings are always escaped, so "data" cannot fake it.
+_LEVEL_MARKER = b'"level":"'
+
+KNOWN_METHODS = {'initialize', 'initialized', 'tools/list', 'resources/list',
+                 'prompts/list', 'tools/call', 'ping'}
+
+SUMMARY_LEVELS = ('TRANSPORT_IN', 'TRANSPORT_OUT', 'ERROR')
+
+
+def iter_lines(f, offset=0, line_no=1, complete_only=False):
+    """Yield (line_no, byte_offset, line) for each line of a binary file.
+
+    With complete_only, stop at a trailing line that is still being written.
+    """
+    for line in f:
+        if complete_only and not line.endswith(b'\n'):
+            return
+        yield line_no, offset, line
+        offset += len(line)
+        line_no += 1
+
+
+def peek_level(line):
+    """Return the level of a trace line without decoding it, or None if unsure"""
+    pos = line.rfind(_LEVEL_MARKER)
+    if pos < 0 or not line.rstrip().endswith(b'"}'):
+        return None
+    start = pos + len(_LEVEL_MARKER)
+    end = line.find(b'"', start)
+    if end < 0:
+        return None
+    return line[start:end].decode('ascii', 'replace')
+
+
+def decode_line(line, levels=None):
+    """Decode one trace line if its level is in `levels` (all levels if None).
+
+    Returns (level, entry), (None, None) for invalid JSON, or None when the
+    line's level is not wanted.
+    """
+    level = peek_level(line)
+    if level is not None and levels is not None and level not in levels:
+        return None
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return None, None
+    if not isinstance(entry, dict):
+        entry = {}
+    level = entry.get('level', '')
+    if levels is None or level in levels:
+        return level, entry
+    return None
+
+
+def iter_entries(lines, levels=None):
+    """Decode trace lines lazily.
+
+    Yields (line_no, offset, level, entry) for lines whose level is in
+    `levels` (all levels if None). Lines that are not valid JSON are yielded
+    with entry None so callers can warn about them.
+    """
+    for line_no, offset, line in lines:
+        decoded = decode_line(line, levels)
+        if decoded is not None:
+            yield (line_no, offset) + decoded
+
+
+def decode_raw(entry):
+    """Decode the JSON-RPC message carried in a TRANSPORT_IN entry's data.raw"""
+    data = entry.get('data') or {}
+    raw = data.get('raw', '') if isinstance(data, dict) else ''
+    if not raw:
+        return None
+    try:
+        msg = json.loads(raw.strip())
+    except ValueError:
+        return None
+    return msg if isinstance(msg, dict) else None
+
+
+def parse_timestamp_ns(ts):
+    """Convert an RFC3339Nano trace timestamp to integer nanoseconds since the epoch"""
+    if not ts:
+        return None
+    try:
+        # Split off the zone, then the fraction, which may have up to 9 digits
+        if ts.endswith('Z'):
+            base, zone = ts[:-1], '+00:00'
+        else:
+            base, zone = ts[:-6], ts[-6:]
+        base, _, frac = base.partition('.')
+        seconds = int(datetime.fromisoformat(base + zone).timestamp())
+        return seconds * 1_000_000_000 + int((frac + '000000000')[:9])
+    except ValueError:
+        return None
+
+
+def hashable_id(msg_id):
+    """Request ids used as set/dict keys; non-scalar ids are not tracked"""
+    if isinstance(msg_id, (dict, list)):
+        return None
+    return msg_id
+
+
+def tool_name(msg):
+    """Tool name of a tools/call request, or None"""
+    if msg.get('method') != 'tools/call':
+        return None
+    params = msg.get('params')
+    name = params.get('name') if isinstance(params, dict) else None
+    return name if isinstance(name, str) else None
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram in nanoseconds.
+
+    Buckets are 1/32 of a power of two wide, so percentiles are accurate to
+    about 2% with a fixed number of buckets however many samples are added.
+    """
+
+    BUCKETS_PER_DOUBLING = 32
+
+    def __init__(self):
+        self.buckets = defaultdict(int)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value_ns):
+        value_ns = max(int(value_ns), 0)
+        bucket = int(math.log2(value_ns) * self.BUCKETS_PER_DOUBLING) if value_ns > 0 else -1
+        self.buckets[bucket] += 1
+        self.count += 1
+        self.total += value_ns
+        self.min = value_ns if self.min is None else min(self.min, value_ns)
+        self.max = value_ns if self.max is None else max(self.max, value_ns)
+
+    def merge(self, other):
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] += count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def percentile(self, pct):
+        """Approximate value at the given percentile (0-100), or None if empty"""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(pct / 100.0 * self.count))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                if bucket < 0:
+                    return 0
+                # Geometric middle of the bucket, clamped to what was observed
+                value = 2 ** ((bucket + 0.5) / self.BUCKETS_PER_DOUBLING)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+
+class TraceSummary:
+    """Incremental counters describing one trace"""
+
+    def __init__(self, slowest=10):
+        self.requests = 0
+        self.responses = 0
+        self.error_entries = 0
+        self.error_responses = 0
+        self.methods = defaultdict(int)
+        # Requests not answered yet. stdio responses always follow their
+        # request, so answered ids can be dropped instead of remembered.
+        self.pending_ids = set()
+        # id -> (method, tool, timestamp ns, line) for requests in flight
+        self.in_flight = {}
+        self.method_latency = defaultdict(LatencyHistogram)
+        self.tool_latency = defaultdict(LatencyHistogram)
+        # Min-heap of the N slowest calls:
+        # (latency ns, request line, response line, method, tool, id)
+        self.slowest_limit = slowest
+        self.slowest = []
+        # Normalized error message -> count. Error responses only carry
+        # their message in the following TRANSPORT_RAW_OUT entry, which is
+        # decoded only when a caller feeds that level.
+        self.error_signatures = defaultdict(int)
+        self.awaiting_error_raw = False
+        # Unanswered requests of traces merged into this one
+        self.merged_unanswered = 0
+
+    @property
+    def has_errors(self):
+        return self.error_entries > 0 or self.error_responses > 0
+
+    @property
+    def unanswered(self):
+        return len(self.pending_ids) + self.merged_unanswered
+
+    def add_request(self, msg, ts_ns=None, line_no=0):
+        self.requests += 1
+        self.methods[msg['method']] += 1
+        msg_id = hashable_id(msg.get('id'))
+        if msg_id is not None:
+            self.pending_ids.add(msg_id)
+            if ts_ns is not None:
+                self.in_flight[msg_id] = (msg['method'], tool_name(msg), ts_ns, line_no)
+
+    def add_response(self, data, ts_ns=None, line_no=0):
+        msg_id = hashable_id(data.get('id'))
+        if data.get('has_error'):
+            self.error_responses += 1
+            self.awaiting_error_raw = True
+        else:
+            self.responses += 1
+            if msg_id is not None:
+                self.pending_ids.discard(msg_id)
+
+        started = self.in_flight.pop(msg_id, None) if msg_id is not None else None
+        if started is not None and ts_ns is not None:
+            method, tool, start_ns, request_line = started
+            self.add_latency(ts_ns - start_ns, method, tool, msg_id, request_line, line_no)
+
+    def add_latency(self, latency_ns, method, tool, msg_id, request_line, response_line):
+        self.method_latency[method].add(latency_ns)
+        if tool:
+            self.tool_latency[tool].add(latency_ns)
+        if self.slowest_limit > 0:
+            item = (latency_ns, request_line, response_line, method, tool, msg_id)
+            if len(self.slowest) < self.slowest_limit:
+                heapq.heappush(self.slowest, item)
+            elif item[0] > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, item)
+
+    def add_error(self, entry):
+        self.error_entries += 1
+        data = entry.get('data')
+        detail = data.get('error') if isinstance(data, dict) else None
+        message = str(entry.get('message'))
+        self.error_signatures[error_signature(f"{message}: {detail}" if detail else message)] += 1
+
+    def add_error_output(self, entry):
+        """Record the error carried by the raw output following an error response"""
+        self.awaiting_error_raw = False
+        msg = decode_raw(entry)
+        error = msg.get('error') if msg else None
+        if isinstance(error, dict):
+            self.error_signatures[error_signature(f"[{error.get('code')}] {error.get('message')}")] += 1
+
+    def add(self, level, entry, line_no=0):
+        """Feed one decoded entry; returns the request message for TRANSPORT_IN"""
+        if level == 'TRANSPORT_IN':
+            msg = decode_raw(entry)
+            if msg is not None and 'method' in msg:
+                self.add_request(msg, parse_timestamp_ns(entry.get('timestamp')), line_no)
+                return msg
+        elif level == 'TRANSPORT_OUT':
+            data = entry.get('data', {})
+            self.add_response(data if isinstance(data, dict) else {},
+                              parse_timestamp_ns(entry.get('timestamp')), line_no)
+        elif level == 'ERROR':
+            self.add_error(entry)
+        elif level == 'TRANSPORT_RAW_OUT' and self.awaiting_error_raw:
+            self.add_error_output(entry)
+        return None
+
+    def compact(self):
+        """Drop per-request state so the summary is small enough to ship and merge"""
+        self.merged_unanswered += len(self.pending_ids)
+        self.pending_ids = set()
+        self.in_flight = {}
+        return self
+
+    def merge(self, other):
+        """Add another (compacted) summary's counters into this one"""
+        self.requests += other.requests
+        self.responses += other.responses
+        self.error_entries += other.error_entries
+        self.error_responses += other.error_responses
+        self.merged_unanswered += other.unanswered
+        for method, count in other.methods.items():
+            self.methods[method] += count
+        for signature, count in other.error_signatures.items():
+            self.error_signatures[signature] += count
+        for mine, theirs in ((self.method_latency, other.method_latency),
+                             (self.tool_latency, other.tool_latency)):
+            for name, hist in theirs.items():
+                mine[name].merge(hist)
+        for item in other.slowest:
+            if len(self.slowest) < self.slowest_limit:
+                heapq.heappush(self.slowest, item)
+            elif self.slowest_limit and item[0] > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, item)
+
+    def unknown_methods(self):
+        return set(self.methods.keys()) - KNOWN_METHODS - {''}
+
+    def issues(self):
+        issues = []
+
+        # Check if all requests got responses
+        if self.pending_ids:
+            issues.append(f"Requests without responses: {set(self.pending_ids)}")
+
+        # Check for unknown methods
+        unknown = self.unknown_methods()
+        if unknown:
+            issues.append(f"Unknown methods: {unknown}")
+        return issues
+
+
+_SIGNATURE_NOISE = [
+    (re.compile(r"'[^']*'"), "'…'"),
+    (re.compile(r'\\?"[^"\\]*\\?"'), '"…"'),
+    (re.compile(r'\b[0-9a-fA-F]{8,}\b'), '<hex>'),
+    (re.compile(r'\d+'), 'N'),
+]
+
+
+def error_signature(message, limit=160):
+    """Normalize an error message so occurrences that differ only in ids,
+    numbers or quoted values group together"""
+    # Keep the JSON-RPC code readable: "[-32602]" stays as is
+    code, _, rest = message.partition('] ') if message.startswith('[') else ('', '', message)
+    for pattern, replacement in _SIGNATURE_NOISE:
+        rest = pattern.sub(replacement, rest)
+    signature = f"{code}] {rest}" if code else rest
+    return signature[:limit]
+
+
+def describe_request(line_no, msg):
+    """Request sequence lines for one request"""
+    lines = [f"  Line {line_no}: {msg['method']} (id: {msg.get('id')})\n"]
+    if msg['method'] == 'initialize':
+        params = msg.get('params') or {}
+        client = params.get('clientInfo', {})
+        if client:
+            lines.append(f"    Client: {client.get('name')} v{client.get('version')}\n")
+        caps = params.get('capabilities', {})
+        if caps:
+            lines.append(f"    Capabilities: {', '.join(caps.keys())}\n")
+    return lines
+
+
+def _ms(value_ns):
+    return "-" if value_ns is None else f"{value_ns / 1e6:.1f}"
+
+
+def print_latency_table(title, histograms):
+    """Print count and p50/p90/p99/max latency (ms) per key, slowest p99 first"""
+    if not histograms:
+        return
+    print(title)
+    width = max(len(name) for name in histograms)
+    print(f"  {'':<{width}}  {'count':>7}  {'p50':>9}  {'p90':>9}  {'p99':>9}  {'max':>9}")
+    rows = sorted(histograms.items(), key=lambda kv: kv[1].percentile(99), reverse=True)
+    for name, hist in rows:
+        print(f"  {name:<{width}}  {hist.count:>7}  {_ms(hist.percentile(50)):>9}  "
+              f"{_ms(hist.percentile(90)):>9}  {_ms(hist.percentile(99)):>9}  {_ms(hist.max):>9}")
+    print()
+
+
+def print_latency_report(summary):
+    if not summary.method_latency:
+        return
+    print_latency_table("⏱️  Latency by method (ms):", summary.method_latency)
+    print_latency_table("⏱️  Latency by tool (ms):", summary.tool_latency)
+
+    if summary.slowest:
+        print(f"🐢 Slowest {len(summary.slowest)} calls:")
+        for latency, request_line, response_line, method, tool, msg_id in sorted(summary.slowest, reverse=True):
+            name = f"{method} {tool}" if tool else method
+            print(f"  {_ms(latency):>9} ms  {name} (id: {msg_id}) lines {request_line}-{response_line}")
+        print()
+
+
+def describe_error(line_no, entry):
+    lines = [f"  Line {line_no}: {entry.get('message')}\n"]
+    if entry.get('data'):
+        lines.append(f"    Details: {entry['data']}\n")
+    return lines
+
+
+def analyze_trace(filename, slowest=10):
     """Analyze MCP trace file and display summary"""
     print(f"=== MCP Trace Analysis ===")
     print(f"File: {filename}")
     print()
-    
-    requests = []
-    responses = []
-    errors = []
-    methods = defaultdict(int)
-    
-    with open(filename, 'r') as f:
-        for line_no, line in enumerate(f, 1):
-            try:
-                entry = json.loads(line.strip())
-                level = entry.get('level', '')
-                
-                if level == 'TRANSPORT_IN':
-                    data = entry.get('data', {})
-                    raw = data.get('raw', '')
-                    if raw:
-                        try:
-                            msg = json.loads(raw.strip())
-                            if 'method' in msg:
-                                methods[msg['method']] += 1
-                                requests.append({
-                                    'line': line_no,
-                                    'time': entry.get('timestamp'),
-                                    'method': msg['method'],
-                                    'id': msg.get('id'),
-                                    'params': msg.get('params', {})
-                                })
-                        except:
-                            pass
-                
-                elif level == 'TRANSPORT_OUT':
-                    data = entry.get('data', {})
-                    if data.get('has_error'):
-                        errors.append({
-                            'line': line_no,
-                            'time': entry.get('timestamp'),
-                            'id': data.get('id')
-                        })
-                    else:
-                        responses.append({
-                            'line': line_no,
-                            'time': entry.get('timestamp'),
-                            'id': data.get('id')
-                        })
-                
-                elif level == 'ERROR':
-                    errors.append({
-                        'line': line_no,
-                        'time': entry.get('timestamp'),
-                        'message': entry.get('message'),
-                        'data': entry.get('data')
-                    })
-                    
-            except json.JSONDecodeError:
+
+    summary = TraceSummary(slowest=slowest)
+
+    # The per-request listings are printed after the summary, so they are
+    # spooled to disk rather than kept in memory
+    with open(filename, 'rb', buffering=READ_BUFFER_SIZE) as f, \
+            tempfile.TemporaryFile('w+', encoding='utf-8') as sequence, \
+            tempfile.TemporaryFile('w+', encoding='utf-8') as error_log:
+        for line_no, _, level, entry in iter_entries(iter_lines(f), SUMMARY_LEVELS):
+            if entry is None:
                 print(f"Warning: Invalid JSON at line {line_no}")
-    
-    # Display summary
-    print("📊 Summary:")
-    print(f"  Total requests: {len(requests)}")
-    print(f"  Total responses: {len(responses)}")
-    print(f"  Total errors: {len([e for e in errors if 'message' in e])}")
-    print()
-    
-    print("📨 Methods called:")
-    for method, count in sorted(methods.items()):
-        print(f"  {method}: {count}")
-    print()
-    
-    print("📋 Request sequence:")
-    for req in requests:
-        print(f"  Line {req['line']}: {req['method']} (id: {req['id']})")
-        if req['method'] == 'initialize':
-            params = req.get('params', {})
-            client = params.get('clientInfo', {})
-            if client:
-                print(f"    Client: {client.get('name')} v{client.get('version')}")
-            caps = params.get('capabilities', {})
-            if caps:
-                print(f"    Capabilities: {', '.join(caps.keys())}")
-    print()
-    
-    if errors:
-        print("❌ Errors found:")
-        for err in errors:
-            if 'message' in err:
-                print(f"  Line {err['line']}: {err.get('message')}")
-                if err.get('data'):
-                    print(f"    Details: {err['data']}")
-    else:
-        print("✅ No errors found")
-    
+                continue
+            msg = summary.add(level, entry, line_no)
+            if msg is not None:
+                sequence.writelines(describe_request(line_no, msg))
+            elif level == 'ERROR':
+                error_log.writelines(describe_error(line_no, entry))
+
+        # Display summary
+        print("📊 Summary:")
+        print(f"  Total requests: {summary.requests}")
+        print(f"  Total responses: {summary.responses}")
+        print(f"  Total errors: {summary.error_entries}")
+        print()
+
+        print("📨 Methods called:")
+        for method, count in sorted(summary.methods.items()):
+            print(f"  {method}: {count}")
+        print()
+
+        print_latency_report(summary)
+
+        print("📋 Request sequence:")
+        sys.stdout.flush()
+        sequence.seek(0)
+        shutil.copyfileobj(sequence, sys.stdout)
+        print()
+
+        if summary.has_errors:
+            print("❌ Errors found:")
+            sys.stdout.flush()
+            error_log.seek(0)
+            shutil.copyfileobj(error_log, sys.stdout)
+        else:
+            print("✅ No errors found")
+
     # Check for potential issues
     print("\n🔍 Potential issues:")
-    issues = []
-    
-    # Check if all requests got responses
-    req_ids = {r['id'] for r in requests if r['id'] is not None}
-    resp_ids = {r['id'] for r in responses}
-    missing = req_ids - resp_ids
-    if missing:
-        issues.append(f"Requests without responses: {missing}")
-    
-    # Check for unknown methods
-    known_methods = {'initialize', 'initialized', 'tools/list', 'resources/list', 
-                     'prompts/list', 'tools/call', 'ping'}
-    unknown = set(methods.keys()) - known_methods - {''}
-    if unknown:
-        issues.append(f"Unknown methods: {unknown}")
-    
+    issues = summary.issues()
+
     if issues:
         for issue in issues:
             print(f"  ⚠️  {issue}")
     else:
         print("  None detected")
 
-if __name__ == "__main__":
-    # Find latest trace file if not specified
-    if len(sys.argv) > 1:
-        trace_file = sys.argv[1]
+# --- Live follow mode --------------------------------------------------------
+
+class RollingCounter:
+    """Event counts in one-second slots over a sliding window"""
+
+    def __init__(self, window_s=300):
+        self.window_s = window_s
+        self.slots = deque()  # (second, count), oldest first
+        self.total = 0
+
+    def add(self, ts_ns, n=1):
+        second = ts_ns // 1_000_000_000
+        if self.slots and self.slots[-1][0] == second:
+            self.slots[-1] = (second, self.slots[-1][1] + n)
+        elif self.slots and self.slots[-1][0] > second:
+            # Slightly out-of-order timestamp: count it in the newest slot
+            self.slots[-1] = (self.slots[-1][0], self.slots[-1][1] + n)
+        else:
+            self.slots.append((second, n))
+        self.total += n
+        while self.slots and self.slots[0][0] <= second - self.window_s:
+            self.slots.popleft()
+
+    def count(self, now_ns, seconds):
+        """Events in the last `seconds` seconds before now"""
+        cutoff = now_ns // 1_000_000_000 - seconds
+        return sum(n for second, n in self.slots if second > cutoff)
+
+
+class TraceFollower:
+    """Tails a trace file, feeding only newly appended bytes into the counters"""
+
+    def __init__(self, filename, from_end=False):
+        self.filename = filename
+        self.from_end = from_end
+        self.reset()
+
+    def reset(self):
+        self.summary = TraceSummary(slowest=0)
+        self.request_rate = RollingCounter()
+        self.error_rate = RollingCounter()
+        self.invalid_lines = 0
+        self.offset = 0
+        self.line_no = 1 if not self.from_end else None
+        self.partial = b''
+
+    def poll(self, f):
+        """Read whatever was appended since the last poll; returns bytes read"""
+        size = os.fstat(f.fileno()).st_size
+        if size < self.offset:
+            # Truncated or rewritten: start over
+            self.from_end = False
+            self.reset()
+        if self.offset == 0 and self.from_end:
+            self.offset = size
+        f.seek(self.offset)
+        data = f.read(size - self.offset)
+        if not data:
+            return 0
+        self.offset += len(data)
+
+        lines = (self.partial + data).split(b'\n')
+        self.partial = lines.pop()
+        for line in lines:
+            self.feed(line)
+        return len(data)
+
+    def feed(self, line):
+        line_no = self.line_no or 0
+        if self.line_no is not None:
+            self.line_no += 1
+        decoded = decode_line(line, SUMMARY_LEVELS)
+        if decoded is None:
+            return
+        level, entry = decoded
+        if entry is None:
+            self.invalid_lines += 1
+            return
+        ts = parse_timestamp_ns(entry.get('timestamp')) or time.time_ns()
+        msg = self.summary.add(level, entry, line_no)
+        if msg is not None:
+            self.request_rate.add(ts)
+        elif level == 'ERROR' or (level == 'TRANSPORT_OUT' and (entry.get('data') or {}).get('has_error')):
+            self.error_rate.add(ts)
+
+    def render(self, now_ns=None):
+        """Dashboard text for the current state"""
+        now_ns = now_ns or time.time_ns()
+        summary = self.summary
+        out = [
+            f"=== MCP Trace Follow: {self.filename} ===  (Ctrl+C to stop)",
+            f"  Read: {self.offset} bytes, {summary.requests} requests, "
+            f"{summary.responses} responses, {self.invalid_lines} invalid lines",
+            "",
+            f"  Requests/s:   {self.request_rate.count(now_ns, 10) / 10:8.2f} (10s)  "
+            f"{self.request_rate.count(now_ns, 60) / 60:8.2f} (1m)  "
+            f"{self.request_rate.count(now_ns, 300) / 300:8.2f} (5m)",
+            f"  Errors/min:   {self.error_rate.count(now_ns, 60):8d} (1m)  "
+            f"{self.error_rate.count(now_ns, 300) / 5:8.1f} (5m avg)  total {self.error_rate.total}",
+            f"  In flight:    {len(summary.in_flight):8d}",
+        ]
+        if summary.in_flight:
+            msg_id, (method, tool, start_ns, line_no) = min(summary.in_flight.items(), key=lambda kv: kv[1][2])
+            name = f"{method} {tool}" if tool else method
+            out.append(f"    oldest: {name} (id: {msg_id}) waiting {(now_ns - start_ns) / 1e9:.1f}s, "
+                       f"line {line_no}")
+        pending = summary.pending_ids
+        shown = ', '.join(str(i) for i in list(pending)[:10])
+        out.append(f"  Unanswered:   {len(pending):8d}" + (f"  [{shown}{', ...' if len(pending) > 10 else ''}]" if pending else ""))
+
+        if summary.method_latency:
+            out.append("")
+            out.append(f"  {'method':<24} {'count':>7} {'p50 ms':>9} {'p99 ms':>9}")
+            busiest = sorted(summary.method_latency.items(), key=lambda kv: kv[1].count, reverse=True)[:8]
+            for method, hist in busiest:
+                out.append(f"  {method:<24} {hist.count:>7} {_ms(hist.percentile(50)):>9} {_ms(hist.percentile(99)):>9}")
+        return "\n".join(out)
+
+
+def follow_trace(filename, interval=1.0, from_end=False):
+    """Tail a growing trace and redraw a compact dashboard every `interval` seconds"""
+    follower = TraceFollower(filename, from_end=from_end)
+    clear = "\033[H\033[J" if sys.stdout.isatty() else ""
+    try:
+        with open(filename, 'rb') as f:
+            next_render = 0.0
+            while True:
+                read = follower.poll(f)
+                now = time.monotonic()
+                if now >= next_render:
+                    sys.stdout.write(clear + follower.render() + "\n" + ("" if clear else "\n"))
+                    sys.stdout.flush()
+                    next_render = now + interval
+                if not read:
+                    time.sleep(min(0.2, interval))
+    except KeyboardInterrupt:
+        print()
+
+
+# --- Fleet mode: many traces on all cores -------------------------------------
+
+FLEET_LEVELS = SUMMARY_LEVELS + ('TRANSPORT_RAW_OUT',)
+
+
+def summarize_file(filename, slowest=10):
+    """Worker: stream one trace into a compact TraceSummary (no raw records)"""
+    summary = TraceSummary(slowest=slowest)
+    with open(filename, 'rb', buffering=READ_BUFFER_SIZE) as f:
+        for line_no, _, line in iter_lines(f):
+            # Raw output lines can be huge; only an error response's one is needed
+            if not summary.awaiting_error_raw and peek_level(line) == 'TRANSPORT_RAW_OUT':
+                continue
+            decoded = decode_line(line, FLEET_LEVELS)
+            if decoded is not None and decoded[1] is not None:
+                summary.add(decoded[0], decoded[1], line_no)
+    # Tag the slowest calls with their file so they stay meaningful once merged
+    name = os.path.basename(filename)
+    summary.slowest = [(lat, f"{name}:{req}", resp, method, tool, msg_id)
+                       for lat, req, resp, method, tool, msg_id in summary.slowest]
+    return summary.compact()
+
+
+def expand_trace_paths(patterns):
+    """Files named by paths, globs or directories (searched recursively for *.log)"""
+    files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, '**', '*.log'), recursive=True)
+        else:
+            matches = glob.glob(pattern, recursive=True)
+        files.update(m for m in matches if os.path.isfile(m))
+    return sorted(files)
+
+
+def print_summary_report(summary, top=20):
+    """Counters, latency tables and error signatures of a merged or columnar summary"""
+    print(f"  Total requests: {summary.requests}")
+    print(f"  Total responses: {summary.responses}")
+    print(f"  Error responses: {summary.error_responses}")
+    print(f"  Total errors: {summary.error_entries}")
+    print(f"  Requests without responses: {summary.unanswered}")
+    print()
+
+    print("📨 Methods called:")
+    for method, count in sorted(summary.methods.items()):
+        print(f"  {method}: {count}")
+    print()
+
+    print_latency_report(summary)
+
+    if summary.error_signatures:
+        print(f"❌ Error signatures (top {top}):")
+        ranked = sorted(summary.error_signatures.items(), key=lambda kv: (-kv[1], kv[0]))
+        for signature, count in ranked[:top]:
+            print(f"  {count:>8}  {signature}")
+        if len(ranked) > top:
+            print(f"  ... {len(ranked) - top} more")
+        print()
+
+    unknown = summary.unknown_methods()
+    if unknown:
+        print("⚠️  Unknown methods:")
+        for method in sorted(unknown):
+            print(f"  {method}: {summary.methods[method]}")
+        print()
+
+
+def analyze_fleet(patterns, jobs=None, slowest=10, top=20):
+    """Analyze many traces in parallel and print one merged report"""
+    files = expand_trace_paths(patterns)
+    if not files:
+        print("No trace files found")
+        return False
+
+    jobs = jobs or os.cpu_count() or 1
+    total_bytes = sum(os.path.getsize(f) for f in files)
+    print(f"=== MCP Fleet Trace Analysis ===")
+    print(f"Files: {len(files)} ({total_bytes / 1e6:.1f} MB) with {jobs} worker(s)")
+    print()
+
+    merged = TraceSummary(slowest=slowest)
+    failed = []
+    started = time.perf_counter()
+    # Largest files first so one big trace does not finish last on its own
+    ordered = sorted(files, key=os.path.getsize, reverse=True)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(summarize_file, f, slowest): f for f in ordered}
+        for future in as_completed(futures):
+            try:
+                merged.merge(future.result())
+            except Exception as e:
+                failed.append((futures[future], e))
+    elapsed = time.perf_counter() - started
+
+    print("📊 Summary:")
+    print(f"  Files analyzed: {len(files) - len(failed)} in {elapsed:.2f}s "
+          f"({total_bytes / 1e6 / max(elapsed, 1e-9):.1f} MB/s)")
+    print_summary_report(merged, top)
+
+    if failed:
+        print("Failed files:")
+        for filename, error in failed:
+            print(f"  {filename}: {error}")
+    return not failed
+
+
+# --- Sidecar index -----------------------------------------------------------
+
+INDEX_VERSION = 1
+INDEX_LEVELS = {'TRANSPORT_IN': 0, 'TRANSPORT_OUT': 1, 'ERROR': 2}
+KIND_NAMES = {kind: level for level, kind in INDEX_LEVELS.items()}
+_HEAD_BYTES = 4096
+_INSERT_BATCH = 10000
+
+_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+CREATE TABLE IF NOT EXISTS names (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS entries (
+    offset INTEGER PRIMARY KEY,
+    length INTEGER NOT NULL,
+    line INTEGER NOT NULL,
+    kind INTEGER NOT NULL,
+    msg_id TEXT,
+    method INTEGER,
+    tool INTEGER,
+    ts INTEGER
+);
+CREATE INDEX IF NOT EXISTS entries_id ON entries (msg_id);
+CREATE INDEX IF NOT EXISTS entries_method ON entries (method, ts);
+CREATE INDEX IF NOT EXISTS entries_tool ON entries (tool, ts);
+CREATE INDEX IF NOT EXISTS entries_ts ON entries (ts);
+"""
+
+
+def index_path(trace_file):
+    return trace_file + '.idx'
+
+
+def _file_head(trace_file):
+    with open(trace_file, 'rb') as f:
+        return hashlib.sha1(f.read(_HEAD_BYTES)).hexdigest()
+
+
+def _id_key(msg_id):
+    """Ids are stored as JSON text so 1 and "1" stay distinct"""
+    msg_id = hashable_id(msg_id)
+    return None if msg_id is None else json.dumps(msg_id)
+
+
+class _NameTable:
+    """Dictionary-encodes method and tool names to small ints in the index"""
+
+    def __init__(self, db):
+        self.db = db
+        self.ids = {name: name_id for name_id, name in db.execute("SELECT id, name FROM names")}
+
+    def __call__(self, name):
+        if name is None:
+            return None
+        name_id = self.ids.get(name)
+        if name_id is None:
+            name_id = self.ids[name] = len(self.ids) + 1
+            self.db.execute("INSERT INTO names VALUES (?, ?)", (name_id, name))
+        return name_id
+
+    def lookup(self, name):
+        return self.ids.get(name, -1)
+
+
+def _index_row(offset, length, line_no, level, entry, names):
+    ts = parse_timestamp_ns(entry.get('timestamp'))
+    data = entry.get('data')
+    data = data if isinstance(data, dict) else {}
+    kind = INDEX_LEVELS[level]
+    if level == 'TRANSPORT_IN':
+        msg = decode_raw(entry)
+        if msg is None or 'method' not in msg:
+            return None
+        return (offset, length, line_no, kind, _id_key(msg.get('id')),
+                names(msg['method']), names(tool_name(msg)), ts)
+    if level == 'TRANSPORT_OUT':
+        return (offset, length, line_no, kind, _id_key(data.get('id')), None, None, ts)
+    return (offset, length, line_no, kind, None, None, None, ts)
+
+
+def update_index(trace_file, quiet=False):
+    """Create or extend the sidecar index; returns an open sqlite connection"""
+    db = sqlite3.connect(index_path(trace_file))
+    db.executescript(_INDEX_SCHEMA)
+    meta = dict(db.execute("SELECT key, value FROM meta"))
+
+    size = os.path.getsize(trace_file)
+    head = _file_head(trace_file) if size >= _HEAD_BYTES else None
+    offset = meta.get('indexed_bytes', 0)
+    line_no = meta.get('indexed_lines', 0) + 1
+    stale = (meta.get('version') != INDEX_VERSION or size < offset or
+             (meta.get('head') is not None and meta.get('head') != head))
+    if stale and offset:
+        # The trace was replaced or truncated: start over
+        db.execute("DELETE FROM entries")
+        db.execute("DELETE FROM names")
+        offset, line_no = 0, 1
+
+    if offset >= size:
+        return db
+
+    started = time.perf_counter()
+    names = _NameTable(db)
+    added = 0
+    batch = []
+    last_line = line_no - 1
+    with open(trace_file, 'rb', buffering=READ_BUFFER_SIZE) as f:
+        f.seek(offset)
+        for last_line, line_offset, line in iter_lines(f, offset, line_no, complete_only=True):
+            decoded = decode_line(line, INDEX_LEVELS)
+            if decoded is not None and decoded[1] is not None:
+                row = _index_row(line_offset, len(line), last_line, *decoded, names)
+                if row is not None:
+                    batch.append(row)
+            if len(batch) >= _INSERT_BATCH:
+                db.executemany("INSERT OR REPLACE INTO entries VALUES (?,?,?,?,?,?,?,?)", batch)
+                added += len(batch)
+                batch.clear()
+            offset = line_offset + len(line)
+        if batch:
+            db.executemany("INSERT OR REPLACE INTO entries VALUES (?,?,?,?,?,?,?,?)", batch)
+            added += len(batch)
+
+    if 'first_ts' not in meta or stale:
+        with open(trace_file, 'rb') as f:
+            first = decode_line(f.readline())
+        if first and first[1]:
+            db.execute("INSERT OR REPLACE INTO meta VALUES ('first_ts', ?)", (first[1].get('timestamp'),))
+    db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [
+        ('version', INDEX_VERSION),
+        ('indexed_bytes', offset),
+        ('indexed_lines', last_line),
+        ('head', _file_head(trace_file) if offset >= _HEAD_BYTES else None),
+    ])
+    db.commit()
+    if not quiet:
+        print(f"Indexed {added} entries up to line {last_line} "
+              f"({offset} bytes) in {time.perf_counter() - started:.2f}s")
+    return db
+
+
+def parse_time_arg(value, first_ts):
+    """Parse --since/--until: an RFC3339 timestamp, or HH:MM[:SS] on the trace's first day"""
+    if 'T' not in value and first_ts:
+        zone = 'Z' if first_ts.endswith('Z') else first_ts[-6:]
+        if value.count(':') == 1:
+            value += ':00'
+        value = f"{first_ts[:10]}T{value}{zone}"
+    ts = parse_timestamp_ns(value)
+    if ts is None:
+        raise ValueError(f"Cannot parse time: {value}")
+    return ts
+
+
+def query_index(trace_file, msg_id=None, method=None, tool=None, since=None, until=None,
+                limit=100, with_responses=True):
+    """Print the trace lines matching the given keys, reading only those lines"""
+    db = update_index(trace_file, quiet=True)
+    first_ts = dict(db.execute("SELECT key, value FROM meta")).get('first_ts')
+    names = _NameTable(db)
+
+    clauses, params = [], []
+    if msg_id is not None:
+        # Accept both numeric and string ids: 48213 matches 48213 and "48213"
+        keys = {json.dumps(msg_id)}
+        try:
+            keys.add(json.dumps(json.loads(msg_id)))
+        except ValueError:
+            pass
+        clauses.append(f"msg_id IN ({','.join('?' * len(keys))})")
+        params.extend(sorted(keys))
     else:
-        # Find latest in /tmp
-        import glob
-        files = glob.glob('/tmp/mcp_trace_*.log')
-        if not files:
-            print("No trace files found in /tmp/")
-            sys.exit(1)
-        trace_file = max(files, key=os.path.getmtime)
-    
-    if os.path.exists(trace_file):
-        analyze_trace(trace_file)
+        clauses.append("kind = 0")
+    if method:
+        clauses.append("method = ?")
+        params.append(names.lookup(method))
+    if tool:
+        clauses.append("tool = ?")
+        params.append(names.lookup(tool))
+    if since:
+        clauses.append("ts >= ?")
+        params.append(parse_time_arg(since, first_ts))
+    if until:
+        clauses.append("ts <= ?")
+        params.append(parse_time_arg(until, first_ts))
+
+    sql = f"SELECT offset, length, line, kind, msg_id FROM entries WHERE {' AND '.join(clauses)} ORDER BY offset"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    rows = db.execute(sql, params).fetchall()
+
+    if with_responses and msg_id is None and rows:
+        # Pull in the response that follows each matched request
+        extra = []
+        for offset, _, _, _, key in rows:
+            if key is not None:
+                extra.extend(db.execute(
+                    "SELECT offset, length, line, kind, msg_id FROM entries "
+                    "WHERE msg_id = ? AND kind = 1 AND offset > ? ORDER BY offset LIMIT 1",
+                    (key, offset)))
+        rows = sorted(set(rows) | set(extra))
+    db.close()
+
+    if not rows:
+        print("No matching entries")
+        return 0
+
+    with open(trace_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for offset, length, line_no, kind, _ in rows:
+            text = mm[offset:offset + length].decode('utf-8', 'replace').rstrip('\n')
+            print(f"Line {line_no} [{KIND_NAMES[kind]}]: {text}")
+    return len(rows)
+
+
+# --- Timeline export (Chrome trace events / Perfetto) -------------------------
+
+TIMELINE_LEVELS = ('TRACE', 'TRANSPORT_IN', 'TRANSPORT_PARSED', 'TRANSPORT_OUT',
+                   'TRANSPORT_RAW_OUT', 'ERROR')
+
+# Sub-phases of one request: (name, start mark, end mark)
+TIMELINE_PHASES = (('parse', 'in', 'parsed'), ('handle', 'parsed', 'out'),
+                   ('marshal', 'out', 'raw_out'))
+
+
+class TimelineWriter:
+    """Streams Chrome trace-event JSON, loadable in ui.perfetto.dev and chrome://tracing.
+
+    Events are written as soon as their request completes, so memory only
+    holds the requests still in flight.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.events = 0
+        self.origin_ns = None
+        f.write('{"displayTimeUnit":"ms","traceEvents":[\n')
+
+    def us(self, ts_ns):
+        return (ts_ns - self.origin_ns) / 1000.0
+
+    def emit(self, event):
+        if self.events:
+            self.f.write(',\n')
+        self.f.write(json.dumps(event, separators=(',', ':')))
+        self.events += 1
+
+    def span(self, name, start_ns, end_ns, cat, args=None, tid=1):
+        event = {"name": name, "cat": cat, "ph": "X", "pid": 1, "tid": tid,
+                 "ts": self.us(start_ns), "dur": max(end_ns - start_ns, 0) / 1000.0}
+        if args:
+            event["args"] = args
+        self.emit(event)
+
+    def counter(self, name, ts_ns, **values):
+        self.emit({"name": name, "ph": "C", "pid": 1, "ts": self.us(ts_ns), "args": values})
+
+    def instant(self, name, ts_ns, args=None):
+        self.emit({"name": name, "ph": "i", "s": "p", "pid": 1, "tid": 1, "ts": self.us(ts_ns),
+                   "args": args or {}})
+
+    def metadata(self, process_name):
+        self.emit({"name": "process_name", "ph": "M", "pid": 1, "args": {"name": process_name}})
+        self.emit({"name": "thread_name", "ph": "M", "pid": 1, "tid": 1,
+                   "args": {"name": "stdio read/handle/write loop"}})
+
+    def close(self):
+        self.f.write('\n]}\n')
+
+
+class TimelineBuilder:
+    """Turns trace entries into request spans with parse/handle/marshal sub-phases.
+
+    The stdio transport reads, parses, handles and writes one message at a
+    time, so a request's marks are IN -> PARSED -> OUT -> RAW_OUT and the
+    RAW_OUT entry belongs to the response just sent. Requests with a null
+    id are answered with id 0.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.pending = {}
+        self.current = None
+        self.last_out = None
+        self.last_end_ns = None
+        self.phases = defaultdict(LatencyHistogram)
+        self.spans = 0
+        self.max_in_flight = 0
+
+    def add(self, level, entry, line_no):
+        ts_ns = parse_timestamp_ns(entry.get('timestamp'))
+        if ts_ns is None:
+            return
+        writer = self.writer
+        if writer.origin_ns is None:
+            writer.origin_ns = ts_ns
+            data = entry.get('data') if isinstance(entry.get('data'), dict) else {}
+            writer.metadata(f"odata-mcp (pid {data['pid']})" if data.get('pid') else "odata-mcp")
+        data = entry.get('data') if isinstance(entry.get('data'), dict) else {}
+
+        if level == 'TRANSPORT_IN':
+            self._finish_notification()
+            msg = decode_raw(entry) or {}
+            if self.last_end_ns is not None:
+                self.phases['idle (waiting for stdin)'].add(ts_ns - self.last_end_ns)
+            self.current = {"in": ts_ns, "line": line_no, "msg": msg, "size": data.get('size')}
+        elif level == 'TRANSPORT_PARSED' and self.current is not None:
+            self.current["parsed"] = ts_ns
+            msg = self.current["msg"]
+            if msg.get('method') and 'id' in msg:
+                msg_id = msg['id'] if msg['id'] is not None else 0
+                self.pending[_id_key(msg_id)] = self.current
+                self.current = None
+                self._in_flight(ts_ns)
+        elif level == 'TRANSPORT_OUT':
+            request = self.pending.pop(_id_key(data.get('id')), None)
+            if request is None:
+                request = {"line": line_no, "msg": {}, "unmatched": True}
+            request["out"] = ts_ns
+            request["has_error"] = bool(data.get('has_error'))
+            self.last_out = request
+            self._in_flight(ts_ns)
+        elif level == 'TRANSPORT_RAW_OUT' and self.last_out is not None:
+            request, self.last_out = self.last_out, None
+            request["raw_out"] = ts_ns
+            request["out_size"] = data.get('size')
+            self._emit(request)
+            if request.get("out_size") is not None:
+                writer.counter("response bytes", ts_ns, bytes=request["out_size"])
+        elif level == 'ERROR':
+            writer.instant(str(entry.get('message')), ts_ns, {"line": line_no, **data})
+
+    def _in_flight(self, ts_ns):
+        self.max_in_flight = max(self.max_in_flight, len(self.pending))
+        self.writer.counter("requests in flight", ts_ns, requests=len(self.pending))
+
+    def _finish_notification(self):
+        """A message without a response (a notification) ends once it is parsed"""
+        request, self.current = self.current, None
+        if request is not None and "parsed" in request:
+            self._emit(request)
+
+    def _emit(self, request):
+        msg = request["msg"]
+        method = msg.get('method') or ("(unmatched response)" if request.get("unmatched")
+                                       else "(unparsed)")
+        tool = tool_name(msg) if msg else None
+        start = request.get("in", request.get("out"))
+        end = request.get("raw_out", request.get("out", request.get("parsed", start)))
+        args = {"id": msg.get('id'), "line": request["line"], "request_bytes": request.get("size"),
+                "response_bytes": request.get("out_size"), "error": request.get("has_error", False),
+                "unanswered": request.get("unanswered")}
+        name = f"{method} {tool}" if tool else method
+        self.writer.span(name, start, end, "request", {k: v for k, v in args.items() if v is not None})
+        for phase, begin, finish in TIMELINE_PHASES:
+            if begin in request and finish in request:
+                self.writer.span(phase, request[begin], request[finish], "phase")
+                self.phases[phase].add(request[finish] - request[begin])
+        self.phases['request (IN to RAW_OUT)'].add(end - start)
+        self.last_end_ns = end
+        self.spans += 1
+
+    def finish(self):
+        self._finish_notification()
+        for request in self.pending.values():
+            request["unanswered"] = True
+            self._emit(request)
+        self.pending.clear()
+
+
+def export_timeline(trace_file, output=None):
+    """Write a Chrome trace-event JSON timeline of a trace; returns the output path"""
+    output = output or trace_file + '.trace.json'
+    opener = gzip.open if output.endswith('.gz') else open
+    with open(trace_file, 'rb', buffering=READ_BUFFER_SIZE) as f, \
+            opener(output, 'wt', encoding='utf-8') as out:
+        writer = TimelineWriter(out)
+        builder = TimelineBuilder(writer)
+        for line_no, _, level, entry in iter_entries(iter_lines(f), TIMELINE_LEVELS):
+            if entry is None:
+                print(f"Warning: Invalid JSON at line {line_no}")
+                continue
+            builder.add(level, entry, line_no)
+        builder.finish()
+        writer.close()
+
+    print(f"=== MCP Trace Timeline ===")
+    print(f"File: {trace_file}")
+    print(f"  {builder.spans} requests, {writer.events} trace events, "
+          f"at most {builder.max_in_flight} in flight")
+    print()
+    print_latency_table("⏱️  Time per phase (ms):", builder.phases)
+    print(f"📝 Timeline written to {output}")
+    print("   Open it at https://ui.perfetto.dev or chrome://tracing")
+    return output
+
+
+# --- Columnar export (.npy / Parquet) -----------------------------------------
+
+COLUMNS_VERSION = 1
+# name -> (array typecode, numpy dtype); one row per trace line, so line = row + 1
+COLUMNS = {
+    'ts': ('q', '<i8'),          # timestamp ns, -1 when missing
+    'offset': ('q', '<i8'),      # byte offset of the line in the trace
+    'bytes': ('q', '<i8'),       # line length
+    'level': ('b', '|i1'),       # code in meta levels, -1 for invalid JSON
+    'method': ('i', '<i4'),      # code in meta methods, -1 for none
+    'tool': ('i', '<i4'),        # code in meta tools, -1 for none
+    'id': ('q', '<i8'),          # integer id, or code in meta ids with ID_TEXT
+    'size': ('q', '<i8'),        # data.size of TRANSPORT_IN / TRANSPORT_RAW_OUT, else -1
+    'flags': ('B', '|u1'),
+    'signature': ('i', '<i4'),   # code in meta signatures, -1 for none
+}
+DICTIONARIES = ('levels', 'methods', 'tools', 'ids', 'signatures')
+HAS_ERROR, HAS_RESULT, ID_TEXT, NO_ID, INVALID = 1, 2, 4, 8, 16
+_FLUSH_ROWS = 65536
+# .npy header size; it is rewritten with the final shape once the rows are known
+_NPY_HEADER = 128
+_TS_MARKER = b'"timestamp":"'
+_SIZE_MARKER = b'"size":'
+
+
+class _NpyColumns:
+    """Appends each column to its own .npy file as rows are flushed"""
+
+    def __init__(self, directory):
+        self.files = {}
+        for name in COLUMNS:
+            f = open(os.path.join(directory, f"{name}.npy"), 'wb')
+            f.write(b'\0' * _NPY_HEADER)
+            self.files[name] = f
+        self.rows = 0
+
+    def write(self, buffers):
+        for name, values in buffers.items():
+            if sys.byteorder == 'big':
+                values.byteswap()
+            values.tofile(self.files[name])
+        self.rows += len(buffers['ts'])
+
+    def close(self):
+        for name, f in self.files.items():
+            header = f"{{'descr': '{COLUMNS[name][1]}', 'fortran_order': False, 'shape': ({self.rows},), }}"
+            header = b'\x93NUMPY\x01\x00' + struct.pack('<H', _NPY_HEADER - 10) + \
+                header.encode('latin1').ljust(_NPY_HEADER - 11) + b'\n'
+            f.seek(0)
+            f.write(header)
+            f.close()
+
+
+class _ParquetColumns:
+    """Writes one Parquet row group per flush"""
+
+    def __init__(self, directory):
+        import pyarrow
+        import pyarrow.parquet
+        self.pa = pyarrow
+        self.schema = pyarrow.schema([(name, pyarrow.from_numpy_dtype(dtype.lstrip('<|')))
+                                      for name, (_, dtype) in COLUMNS.items()])
+        self.writer = pyarrow.parquet.ParquetWriter(os.path.join(directory, 'columns.parquet'), self.schema)
+        self.rows = 0
+
+    def write(self, buffers):
+        arrays = [self.pa.array(buffers[name], type=field.type)
+                  for name, field in zip(COLUMNS, self.schema)]
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+        self.rows += len(buffers['ts'])
+
+    def close(self):
+        self.writer.close()
+
+
+def _code(table, value):
+    """Dictionary-encode a value; codes are assigned in order of first use"""
+    code = table.get(value)
+    if code is None:
+        code = table[value] = len(table)
+    return code
+
+
+def _id_columns(msg_id, ids):
+    """(id, flags) for a JSON-RPC id: integers as is, anything else dictionary-encoded"""
+    msg_id = hashable_id(msg_id)
+    if msg_id is None:
+        return 0, NO_ID
+    if type(msg_id) is int and -2 ** 63 <= msg_id < 2 ** 63:
+        return msg_id, 0
+    return _code(ids, json.dumps(msg_id)), ID_TEXT
+
+
+def _peek_raw_out(line):
+    """(timestamp ns, size) of a TRANSPORT_RAW_OUT line without decoding its payload.
+
+    Keys are sorted, so data.size is the last "size" key and the timestamp
+    the last key of the line; quotes inside the raw payload are escaped.
+    """
+    pos = line.rfind(_TS_MARKER)
+    size_pos = line.rfind(_SIZE_MARKER, 0, line.rfind(_LEVEL_MARKER))
+    if pos < 0 or size_pos < 0:
+        return None
+    end = line.find(b'"', pos + len(_TS_MARKER))
+    digits = line[size_pos + len(_SIZE_MARKER):line.find(b'}', size_pos)]
+    ts = parse_timestamp_ns(line[pos + len(_TS_MARKER):end].decode('ascii', 'replace'))
+    if ts is None or not digits.isdigit():
+        return None
+    return ts, int(digits)
+
+
+def _columns_row(level, entry, tables, awaiting_error_raw):
+    """(ts, level, method, tool, id, size, flags, signature) of one decoded entry"""
+    ts = parse_timestamp_ns(entry.get('timestamp'))
+    data = entry.get('data')
+    data = data if isinstance(data, dict) else {}
+    method = tool = signature = -1
+    msg_id, flags = 0, NO_ID
+    size = data.get('size') if type(data.get('size')) is int else -1
+    if level == 'TRANSPORT_IN':
+        msg = decode_raw(entry)
+        if msg is not None and 'method' in msg:
+            name = msg['method']
+            method = _code(tables['methods'], name if isinstance(name, str) else json.dumps(name))
+            name = tool_name(msg)
+            tool = -1 if name is None else _code(tables['tools'], name)
+            msg_id, flags = _id_columns(msg.get('id'), tables['ids'])
+    elif level in ('TRANSPORT_OUT', 'TRANSPORT_PARSED'):
+        msg_id, flags = _id_columns(data.get('id'), tables['ids'])
+        if data.get('method'):
+            method = _code(tables['methods'], str(data['method']))
+        flags |= HAS_ERROR if data.get('has_error') else 0
+        flags |= HAS_RESULT if data.get('has_result') else 0
+    elif level == 'ERROR':
+        detail = data.get('error')
+        message = str(entry.get('message'))
+        signature = _code(tables['signatures'],
+                          error_signature(f"{message}: {detail}" if detail else message))
+    elif level == 'TRANSPORT_RAW_OUT' and awaiting_error_raw:
+        msg = decode_raw(entry)
+        error = msg.get('error') if msg else None
+        if isinstance(error, dict):
+            signature = _code(tables['signatures'],
+                              error_signature(f"[{error.get('code')}] {error.get('message')}"))
+    return ts, _code(tables['levels'], level), method, tool, msg_id, size, flags, signature
+
+
+def _have_pyarrow():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def columns_meta_path(directory):
+    return os.path.join(directory, 'meta.json')
+
+
+def export_columns(trace_file, output=None, fmt='npy'):
+    """Stream a trace into one column per field; returns the output directory"""
+    output = output or trace_file + '.cols'
+    os.makedirs(output, exist_ok=True)
+    started = time.perf_counter()
+    writer = _ParquetColumns(output) if fmt == 'parquet' else _NpyColumns(output)
+    tables = {name: {} for name in DICTIONARIES}
+    buffers = {name: array.array(typecode) for name, (typecode, _) in COLUMNS.items()}
+    awaiting_error_raw = False
+    with open(trace_file, 'rb', buffering=READ_BUFFER_SIZE) as f:
+        for _, offset, line in iter_lines(f):
+            row = None
+            level = peek_level(line)
+            if level == 'TRANSPORT_RAW_OUT' and not awaiting_error_raw:
+                # Raw output lines can be huge and hold nothing else worth a column
+                peeked = _peek_raw_out(line)
+                if peeked is not None:
+                    row = (peeked[0], _code(tables['levels'], level), -1, -1, 0, peeked[1], NO_ID, -1)
+            if row is None:
+                level, entry = decode_line(line)
+                if entry is None:
+                    row = (-1, -1, -1, -1, 0, -1, INVALID | NO_ID, -1)
+                else:
+                    row = _columns_row(level, entry, tables, awaiting_error_raw)
+                    if level == 'TRANSPORT_OUT':
+                        awaiting_error_raw = bool(row[6] & HAS_ERROR)
+                    elif level == 'TRANSPORT_RAW_OUT':
+                        awaiting_error_raw = False
+            ts, level_code, method, tool, msg_id, size, flags, signature = row
+            buffers['ts'].append(-1 if ts is None else ts)
+            buffers['offset'].append(offset)
+            buffers['bytes'].append(len(line))
+            buffers['level'].append(level_code)
+            buffers['method'].append(method)
+            buffers['tool'].append(tool)
+            buffers['id'].append(msg_id)
+            buffers['size'].append(size)
+            buffers['flags'].append(flags)
+            buffers['signature'].append(signature)
+            if len(buffers['ts']) >= _FLUSH_ROWS:
+                writer.write(buffers)
+                buffers = {name: array.array(typecode) for name, (typecode, _) in COLUMNS.items()}
+    writer.write(buffers)
+    writer.close()
+
+    meta = {
+        'version': COLUMNS_VERSION,
+        'format': fmt,
+        'source': os.path.abspath(trace_file),
+        'source_bytes': os.path.getsize(trace_file),
+        'rows': writer.rows,
+        'columns': {name: dtype for name, (_, dtype) in COLUMNS.items()},
+        'dictionaries': {name: list(table) for name, table in tables.items()},
+    }
+    with open(columns_meta_path(output), 'w') as f:
+        json.dump(meta, f)
+    elapsed = time.perf_counter() - started
+
+    stored = sum(os.path.getsize(os.path.join(output, name)) for name in os.listdir(output))
+    print(f"=== MCP Trace Columns ===")
+    print(f"File: {trace_file}")
+    print(f"  {writer.rows} lines, {meta['source_bytes'] / 1e6:.1f} MB -> {stored / 1e6:.1f} MB "
+          f"of {fmt} columns in {elapsed:.2f}s")
+    print(f"  {len(tables['methods'])} methods, {len(tables['tools'])} tools, "
+          f"{len(tables['signatures'])} error signatures")
+    print()
+    print(f"📝 Columns written to {output}")
+    print(f"   Analyze them with: view_trace.py analyze {output}")
+    return output
+
+
+def is_columns_dir(path):
+    return os.path.isdir(path) and os.path.exists(columns_meta_path(path))
+
+
+def load_columns(directory):
+    """meta.json and a dict of numpy arrays; .npy columns are memory-mapped"""
+    if np is None:
+        raise SystemExit("Error: analyzing exported columns needs numpy (pip install numpy)")
+    with open(columns_meta_path(directory)) as f:
+        meta = json.load(f)
+    if meta.get('version') != COLUMNS_VERSION:
+        raise SystemExit(f"Error: {directory} has column format {meta.get('version')}, "
+                         f"expected {COLUMNS_VERSION}; export it again")
+    if meta['format'] == 'parquet':
+        import pyarrow.parquet
+        table = pyarrow.parquet.read_table(os.path.join(directory, 'columns.parquet'))
+        columns = {name: table.column(name).to_numpy() for name in COLUMNS}
     else:
+        columns = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+                   for name in COLUMNS}
+    return meta, columns
+
+
+def _histograms(groups, latencies, names):
+    """LatencyHistogram per group code, built with a few sorts instead of per-sample adds"""
+    histograms = defaultdict(LatencyHistogram)
+    if not len(latencies):
+        return histograms
+    buckets = np.full(len(latencies), -1, dtype=np.int64)
+    positive = latencies > 0
+    buckets[positive] = np.floor(np.log2(latencies[positive]) * LatencyHistogram.BUCKETS_PER_DOUBLING)
+    order = np.lexsort((buckets, groups))
+    groups, buckets, latencies = groups[order], buckets[order], latencies[order]
+    new_group = np.r_[True, groups[1:] != groups[:-1]]
+    starts = np.flatnonzero(new_group | np.r_[True, buckets[1:] != buckets[:-1]])
+    for start, count in zip(starts, np.diff(np.r_[starts, len(groups)])):
+        histograms[names[groups[start]]].buckets[int(buckets[start])] += int(count)
+    starts = np.flatnonzero(new_group)
+    for start, count, total, low, high in zip(starts, np.diff(np.r_[starts, len(groups)]),
+                                              np.add.reduceat(latencies, starts),
+                                              np.minimum.reduceat(latencies, starts),
+                                              np.maximum.reduceat(latencies, starts)):
+        hist = histograms[names[groups[start]]]
+        hist.count, hist.total, hist.min, hist.max = int(count), int(total), int(low), int(high)
+    return histograms
+
+
+def summarize_columns(meta, columns, slowest=10):
+    """The TraceSummary counters of a trace, computed over its exported columns"""
+    tables = meta['dictionaries']
+    levels = {name: code for code, name in enumerate(tables['levels'])}
+    level, flags = columns['level'], columns['flags']
+    method, ts = columns['method'], columns['ts']
+    key_id, text_id = columns['id'], (flags & ID_TEXT) > 0
+    has_id = (flags & NO_ID) == 0
+    is_error = (flags & HAS_ERROR) > 0
+
+    requests = (level == levels.get('TRANSPORT_IN', -2)) & (method >= 0)
+    responses = level == levels.get('TRANSPORT_OUT', -2)
+    summary = TraceSummary(slowest=slowest)
+    summary.requests = int(requests.sum())
+    summary.responses = int((responses & ~is_error).sum())
+    summary.error_responses = int((responses & is_error).sum())
+    summary.error_entries = int((level == levels.get('ERROR', -2)).sum())
+    counts = np.bincount(method[requests], minlength=len(tables['methods']))
+    summary.methods.update({tables['methods'][code]: int(n) for code, n in enumerate(counts) if n})
+    signatures = columns['signature']
+    counts = np.bincount(signatures[signatures >= 0], minlength=len(tables['signatures']))
+    summary.error_signatures.update({tables['signatures'][code]: int(n)
+                                     for code, n in enumerate(counts) if n})
+
+    # An id is still pending when its last request/successful-response event is a request
+    events = np.flatnonzero((requests | (responses & ~is_error)) & has_id)
+    order = events[np.lexsort((events, key_id[events], text_id[events]))]
+    last = np.r_[(key_id[order[1:]] != key_id[order[:-1]]) | (text_id[order[1:]] != text_id[order[:-1]]), True]
+    summary.merged_unanswered = int(requests[order[last]].sum())
+
+    # A response answers the latest earlier request with its id, unless another
+    # response came in between (TraceSummary.in_flight)
+    events = np.flatnonzero(((requests & (ts >= 0)) | responses) & has_id)
+    order = events[np.lexsort((events, key_id[events], text_id[events]))]
+    request_rows, response_rows = order[:-1], order[1:]
+    paired = (responses[response_rows] & requests[request_rows] &
+              (key_id[response_rows] == key_id[request_rows]) &
+              (text_id[response_rows] == text_id[request_rows]) & (ts[response_rows] >= 0))
+    request_rows, response_rows = request_rows[paired], response_rows[paired]
+    latencies = np.maximum(ts[response_rows] - ts[request_rows], 0).astype(np.int64)
+    summary.method_latency.update(_histograms(method[request_rows], latencies, tables['methods']))
+    tools = columns['tool'][request_rows]
+    has_tool = tools >= 0
+    summary.tool_latency.update(_histograms(tools[has_tool], latencies[has_tool], tables['tools']))
+
+    if slowest > 0 and len(latencies):
+        top = np.argsort(latencies)[-slowest:] if len(latencies) > slowest else np.arange(len(latencies))
+        for i in top:
+            row = request_rows[i]
+            msg_id = json.loads(tables['ids'][key_id[row]]) if text_id[row] else int(key_id[row])
+            tool = int(columns['tool'][row])
+            summary.slowest.append((int(latencies[i]), int(row) + 1, int(response_rows[i]) + 1,
+                                    tables['methods'][method[row]],
+                                    tables['tools'][tool] if tool >= 0 else None, msg_id))
+    return summary
+
+
+def analyze_columns(directory, slowest=10, top=20):
+    """The summary report of an exported trace, from vectorized column operations"""
+    started = time.perf_counter()
+    meta, columns = load_columns(directory)
+    summary = summarize_columns(meta, columns, slowest)
+    elapsed = time.perf_counter() - started
+
+    print(f"=== MCP Trace Analysis (columns) ===")
+    print(f"File: {meta['source']}")
+    if not os.path.exists(meta['source']):
+        print("⚠️  The source trace no longer exists; lines refer to the exported copy")
+    elif os.path.getsize(meta['source']) != meta['source_bytes']:
+        print(f"⚠️  The trace has changed since the export ({meta['source_bytes']} bytes then, "
+              f"{os.path.getsize(meta['source'])} now); export it again to include new lines")
+    print()
+    print("📊 Summary:")
+    print(f"  Lines analyzed: {meta['rows']} in {elapsed * 1000:.1f} ms")
+    invalid = int(((columns['flags'] & INVALID) > 0).sum())
+    if invalid:
+        print(f"  Invalid JSON lines: {invalid}")
+    print_summary_report(summary, top)
+    if not summary.has_errors:
+        print("✅ No errors found")
+
+
+def latest_trace_file():
+    """Newest /tmp/mcp_trace_*.log, or None"""
+    import glob
+    files = glob.glob('/tmp/mcp_trace_*.log')
+    if not files:
+        return None
+    return max(files, key=os.path.getmtime)
+
+
+COMMANDS = ('analyze', 'index', 'query', 'fleet', 'timeline', 'columns')
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # Plain `view_trace.py [file]` keeps working as the analyze command
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ('-h', '--help')):
+        argv.insert(0, 'analyze')
+
+    parser = argparse.ArgumentParser(description="Analyze MCP trace logs (--trace-mcp)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    analyze = commands.add_parser('analyze', help="summary report (default command)")
+    analyze.add_argument("trace_file", nargs="?",
+                         help="trace file or exported columns directory "
+                              "(default: newest /tmp/mcp_trace_*.log)")
+    analyze.add_argument("--top", type=int, default=10, metavar="N",
+                         help="number of slowest calls to list (default: 10)")
+    analyze.add_argument("--follow", "-f", action="store_true",
+                         help="keep reading the trace as it grows and show live stats")
+    analyze.add_argument("--from-end", action="store_true",
+                         help="with --follow, ignore what is already in the file")
+    analyze.add_argument("--interval", type=float, default=1.0,
+                         help="with --follow, seconds between dashboard refreshes (default: 1)")
+
+    index = commands.add_parser('index', help="build or refresh the sidecar index")
+    index.add_argument("trace_file")
+
+    query = commands.add_parser('query', help="print matching lines using the sidecar index")
+    query.add_argument("trace_file")
+    query.add_argument("--id", dest="msg_id", help="request id")
+    query.add_argument("--method", help="JSON-RPC method, e.g. tools/call")
+    query.add_argument("--tool", help="tool name of tools/call requests")
+    query.add_argument("--since", help="start time (RFC3339 or HH:MM[:SS])")
+    query.add_argument("--until", help="end time (RFC3339 or HH:MM[:SS])")
+    query.add_argument("--limit", type=int, default=100, help="maximum requests to show (0 = all)")
+    query.add_argument("--no-responses", action="store_true",
+                       help="do not include the response to each matched request")
+
+    fleet = commands.add_parser('fleet', help="merged report for many traces, analyzed in parallel")
+    fleet.add_argument("paths", nargs="+", help="trace files, globs or directories")
+    fleet.add_argument("--jobs", "-j", type=int, default=None,
+                       help="worker processes (default: number of CPUs)")
+    fleet.add_argument("--top", type=int, default=10, metavar="N",
+                       help="number of slowest calls to list (default: 10)")
+
+    timeline = commands.add_parser('timeline', help="export a Chrome trace-event / Perfetto timeline")
+    timeline.add_argument("trace_file", nargs="?",
+                          help="trace file (default: newest /tmp/mcp_trace_*.log)")
+    timeline.add_argument("--output", "-o",
+                          help="output file, gzip'd if it ends in .gz (default: <trace>.trace.json)")
+
+    columns = commands.add_parser('columns', help="export compact .npy or Parquet columns for fast analysis")
+    columns.add_argument("trace_file", nargs="?",
+                         help="trace file (default: newest /tmp/mcp_trace_*.log)")
+    columns.add_argument("--output", "-o", help="output directory (default: <trace>.cols)")
+    columns.add_argument("--format", choices=('npy', 'parquet'), default='npy',
+                         help="npy (no dependencies) or parquet (needs pyarrow) (default: npy)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'fleet':
+        sys.exit(0 if analyze_fleet(args.paths, args.jobs, slowest=args.top) else 1)
+
+    # Find latest trace file if not specified
+    trace_file = args.trace_file or latest_trace_file()
+    if trace_file is None:
+        print("No trace files found in /tmp/")
+        sys.exit(1)
+    if not os.path.exists(trace_file):
         print(f"Error: File not found: {trace_file}")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
+
+    if args.command == 'analyze' and is_columns_dir(trace_file):
+        analyze_columns(trace_file, slowest=args.top)
+    elif args.command == 'analyze' and args.follow:
+        follow_trace(trace_file, args.interval, args.from_end)
+    elif args.command == 'analyze':
+        analyze_trace(trace_file, slowest=args.top)
+    elif args.command == 'timeline':
+        export_timeline(trace_file, args.output)
+    elif args.command == 'columns':
+        if args.format == 'parquet' and not _have_pyarrow():
+            print("Error: --format parquet needs pyarrow (pip install pyarrow)")
+            sys.exit(1)
+        export_columns(trace_file, args.output, args.format)
+    elif args.command == 'index':
+        update_index(trace_file).close()
+        print(f"Index: {index_path(trace_file)} ({os.path.getsize(index_path(trace_file))} bytes)")
+    elif args.command == 'query':
+        try:
+            query_index(trace_file, args.msg_id, args.method, args.tool, args.since, args.until,
+                        args.limit, with_responses=not args.no_responses)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()